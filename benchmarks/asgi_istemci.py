@@ -0,0 +1,97 @@
+# benchmarks/asgi_istemci.py
+"""
+Benchmark betikleri için küçük, bağımlılıksız ASGI istemcisi.
+Uygulamayı ağ olmadan, aynı süreç içinde çağırır (lifespan dahil).
+"""
+import asyncio
+import json
+from typing import NamedTuple, Optional
+from urllib.parse import urlencode
+
+
+class Yanit(NamedTuple):
+    durum: int
+    basliklar: dict
+    govde: bytes
+
+    def json(self):
+        return json.loads(self.govde)
+
+
+class AsgiIstemci:
+    def __init__(self, app):
+        self.app = app
+        self._lifespan_gorevi = None
+
+    async def __aenter__(self):
+        self._lifespan_gelen = asyncio.Queue()
+        self._lifespan_giden = asyncio.Queue()
+        scope = {"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}
+        self._lifespan_gorevi = asyncio.ensure_future(
+            self.app(scope, self._lifespan_gelen.get, self._lifespan_giden.put)
+        )
+        await self._lifespan_gelen.put({"type": "lifespan.startup"})
+        mesaj = await self._lifespan_giden.get()
+        if mesaj["type"] != "lifespan.startup.complete":
+            raise RuntimeError(f"Uygulama başlatılamadı: {mesaj}")
+        return self
+
+    async def __aexit__(self, *hata):
+        await self._lifespan_gelen.put({"type": "lifespan.shutdown"})
+        await self._lifespan_giden.get()
+        await self._lifespan_gorevi
+
+    async def istek(self, yontem: str, yol: str, json_govde=None,
+                    params: Optional[dict] = None, basliklar: Optional[dict] = None) -> Yanit:
+        govde = b"" if json_govde is None else json.dumps(json_govde).encode("utf-8")
+        ham_basliklar = [(b"host", b"benchmark")]
+        if json_govde is not None:
+            ham_basliklar.append((b"content-type", b"application/json"))
+            ham_basliklar.append((b"content-length", str(len(govde)).encode()))
+        for ad, deger in (basliklar or {}).items():
+            ham_basliklar.append((ad.lower().encode(), deger.encode()))
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": yontem.upper(),
+            "scheme": "http",
+            "path": yol,
+            "raw_path": yol.encode(),
+            "query_string": urlencode(params or {}).encode(),
+            "root_path": "",
+            "headers": ham_basliklar,
+            "client": ("127.0.0.1", 50000),
+            "server": ("benchmark", 80),
+            "state": {},
+        }
+
+        gonderildi = False
+        bitti = asyncio.Event()
+        durum = 500
+        yanit_basliklari = {}
+        parcalar = []
+
+        async def receive():
+            nonlocal gonderildi
+            if not gonderildi:
+                gonderildi = True
+                return {"type": "http.request", "body": govde, "more_body": False}
+            await bitti.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(mesaj):
+            nonlocal durum
+            if mesaj["type"] == "http.response.start":
+                durum = mesaj["status"]
+                for ad, deger in mesaj.get("headers", []):
+                    yanit_basliklari[ad.decode().lower()] = deger.decode()
+            elif mesaj["type"] == "http.response.body":
+                parcalar.append(mesaj.get("body", b""))
+                if not mesaj.get("more_body", False):
+                    bitti.set()
+
+        await self.app(scope, receive, send)
+        bitti.set()
+        return Yanit(durum, yanit_basliklari, b"".join(parcalar))
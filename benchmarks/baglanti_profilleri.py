@@ -0,0 +1,86 @@
+# benchmarks/baglanti_profilleri.py
+"""
+Her havuz profili için istek başına bağlantı maliyetini ölçer.
+
+Bir "istek": oturum aç -> SELECT 1 -> oturumu kapat.
+İlk istek (soğuk başlangıç) ayrı raporlanır.
+
+Kullanım (proje kökünden):
+    python -m benchmarks.baglanti_profilleri --istek 200 --es-zamanli 8
+"""
+import argparse
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from db import DATABASE_URL, motor_ayarlari, settings
+
+# (rapor adı, profil, ek ayarlar)
+PROFILLER = [
+    ("null", "null", {}),
+    ("kuyruk", "kuyruk", {}),
+    ("kuyruk+lifo", "kuyruk", {"pool_use_lifo": True}),
+    ("kuyruk-pre_ping'siz", "kuyruk", {"pool_pre_ping": False}),
+]
+
+
+def _yuzdelik(degerler, oran):
+    sirali = sorted(degerler)
+    return sirali[min(len(sirali) - 1, int(len(sirali) * oran))]
+
+
+def profil_olc(ad, profil, ek, istek_sayisi, es_zamanli):
+    ayarlar = {**motor_ayarlari(profil), **ek}
+    motor = create_engine(DATABASE_URL, **ayarlar)
+    Oturum = sessionmaker(bind=motor)
+
+    def istek():
+        baslangic = time.perf_counter()
+        db = Oturum()
+        try:
+            db.execute(text("SELECT 1"))
+        finally:
+            db.close()
+        return (time.perf_counter() - baslangic) * 1000
+
+    try:
+        soguk = istek()
+        with ThreadPoolExecutor(max_workers=es_zamanli) as havuz:
+            sureler = list(havuz.map(lambda _: istek(), range(istek_sayisi)))
+    finally:
+        motor.dispose()
+
+    return {
+        "profil": ad,
+        "soguk_ms": round(soguk, 2),
+        "ortalama_ms": round(statistics.mean(sureler), 2),
+        "p50_ms": round(_yuzdelik(sureler, 0.50), 2),
+        "p95_ms": round(_yuzdelik(sureler, 0.95), 2),
+        "p99_ms": round(_yuzdelik(sureler, 0.99), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--istek", type=int, default=200, help="profil başına istek sayısı")
+    parser.add_argument("--es-zamanli", type=int, default=settings.DB_POOL_SIZE, help="eşzamanlı iş parçacığı")
+    parser.add_argument("--json", dest="json_dosyasi", help="sonuçların yazılacağı dosya")
+    args = parser.parse_args()
+
+    sonuclar = [profil_olc(ad, profil, ek, args.istek, args.es_zamanli) for ad, profil, ek in PROFILLER]
+
+    for s in sonuclar:
+        print(f"{s['profil']:<22} soğuk={s['soguk_ms']:>8} ms  ort={s['ortalama_ms']:>7} ms  "
+              f"p50={s['p50_ms']:>7}  p95={s['p95_ms']:>7}  p99={s['p99_ms']:>7}")
+
+    if args.json_dosyasi:
+        with open(args.json_dosyasi, "w", encoding="utf-8") as f:
+            json.dump(sonuclar, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# benchmarks/serilestirme.py
+"""
+Liste endpoint'i serileştirme maliyeti: saniyede satır (hasta listesi).
+
+Yollar:
+  orm        : tam ORM nesneleri -> response_model doğrulaması (from_attributes)
+               -> json.dumps (HIZLI_JSON=False, FastAPI'nin yaptığı gibi)
+  satir+pyd  : sadece şema kolonları (tuple) -> TypeAdapter doğrulaması -> json.dumps
+  hizli      : sadece şema kolonları (tuple) -> sözlük -> orjson / json_baytlari
+               (HIZLI_JSON=True)
+
+Veritabanı etkisini ayırmak için bellek içi SQLite kullanılır; sorgu süresi
+(satır oluşturma dahil) ve serileştirme süresi ayrı raporlanır.
+
+Kullanım (proje kökünden):
+    python -m benchmarks.serilestirme --satir 5000 --tekrar 20
+"""
+import argparse
+import datetime
+import json
+import statistics
+import time
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import models, schemas
+from services import hizli_json
+from services.hizli_json import json_baytlari, satir_sozlukleri, sema_kolonlari
+
+_LISTE = TypeAdapter(list[schemas.HastaBase])
+
+
+def _fastapi_json(veri) -> bytes:
+    # fastapi.responses.JSONResponse.render ile aynı
+    return json.dumps(veri, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def _orm(db):
+    nesneler = db.query(models.Hasta).all()
+    t = time.perf_counter()
+    govde = _fastapi_json(_LISTE.dump_python(_LISTE.validate_python(nesneler, from_attributes=True), mode="json"))
+    return t, govde
+
+
+def _satir_pydantic(db):
+    satirlar = db.query(*sema_kolonlari(models.Hasta, schemas.HastaBase)).all()
+    t = time.perf_counter()
+    govde = _fastapi_json(_LISTE.dump_python(_LISTE.validate_python(satirlar, from_attributes=True), mode="json"))
+    return t, govde
+
+
+def _hizli(db):
+    satirlar = db.query(*sema_kolonlari(models.Hasta, schemas.HastaBase)).all()
+    t = time.perf_counter()
+    govde = json_baytlari(satir_sozlukleri(satirlar))
+    return t, govde
+
+
+YOLLAR = [("orm", _orm), ("satir+pyd", _satir_pydantic), ("hizli", _hizli)]
+
+
+def _hazirla(satir_sayisi: int):
+    motor = create_engine("sqlite://")
+    models.Hasta.__table__.create(motor)
+    dogum = datetime.date(1970, 1, 1)
+    with motor.begin() as baglanti:
+        baglanti.execute(models.Hasta.__table__.insert(), [
+            {
+                "adsoyad": f"Hasta Ğüşiöç {i}",
+                "tckimlik": f"{i:011d}",
+                "telefon": f"555{i:07d}",
+                "email": f"hasta{i}@ornek.com",
+                "dogumtarihi": dogum + datetime.timedelta(days=i % 20000),
+                "sifre": "$2b$12$" + "x" * 53,
+            }
+            for i in range(1, satir_sayisi + 1)
+        ])
+    return sessionmaker(bind=motor)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--satir", type=int, default=5000)
+    parser.add_argument("--tekrar", type=int, default=20)
+    parser.add_argument("--json", dest="json_dosyasi", help="sonuçların yazılacağı dosya")
+    args = parser.parse_args()
+
+    Oturum = _hazirla(args.satir)
+    sonuclar = []
+    for ad, yol in YOLLAR:
+        sorgu, serilestirme, toplam = [], [], []
+        for _ in range(args.tekrar):
+            db = Oturum()
+            try:
+                t0 = time.perf_counter()
+                t1, govde = yol(db)
+                t2 = time.perf_counter()
+            finally:
+                db.close()
+            sorgu.append(t1 - t0)
+            serilestirme.append(t2 - t1)
+            toplam.append(t2 - t0)
+
+        sonuc = {
+            "yol": ad,
+            "satir": args.satir,
+            "govde_bayt": len(govde),
+            "sorgu_ms": round(statistics.median(sorgu) * 1000, 2),
+            "serilestirme_ms": round(statistics.median(serilestirme) * 1000, 2),
+            "saniyede_satir": round(args.satir / statistics.median(toplam)),
+        }
+        sonuclar.append(sonuc)
+        print(f"{ad:<10} sorgu={sonuc['sorgu_ms']:>8} ms  serileştirme={sonuc['serilestirme_ms']:>8} ms  "
+              f"{sonuc['saniyede_satir']:>9} satır/sn  ({sonuc['govde_bayt']} bayt)")
+
+    print(f"orjson: {'var' if hizli_json.orjson is not None else 'yok (standart json)'}")
+
+    if args.json_dosyasi:
+        with open(args.json_dosyasi, "w", encoding="utf-8") as f:
+            json.dump({"orjson": hizli_json.orjson is not None, "sonuclar": sonuclar}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# benchmarks/sifre_hash.py
+"""
+bcrypt maliyet (cost) ayarına göre kayıt kapasitesini ölçer.
+
+Her maliyet için:
+  - tek hash süresi (medyan, ms)
+  - hash havuzuyla (SifreHashHavuzu) saniyedeki hash sayısı ve çekirdek başına değer
+Veritabanı gerekmez; sadece hash havuzu ölçülür (kayıt endpoint'inin CPU sınırı).
+
+Kullanım (proje kökünden):
+    python -m benchmarks.sifre_hash --maliyet 10 11 12 13 --sure 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+from db import settings
+from services import sifre_hash
+
+
+def _tek_hash_ms(maliyet: int, tekrar: int) -> float:
+    sureler = []
+    for _ in range(tekrar):
+        t0 = time.perf_counter()
+        sifre_hash.hashle("olcum-sifresi-123", maliyet)
+        sureler.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(sureler)
+
+
+async def _havuz_verimi(sure: float, eszamanli: int) -> int:
+    """'eszamanli' istemci 'sure' saniye boyunca sürekli kayıt hash'i ister."""
+    havuz = sifre_hash.SifreHashHavuzu()
+    bitis = time.perf_counter() + sure
+    tamamlanan = 0
+
+    async def istemci():
+        nonlocal tamamlanan
+        while time.perf_counter() < bitis:
+            await havuz.hashle("olcum-sifresi-123")
+            tamamlanan += 1
+
+    await asyncio.gather(*(istemci() for _ in range(eszamanli)))
+    havuz.kapat()
+    return tamamlanan
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--maliyet", type=int, nargs="+", default=[10, 11, 12, 13])
+    parser.add_argument("--sure", type=float, default=5.0, help="her maliyet için verim ölçüm süresi (saniye)")
+    parser.add_argument("--tekrar", type=int, default=5, help="tek hash süresi için tekrar sayısı")
+    parser.add_argument("--isci", type=int, default=0, help="havuz iş parçacığı sayısı (0: CPU çekirdek sayısı)")
+    parser.add_argument("--json", dest="json_dosyasi", help="sonuçların yazılacağı dosya")
+    args = parser.parse_args()
+
+    settings.SIFRE_HASH_ISCI = args.isci
+    isci = args.isci or os.cpu_count() or 1
+    # Kabul kontrolü ölçümü etkilemesin
+    settings.SIFRE_HASH_KUYRUK = isci * 4
+
+    sonuclar = []
+    for maliyet in args.maliyet:
+        settings.SIFRE_BCRYPT_MALIYET = maliyet
+        tek_ms = _tek_hash_ms(maliyet, args.tekrar)
+        tamamlanan = asyncio.run(_havuz_verimi(args.sure, eszamanli=isci * 2))
+        saniyede = tamamlanan / args.sure
+        sonuc = {
+            "maliyet": maliyet,
+            "tek_hash_ms": round(tek_ms, 1),
+            "isci": isci,
+            "saniyede_kayit": round(saniyede, 1),
+            "cekirdek_basina_saniyede_kayit": round(saniyede / isci, 2),
+        }
+        sonuclar.append(sonuc)
+        print(f"maliyet={maliyet}: tek hash={sonuc['tek_hash_ms']} ms  "
+              f"{isci} işçi ile {sonuc['saniyede_kayit']} kayıt/sn  "
+              f"(çekirdek başına {sonuc['cekirdek_basina_saniyede_kayit']} kayıt/sn)")
+
+    if args.json_dosyasi:
+        with open(args.json_dosyasi, "w", encoding="utf-8") as f:
+            json.dump(sonuclar, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# benchmarks/soguk_baslangic.py
+"""
+Soğuk başlangıç süresini ölçer: yeni bir Python sürecinde
+'import main' -> lifespan başlangıcı -> ilk yanıt.
+
+Her tekrar ayrı bir süreçte çalışır (serverless soğuk başlangıcı gibi).
+
+Kullanım (proje kökünden):
+    python -m benchmarks.soguk_baslangic --tekrar 5 --yol /api/konum/sehirler
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Alt süreçte çalışan ölçüm kodu
+_OLCUM = r"""
+import asyncio, json, sys, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+from benchmarks.asgi_istemci import AsgiIstemci
+
+async def calistir():
+    async with AsgiIstemci(main.app) as istemci:
+        t2 = time.perf_counter()
+        yanit = await istemci.istek("GET", sys.argv[1])
+        t3 = time.perf_counter()
+    return t2, t3, yanit.durum
+
+t2, t3, durum = asyncio.run(calistir())
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "baslangic_ms": (t2 - t1) * 1000,
+    "ilk_yanit_ms": (t3 - t2) * 1000,
+    "toplam_ms": (t3 - t0) * 1000,
+    "durum": durum,
+}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tekrar", type=int, default=5)
+    parser.add_argument("--yol", default="/", help="ilk istek atılacak yol")
+    parser.add_argument("--json", dest="json_dosyasi", help="sonuçların yazılacağı dosya")
+    args = parser.parse_args()
+
+    olcumler = []
+    for _ in range(args.tekrar):
+        cikti = subprocess.run(
+            [sys.executable, "-c", _OLCUM, args.yol],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        olcumler.append(json.loads(cikti.strip().splitlines()[-1]))
+
+    ozet = {
+        anahtar: round(statistics.median(o[anahtar] for o in olcumler), 2)
+        for anahtar in ("import_ms", "baslangic_ms", "ilk_yanit_ms", "toplam_ms")
+    }
+    ozet["yol"] = args.yol
+    ozet["durumlar"] = sorted({o["durum"] for o in olcumler})
+
+    print(f"{args.yol}: import={ozet['import_ms']} ms  başlangıç={ozet['baslangic_ms']} ms  "
+          f"ilk yanıt={ozet['ilk_yanit_ms']} ms  toplam={ozet['toplam_ms']} ms (medyan, {args.tekrar} tekrar)")
+
+    if args.json_dosyasi:
+        with open(args.json_dosyasi, "w", encoding="utf-8") as f:
+            json.dump({"ozet": ozet, "olcumler": olcumler}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
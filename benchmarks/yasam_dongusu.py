@@ -0,0 +1,284 @@
+# benchmarks/yasam_dongusu.py
+"""
+Bilet yaşam döngüsü yük testi (ağ olmadan, ASGI uygulaması aynı süreçte).
+
+1. Tohumlama: 'Benchmark' önekli şehir / hastane / poliklinik / doktor ve
+   hastalar eklenir (tekrar çalıştırmada var olanlar kullanılır).
+2. Her sanal hasta için:
+   bilet al -> takip (N kez) -> [ertele] -> doktor çağırır -> tamamla | gelmedi
+   Sanal hastalar --es-zamanli işçi tarafından paralel işlenir.
+3. Gün sonu (tüm aktif biletler arşive taşınır).
+
+Endpoint başına istek sayısı, hata, p50/p95/p99 ve saniyedeki istek raporlanır;
+--json ile sonuçlar (commit bilgisiyle) dosyaya yazılır, commit'ler arasında
+karşılaştırılabilir. Aynı tohum (--tohum) aynı senaryoyu üretir.
+
+DİKKAT: Gün sonu veritabanındaki TÜM aktif biletleri arşivler; ayrı bir
+benchmark veritabanında çalıştırın (DATABASE_URL) veya --gun-sonu-yok verin.
+Şema önceden hazır olmalıdır (python cli.py sema).
+
+Kullanım (proje kökünden):
+    python -m benchmarks.yasam_dongusu --hasta 2000 --es-zamanli 32 --json sonuc.json
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import random
+import statistics
+import subprocess
+import time
+from typing import Optional
+
+from sqlalchemy.dialects.postgresql import insert
+
+import models
+from db import SessionLocal, settings
+from services import sifre_hash
+from benchmarks.asgi_istemci import AsgiIstemci
+
+ONEK = "Benchmark"
+TC_ONEK = "9"   # benchmark hastalarının TC kimlik numaraları 9 ile başlar
+UZMANLIKLAR = ("Dahiliye", "Kardiyoloji", "Göz", "KBB", "Ortopedi", "Nöroloji", "Cildiye", "Üroloji")
+
+
+def _yuzdelik(degerler, oran):
+    sirali = sorted(degerler)
+    return sirali[min(len(sirali) - 1, int(len(sirali) * oran))]
+
+
+# =================================================================
+# Tohumlama
+# =================================================================
+def _tc(i: int) -> str:
+    return f"{TC_ONEK}{i:010d}"
+
+
+def _telefon(i: int) -> str:
+    return f"555{i:07d}"
+
+
+def tohumla(sehir_sayisi: int, hastane_sayisi: int, poliklinik_sayisi: int,
+            doktor_sayisi: int, hasta_sayisi: int, rng: random.Random) -> tuple[list[int], list[dict]]:
+    """Benchmark verisini ekler; (doktor id'leri, hasta bilgileri) döndürür."""
+    if sehir_sayisi > 10 or max(hastane_sayisi, poliklinik_sayisi, doktor_sayisi) > 99:
+        raise SystemExit("En fazla 10 şehir, birim başına 99 hastane / poliklinik / doktor.")
+
+    db = SessionLocal()
+    try:
+        doktor_idleri = []
+        for s in range(sehir_sayisi):
+            sehir_adi = f"{ONEK} Şehir {s + 1}"
+            sehir = db.query(models.Sehir).filter(models.Sehir.sehiradi == sehir_adi).first()
+            if sehir is None:
+                # 90-99: gerçek plaka kodlarıyla çakışmayan bilet kodu öneki
+                sehir = models.Sehir(sehiradi=sehir_adi, sehirkodu=f"{90 + s}")
+                db.add(sehir)
+                db.flush()
+            for h in range(hastane_sayisi):
+                hastane_adi = f"{sehir_adi} Hastane {h + 1}"
+                hastane = db.query(models.Hastane).filter(models.Hastane.hastaneadi == hastane_adi).first()
+                if hastane is None:
+                    hastane = models.Hastane(hastaneadi=hastane_adi, hastanekodu=f"{h + 1:02d}", sehirid=sehir.sehirid)
+                    db.add(hastane)
+                    db.flush()
+                for p in range(poliklinik_sayisi):
+                    pol_adi = f"{hastane_adi} {UZMANLIKLAR[p % len(UZMANLIKLAR)]} {p + 1}"
+                    pol = db.query(models.Poliklinik).filter(models.Poliklinik.poliklinikadi == pol_adi).first()
+                    if pol is None:
+                        pol = models.Poliklinik(poliklinikadi=pol_adi, poliklinikkodu=f"{p + 1:02d}", hastaneid=hastane.hastaneid)
+                        db.add(pol)
+                        db.flush()
+                    mevcut = {d.odakodu: d.doktorid for d in db.query(models.Doktor).filter(models.Doktor.poliklinikid == pol.poliklinikid)}
+                    for d in range(doktor_sayisi):
+                        oda = f"{d + 1:02d}"
+                        if oda not in mevcut:
+                            doktor = models.Doktor(adsoyad=f"Dr. {ONEK} {pol.poliklinikid}-{d + 1}",
+                                                   uzmanlikalani=UZMANLIKLAR[p % len(UZMANLIKLAR)],
+                                                   poliklinikid=pol.poliklinikid, odakodu=oda)
+                            db.add(doktor)
+                            db.flush()
+                            mevcut[oda] = doktor.doktorid
+                        doktor_idleri.append(mevcut[oda])
+
+        # Hastalar: tek bcrypt hash'i herkes için (kayıt maliyeti bu testin konusu değil)
+        sifre = sifre_hash.hashle("benchmark-sifre-123")
+        bugun = datetime.date.today()
+        hastalar = []
+        for i in range(hasta_sayisi):
+            # ~%15'i 65 yaş üstü (öncelikli sıra bandı)
+            yas = rng.randint(65, 90) if rng.random() < 0.15 else rng.randint(18, 64)
+            hastalar.append({
+                "adsoyad": f"{ONEK} Hasta {i + 1}",
+                "tckimlik": _tc(i + 1),
+                "telefon": _telefon(i + 1),
+                "dogumtarihi": bugun.replace(year=bugun.year - yas, day=min(bugun.day, 28)),
+                "sifre": sifre,
+            })
+        for bas in range(0, len(hastalar), settings.HASTA_AKTARIM_PARTI):
+            parti = hastalar[bas:bas + settings.HASTA_AKTARIM_PARTI]
+            db.execute(insert(models.Hasta).values(parti).on_conflict_do_nothing())
+        db.commit()
+    finally:
+        db.close()
+
+    return doktor_idleri, [{"tckimlik": h["tckimlik"], "telefon": h["telefon"]} for h in hastalar]
+
+
+# =================================================================
+# Yük
+# =================================================================
+class Olcumler:
+    def __init__(self):
+        self.sureler: dict[str, list[float]] = {}
+        self.hatalar: dict[str, int] = {}
+        self.durumlar: dict[str, dict[int, int]] = {}
+
+    async def istek(self, istemci: AsgiIstemci, ad: str, yontem: str, yol: str, json_govde=None):
+        baslangic = time.perf_counter()
+        yanit = await istemci.istek(yontem, yol, json_govde=json_govde)
+        self.sureler.setdefault(ad, []).append((time.perf_counter() - baslangic) * 1000)
+        durumlar = self.durumlar.setdefault(ad, {})
+        durumlar[yanit.durum] = durumlar.get(yanit.durum, 0) + 1
+        if yanit.durum >= 400:
+            self.hatalar[ad] = self.hatalar.get(ad, 0) + 1
+            return None
+        return yanit.json()
+
+    def ozet(self, sure: float) -> list[dict]:
+        sonuc = []
+        for ad, sureler in self.sureler.items():
+            sonuc.append({
+                "endpoint": ad,
+                "istek": len(sureler),
+                "hata": self.hatalar.get(ad, 0),
+                "durumlar": {str(k): v for k, v in sorted(self.durumlar[ad].items())},
+                "saniyede_istek": round(len(sureler) / sure, 1) if sure else None,
+                "ortalama_ms": round(statistics.mean(sureler), 2),
+                "p50_ms": round(_yuzdelik(sureler, 0.50), 2),
+                "p95_ms": round(_yuzdelik(sureler, 0.95), 2),
+                "p99_ms": round(_yuzdelik(sureler, 0.99), 2),
+            })
+        return sonuc
+
+
+async def _hasta_dongusu(istemci, olcum: Olcumler, hasta: dict, doktor_id: int, senaryo: dict):
+    bilet = await olcum.istek(istemci, "create_bilet", "POST", "/api/biletler/",
+                              {"tckimlik": hasta["tckimlik"], "doktorid": doktor_id})
+    if bilet is None:
+        return
+
+    for _ in range(senaryo["takip"]):
+        await olcum.istek(istemci, "takip", "POST", "/api/biletler/takip/",
+                          {"baglantikodu": bilet["baglantikodu"], "telefon": hasta["telefon"]})
+
+    if senaryo["ertele"]:
+        yeni = await olcum.istek(istemci, "ertele", "POST", "/api/biletler/ertele/",
+                                 {"baglantikodu": bilet["baglantikodu"], "aksiyon": "15_dk"})
+        if yeni is None:
+            return
+        bilet = yeni
+        await olcum.istek(istemci, "takip", "POST", "/api/biletler/takip/",
+                          {"baglantikodu": bilet["baglantikodu"], "telefon": hasta["telefon"]})
+
+    if await olcum.istek(istemci, "hasta_cagir", "POST", f"/api/doktor/cagir/{bilet['baglantikodu']}") is None:
+        return
+
+    if senaryo["gelmedi"]:
+        await olcum.istek(istemci, "gelmedi", "POST", f"/api/doktor/gelmedi/{bilet['biletid']}")
+    else:
+        await olcum.istek(istemci, "muayene_tamamla", "POST", f"/api/doktor/tamamla/{bilet['biletid']}")
+
+
+async def calistir(doktor_idleri: list[int], hastalar: list[dict], args, rng: random.Random) -> dict:
+    # Senaryo önceden üretilir: aynı tohum aynı iş yükünü verir
+    isler = asyncio.Queue()
+    for hasta in hastalar:
+        isler.put_nowait((hasta, rng.choice(doktor_idleri), {
+            "takip": args.takip,
+            "ertele": rng.random() < args.ertele_orani,
+            "gelmedi": rng.random() < args.gelmedi_orani,
+        }))
+
+    import main  # ayarlar (ör. DB_ASYNC) okunduktan sonra yüklensin
+
+    olcum = Olcumler()
+    async with AsgiIstemci(main.app) as istemci:
+        async def isci():
+            while not isler.empty():
+                hasta, doktor_id, senaryo = isler.get_nowait()
+                await _hasta_dongusu(istemci, olcum, hasta, doktor_id, senaryo)
+
+        baslangic = time.perf_counter()
+        await asyncio.gather(*(isci() for _ in range(args.es_zamanli)))
+        dongu_suresi = time.perf_counter() - baslangic
+
+        gun_sonu = None
+        if not args.gun_sonu_yok:
+            gun_sonu = await olcum.istek(istemci, "gun_sonu", "POST", "/api/yonetim/gun-sonu")
+
+    endpointler = olcum.ozet(dongu_suresi)
+    for e in endpointler:
+        # Gün sonu döngüden sonra tek istek; verim yerine sadece süresi anlamlı
+        if e["endpoint"] == "gun_sonu":
+            e["saniyede_istek"] = None
+
+    return {
+        "dongu_suresi_sn": round(dongu_suresi, 3),
+        "saniyede_hasta": round(len(hastalar) / dongu_suresi, 1),
+        "endpointler": endpointler,
+        "gun_sonu": gun_sonu,
+    }
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sehir", type=int, default=3)
+    parser.add_argument("--hastane", type=int, default=2, help="şehir başına")
+    parser.add_argument("--poliklinik", type=int, default=4, help="hastane başına")
+    parser.add_argument("--doktor", type=int, default=2, help="poliklinik başına")
+    parser.add_argument("--hasta", type=int, default=2000, help="sanal hasta (her biri bir yaşam döngüsü)")
+    parser.add_argument("--es-zamanli", type=int, default=32, help="eşzamanlı sanal hasta")
+    parser.add_argument("--takip", type=int, default=3, help="bilet başına takip sorgusu")
+    parser.add_argument("--ertele-orani", type=float, default=0.1)
+    parser.add_argument("--gelmedi-orani", type=float, default=0.1)
+    parser.add_argument("--gun-sonu-yok", action="store_true", help="gün sonu adımını atla")
+    parser.add_argument("--tohum", type=int, default=42)
+    parser.add_argument("--json", dest="json_dosyasi", help="sonuçların yazılacağı dosya")
+    args = parser.parse_args()
+
+    rng = random.Random(args.tohum)
+    t0 = time.perf_counter()
+    doktor_idleri, hastalar = tohumla(args.sehir, args.hastane, args.poliklinik, args.doktor, args.hasta, rng)
+    print(f"Tohumlama: {len(doktor_idleri)} doktor, {len(hastalar)} hasta ({time.perf_counter() - t0:.1f} sn)")
+
+    sonuc = asyncio.run(calistir(doktor_idleri, hastalar, args, rng))
+
+    # Sonuç dosyası yazdırmadan önce yazılır: çıktı biçimlendirmesi sonucu kaybettirmesin
+    if args.json_dosyasi:
+        with open(args.json_dosyasi, "w", encoding="utf-8") as f:
+            json.dump({
+                "commit": _commit(),
+                "tarih": datetime.datetime.now().isoformat(timespec="seconds"),
+                "ayarlar": {**vars(args), "DB_ASYNC": settings.DB_ASYNC},
+                **sonuc,
+            }, f, ensure_ascii=False, indent=2, default=str)
+
+    print(f"\n{len(hastalar)} yaşam döngüsü {sonuc['dongu_suresi_sn']} sn "
+          f"({sonuc['saniyede_hasta']} hasta/sn, {args.es_zamanli} eşzamanlı)")
+    for e in sonuc["endpointler"]:
+        verim = "-" if e["saniyede_istek"] is None else e["saniyede_istek"]
+        print(f"{e['endpoint']:<16} n={e['istek']:>6}  hata={e['hata']:>4}  {verim:>8}/sn  "
+              f"p50={e['p50_ms']:>8}  p95={e['p95_ms']:>8}  p99={e['p99_ms']:>8} ms")
+
+
+if __name__ == "__main__":
+    main()
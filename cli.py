@@ -0,0 +1,177 @@
+# cli.py
+"""
+MESS API yönetim komutları.
+
+Kullanım:
+    python cli.py sema              # eksik tabloları, indeksleri ve arşiv bölümlerini oluşturur
+    python cli.py arsiv-bolumle     # eski (bölümsüz) arşiv tablosunu aylık bölümlü yapıya taşır
+    python cli.py arsiv-bakim       # gelecek bölümleri oluşturur, eski bölümleri temizler
+    python cli.py liderlik-doldur   # en yüksek skor tablosunu mevcut skorlardan doldurur
+    python cli.py hasta-aktar hastalar.csv [--bicim ndjson] [--red-dosyasi red.ndjson]
+    python cli.py tahmin-backtest [--gun 30] [--alfa 0.2]   # bekleme tahmininin arşivdeki hatası
+    python cli.py form-sayaclari     # form sayacını ve eksik günlük özetleri form tablosundan hesaplar
+"""
+import argparse
+import json
+import sys
+
+from sqlalchemy import inspect, text
+
+from db import engine, SessionLocal
+import models
+from services import arsiv_bolumleri
+from services.hasta_aktarimi import hastalari_aktar, satirlari_oku
+from services.bekleme_tahmini import geriye_donuk_test
+from services import form_sayaclari
+
+
+def sema_olustur(args):
+    """
+    Eksik tabloları oluşturur. create_all mevcut tablolara yeni kolon ve
+    indeks eklemediği için modellerde sonradan tanımlanan (nullable) kolonlar
+    ve indeksler ayrıca kontrol edilir.
+    """
+    models.Base.metadata.create_all(bind=engine)
+
+    with engine.begin() as baglanti:
+        mevcut_kolonlar = {}
+        denetci = inspect(baglanti)
+        for tablo in models.Base.metadata.sorted_tables:
+            mevcut_kolonlar[tablo.name] = {k["name"] for k in denetci.get_columns(tablo.name)}
+
+        for tablo in models.Base.metadata.sorted_tables:
+            for kolon in tablo.columns:
+                if kolon.name in mevcut_kolonlar[tablo.name] or not kolon.nullable:
+                    continue
+                tip = kolon.type.compile(dialect=baglanti.dialect)
+                baglanti.execute(text(f'ALTER TABLE "{tablo.name}" ADD COLUMN IF NOT EXISTS "{kolon.name}" {tip}'))
+                print(f"Kolon eklendi: {tablo.name}.{kolon.name}")
+
+            for indeks in tablo.indexes:
+                indeks.create(bind=baglanti, checkfirst=True)
+
+    db = SessionLocal()
+    try:
+        arsiv_bolumleri.gelecek_bolumleri_olustur(db)
+    finally:
+        db.close()
+
+    print("Şema güncel.")
+
+
+def arsiv_bolumle(args):
+    db = SessionLocal()
+    try:
+        kopyalanan = arsiv_bolumleri.tabloyu_bolumle(db)
+    finally:
+        db.close()
+    print(f"Arşiv bölümlü yapıya taşındı ({kopyalanan} satır kopyalandı).")
+
+
+def arsiv_bakim(args):
+    db = SessionLocal()
+    try:
+        olusturulan = arsiv_bolumleri.gelecek_bolumleri_olustur(db)
+        temizlenen = arsiv_bolumleri.eski_bolumleri_temizle(db, args.saklama_ay, args.mod)
+    finally:
+        db.close()
+    print(f"Oluşturulan bölümler: {olusturulan or '-'}")
+    print(f"Temizlenen bölümler: {temizlenen or '-'}")
+
+
+def liderlik_doldur(args):
+    """oyuneniyiskorlartablosu'nu oyunskorlaritablosu'ndaki geçmiş skorlardan doldurur."""
+    with engine.begin() as baglanti:
+        sonuc = baglanti.execute(text("""
+            INSERT INTO oyuneniyiskorlartablosu (oyunadi, hastaid, skor, tarih)
+            SELECT oyunadi, hastaid, MAX(skor), MAX(tarih)
+            FROM oyunskorlaritablosu
+            WHERE oyunadi IS NOT NULL AND hastaid IS NOT NULL AND skor IS NOT NULL
+            GROUP BY oyunadi, hastaid
+            ON CONFLICT (oyunadi, hastaid) DO UPDATE
+                SET skor = EXCLUDED.skor, tarih = EXCLUDED.tarih
+                WHERE oyuneniyiskorlartablosu.skor < EXCLUDED.skor
+        """))
+    print(f"{sonuc.rowcount} satır güncellendi.")
+
+
+def hasta_aktar(args):
+    """CSV / NDJSON hasta dosyasını içe aktarır; reddedilen satırlar NDJSON olarak yazılır."""
+    bicim = args.bicim or ("ndjson" if args.dosya.endswith((".ndjson", ".jsonl")) else "csv")
+    red_cikti = open(args.red_dosyasi, "w", encoding="utf-8") if args.red_dosyasi else sys.stderr
+    sayac = {"red": 0}
+
+    def reddet(red):
+        sayac["red"] += 1
+        red_cikti.write(json.dumps(red, ensure_ascii=False) + "\n")
+
+    db = SessionLocal()
+    try:
+        with open(args.dosya, encoding="utf-8-sig", newline="") as dosya:
+            eklenen = hastalari_aktar(db, satirlari_oku(dosya, bicim), reddet, args.parti)
+    finally:
+        db.close()
+        if red_cikti is not sys.stderr:
+            red_cikti.close()
+
+    print(f"Eklenen: {eklenen}, reddedilen: {sayac['red']}")
+
+
+def tahmin_backtest(args):
+    """Bekleme süresi tahmincisini arşiv üzerinde yeniden oynatıp hatayı raporlar."""
+    db = SessionLocal()
+    try:
+        sonuc = geriye_donuk_test(db, args.gun, args.alfa)
+    finally:
+        db.close()
+    print(json.dumps(sonuc, ensure_ascii=False, indent=2))
+
+
+def form_sayaclari_yenile(args):
+    db = SessionLocal()
+    try:
+        toplam = form_sayaclari.yeniden_hesapla(db)
+    finally:
+        db.close()
+    print(f"Form sayacı güncellendi ({toplam} form).")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MESS API yönetim komutları")
+    komutlar = parser.add_subparsers(dest="komut", required=True)
+
+    sema = komutlar.add_parser("sema", help="eksik tabloları ve indeksleri oluşturur")
+    sema.set_defaults(islem=sema_olustur)
+
+    bolumle = komutlar.add_parser("arsiv-bolumle", help="arşiv tablosunu aylık bölümlü yapıya taşır")
+    bolumle.set_defaults(islem=arsiv_bolumle)
+
+    bakim = komutlar.add_parser("arsiv-bakim", help="arşiv bölümlerini oluşturur ve eskilerini temizler")
+    bakim.add_argument("--saklama-ay", type=int, default=None)
+    bakim.add_argument("--mod", choices=["detach", "drop"], default=None)
+    bakim.set_defaults(islem=arsiv_bakim)
+
+    lider = komutlar.add_parser("liderlik-doldur", help="en yüksek skor tablosunu geçmiş skorlardan doldurur")
+    lider.set_defaults(islem=liderlik_doldur)
+
+    aktar = komutlar.add_parser("hasta-aktar", help="CSV / NDJSON dosyasından toplu hasta aktarır")
+    aktar.add_argument("dosya")
+    aktar.add_argument("--bicim", choices=["csv", "ndjson"], default=None)
+    aktar.add_argument("--parti", type=int, default=None, help="tek COPY partisindeki satır sayısı")
+    aktar.add_argument("--red-dosyasi", default=None, help="reddedilen satırların yazılacağı dosya (varsayılan: stderr)")
+    aktar.set_defaults(islem=hasta_aktar)
+
+    backtest = komutlar.add_parser("tahmin-backtest", help="bekleme süresi tahmininin arşivdeki hatasını (MAE) ölçer")
+    backtest.add_argument("--gun", type=int, default=30, help="geriye doğru kaç günlük arşiv kullanılacak")
+    backtest.add_argument("--alfa", type=float, default=None, help="EWMA ağırlığı (varsayılan: TAHMIN_EWMA_ALFA)")
+    backtest.set_defaults(islem=tahmin_backtest)
+
+    formlar = komutlar.add_parser("form-sayaclari", help="form sayacını ve günlük özetleri form tablosundan yeniden hesaplar")
+    formlar.set_defaults(islem=form_sayaclari_yenile)
+
+    args = parser.parse_args()
+    args.islem(args)
+
+
+if __name__ == "__main__":
+    main()
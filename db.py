@@ -1,6 +1,8 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from pydantic_settings import BaseSettings
 import os
 
@@ -9,6 +11,87 @@ class Settings(BaseSettings):
     # Tüm veritabanı bağlantı adresi (ConnectionString) için tek bir değişken
     DATABASE_URL: str 
 
+    # True ise sıcak endpoint'ler (bilet, takip, doktor çağır/tamamla, liderler)
+    # asenkron motor (psycopg 3) üzerinden çalışır
+    DB_ASYNC: bool = False
+
+    # True ise uygulama başlarken eksik tablolar oluşturulur (sadece yerel geliştirme için).
+    # Üretimde şema 'python cli.py sema' ile ayrı bir adımda kurulur.
+    DB_SEMA_OLUSTUR: bool = False
+
+    # Bağlantı havuzu profili:
+    #  - "kuyruk": uzun süre çalışan uvicorn için QueuePool (boyut/taşma/yenileme + pre_ping)
+    #  - "null":   PgBouncer / Neon pooler arkasında (Vercel gibi serverless) havuzsuz çalışma
+    DB_POOL_PROFILI: str = "kuyruk"
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30      # havuzdan bağlantı beklerken en fazla süre (saniye)
+    DB_POOL_RECYCLE: int = 300     # bu süreden eski bağlantılar yenilenir (saniye)
+    DB_POOL_PRE_PING: bool = True  # kullanmadan önce bağlantının canlı olduğunu kontrol et
+    DB_POOL_LIFO: bool = False     # True: en son bırakılan bağlantıyı tekrar kullan (boşta kalanlar kapanabilir)
+
+    # Gün sonu arşivlemesinde tek işlemde (transaction) taşınan en fazla bilet sayısı
+    GUN_SONU_PARCA_BOYUTU: int = 1000
+    # Kilitli (o an güncellenen) biletler kaldığında en fazla tekrar sayısı ve aradaki bekleme
+    GUN_SONU_KILITLI_TEKRAR: int = 5
+    GUN_SONU_KILITLI_BEKLEME_MS: int = 200
+
+    # Arşiv tablosu aylık bölümleri (partition)
+    ARSIV_ONCEDEN_AY: int = 2               # bu aydan sonra önceden oluşturulacak bölüm sayısı
+    ARSIV_SAKLAMA_AY: int = 24              # bu kadar aydan eski bölümler temizlenir
+    ARSIV_TEMIZLEME_MODU: str = "detach"    # "detach": tabloyu ayır, "drop": tamamen sil
+
+    # Oyun skorları için write-behind tamponu (kapalıysa her skor ayrı commit edilir)
+    OYUN_SKOR_TAMPONU: bool = False
+    OYUN_SKOR_TAMPON_MS: int = 200        # ilk skordan sonra en fazla bekleme (milisaniye)
+    OYUN_SKOR_TAMPON_BOYUTU: int = 500    # bu kadar skor birikince hemen yazılır
+    OYUN_SKOR_TOPLU_LIMIT: int = 1000     # toplu endpoint'e tek istekte gönderilebilecek skor sayısı
+
+    # Toplu hasta içe aktarımı: tek COPY + anti-join ile yazılan satır sayısı
+    HASTA_AKTARIM_PARTI: int = 5000
+    # Hasta listesi: hastaid üzerinden keyset sayfalama ve NDJSON dışa aktarım
+    HASTA_SAYFA_BOYUTU: int = 100
+    HASTA_SAYFA_AZAMI: int = 1000
+    HASTA_DISA_AKTARIM_PARTI: int = 1000   # sunucu taraflı imleçten bir seferde okunan satır
+
+    # Bekleme süresi tahmini (doktor + günün saati bazında EWMA)
+    TAHMIN_EWMA_ALFA: float = 0.2            # yeni gözlemin ağırlığı
+    TAHMIN_VARSAYILAN_DAKIKA: float = 5.0    # hiç gözlem yokken muayene süresi
+    TAHMIN_ASGARI_GOZLEM: int = 3            # bir ortalama bu kadar gözlemden sonra kullanılır
+    TAHMIN_AZAMI_DAKIKA: float = 120.0       # daha uzun muayeneler aykırı kabul edilip yok sayılır
+    TAHMIN_ISINMA_GUN: int = 30              # ilk kullanımda arşivden okunacak gün sayısı
+
+    # Sıra takibi: poliklinik sıra durumunun bellekte tutulduğu en uzun süre (saniye).
+    # Aynı süreçteki değişiklikler görüntüyü hemen geçersiz kılar; bu süre sadece
+    # başka worker'lardan gelen değişiklikler için üst sınırdır.
+    SIRA_ONBELLEK_SURESI: float = 2.0
+
+    # Form sohbet metinleri: bu boyutu (bayt) aşan formverisi_json ayrı tabloda
+    # sıkıştırılmış tutulur (0: her zaman ana tabloda)
+    FORM_METNI_ESIGI: int = 8192
+    FORM_METNI_SIKISTIRMA: str = "gzip"   # "gzip" veya "zstd" (zstandard paketi kuruluysa)
+
+    # Şifre hashleme (bcrypt); hash işleri ayrı, sınırlı bir iş parçacığı havuzunda çalışır
+    SIFRE_BCRYPT_MALIYET: int = 12            # bcrypt cost (her +1 süreyi ikiye katlar)
+    SIFRE_HASH_ISCI: int = 0                  # havuzdaki iş parçacığı sayısı (0: CPU çekirdek sayısı)
+    SIFRE_HASH_KUYRUK: int = 64               # çalışan + bekleyen en fazla iş; aşılırsa 503
+    SIFRE_GIRISTE_YENIDEN_HASH: bool = True   # girişte eski maliyetli / düz metin şifreleri yeniden hashle
+
+    # Metrikler: istek gecikmesi, istek başına SQL sayısı/süresi, havuz bekleme (GET /metrics)
+    METRIK_AKTIF: bool = True
+
+    # Geliştirme: istek başına SQL ifadesi denetimi (bkz. services/sorgu_butcesi.py)
+    SORGU_DENETIMI: bool = False
+    SORGU_ISTEK_BUTCESI: int = 10    # bir istekte bundan fazla ifade çalışırsa uyar (0: kapalı)
+    SORGU_TEKRAR_ESIGI: int = 3      # aynı ifade bu kadar kez çalışırsa N+1 uyarısı (0: kapalı)
+
+    # Liste endpoint'lerinde kolon satırları + orjson ile serileştirme (bkz. services/hizli_json.py)
+    HIZLI_JSON: bool = False
+
+    # Konum (şehir/hastane/poliklinik/doktor) önbelleği ayarları
+    KONUM_ONBELLEK_SURESI: int = 300   # saniye; anlık görüntü bu süreden sonra yeniden yüklenir
+    KONUM_CACHE_MAX_AGE: int = 60      # istemciye gönderilen Cache-Control max-age (saniye)
+
     class Config:
         env_file = ".env" 
         # Fazladan değişken varsa hata vermemesi için ignore kullanıyoruz
@@ -19,13 +102,42 @@ settings = Settings()
 # Veritabanı bağlantı URL'sini al
 DATABASE_URL = settings.DATABASE_URL
 
+# Seçilen havuz profiline göre create_engine / create_async_engine parametreleri
+def motor_ayarlari(profil: str = None) -> dict:
+    profil = profil or settings.DB_POOL_PROFILI
+    if profil == "null":
+        # Havuzlamayı PgBouncer / Neon pooler yapar; her istek kısa ömürlü bağlantı açar
+        return {"poolclass": NullPool}
+    if profil == "kuyruk":
+        return {
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+            "pool_recycle": settings.DB_POOL_RECYCLE,
+            "pool_pre_ping": settings.DB_POOL_PRE_PING,
+            "pool_use_lifo": settings.DB_POOL_LIFO,
+        }
+    raise ValueError(f"Bilinmeyen DB_POOL_PROFILI: {profil}")
+
 # SQLAlchemy bağlantı motorunu (engine) oluştur
 # Not: Neon.tech gibi serverless servislerde Connection String doğrudan kullanılır
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, **motor_ayarlari())
 
 # Veritabanı oturumlarını yönetmek için SessionLocal oluştur
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Asenkron mod: aynı veritabanına psycopg 3'ün async sürücüsüyle bağlanır
+# (postgresql:// veya postgresql+psycopg2:// adresleri postgresql+psycopg:// olarak kullanılır)
+async_engine = None
+AsyncSessionLocal = None
+if settings.DB_ASYNC:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    ASYNC_DATABASE_URL = make_url(DATABASE_URL).set(drivername="postgresql+psycopg")
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, **motor_ayarlari())
+    # expire_on_commit=False: commit sonrası nesneler yanıt üretilirken tekrar sorgulanmaz
+    AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 # Modellerin türetileceği temel sınıf (ORM için)
 Base = declarative_base()
 
@@ -36,4 +148,11 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# get_db'nin asenkron karşılığı (sadece DB_ASYNC=True iken kullanılır)
+# Endpoint içinde senkron kod db.run_sync(...) ile çalıştırılır; sorgular
+# threadpool yerine event loop üzerinde beklenir.
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,14 +1,51 @@
 # main.py
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from db import engine
+from fastapi.responses import PlainTextResponse
+from db import engine, async_engine, settings
 import models
 import os
+from services.skor_tamponu import skor_tamponu
+from services.sifre_hash import sifre_hash_havuzu
+from services.metrikler import metrikler, MetrikMiddleware
+from services import sorgu_butcesi
 
 from routers import sehirler_router, hastalar_router, biletler_router, formlar_router , doktor_router, yonetim_router, oyun_router
 
-models.Base.metadata.create_all(bind=engine)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Şema yönetimi 'python cli.py sema' adımındadır; import ve başlangıç sırasında
+    # veritabanına gidilmez. Bağlantı ilk istekte açılır, önbellekler ilk kullanımda yüklenir.
+    if settings.DB_SEMA_OLUSTUR:
+        models.Base.metadata.create_all(bind=engine)
+    yield
+    # Kapanırken tamponda bekleyen oyun skorlarını yaz
+    skor_tamponu.bosalt()
+    sifre_hash_havuzu.kapat()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Metrikler: her istek için gecikme + SQL sayısı/süresi, havuz bekleme süresi
+if settings.METRIK_AKTIF:
+    app.add_middleware(MetrikMiddleware)
+    metrikler.motoru_izle(engine, "sync")
+    if async_engine is not None:
+        metrikler.motoru_izle(async_engine.sync_engine, "async")
+    metrikler.oturumlari_izle()
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        # Prometheus metin biçimi (text exposition format 0.0.4)
+        return PlainTextResponse(metrikler.yazdir(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# Geliştirme: istek başına SQL bütçesi / N+1 uyarısı
+if settings.SORGU_DENETIMI:
+    app.add_middleware(sorgu_butcesi.SorguDenetimMiddleware)
+    sorgu_butcesi.motoru_izle(engine)
+    if async_engine is not None:
+        sorgu_butcesi.motoru_izle(async_engine)
 
 
 @app.get("/")
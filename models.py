@@ -1,6 +1,6 @@
 # models.py
-from sqlalchemy import Column, Integer, String, Date, TIMESTAMP, ForeignKey, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, BigInteger, SmallInteger, String, Date, TIMESTAMP, ForeignKey, JSON, Index, LargeBinary, func
+from sqlalchemy.orm import relationship, deferred
 from db import Base 
 
 
@@ -34,10 +34,22 @@ class Hasta(Base):
     adsoyad = Column(String)
     telefon = Column(String)
     dogumtarihi = Column(Date)
+    # UNIQUE kısıtları (ve arkalarındaki indeksler) kayıt sırasındaki tekrar
+    # kontrolünü yapar: INSERT ... ON CONFLICT DO NOTHING (bkz. hastalar_router).
+    # Aynı ad soyadla ikinci kayıt da reddedilir (ux_hasta_adsoyad).
     tckimlik = Column(String(11), unique=True, nullable=False)
     email = Column(String(255), unique=True, nullable=True)
     sifre = Column(String(255), nullable=False) 
 
+    __table_args__ = (
+        # önek araması (LIKE 'ali%'): *_pattern_ops indeksleri veritabanı collation'ından
+        # bağımsız olarak LIKE önekinde kullanılabilir
+        Index("ix_hasta_adsoyad_onek", func.lower(adsoyad).label("adsoyad_kucuk"),
+              postgresql_ops={"adsoyad_kucuk": "text_pattern_ops"}),
+        Index("ix_hasta_tckimlik_onek", "tckimlik", postgresql_ops={"tckimlik": "varchar_pattern_ops"}),
+        Index("ux_hasta_adsoyad", "adsoyad", unique=True),
+    )
+
 class Doktor(Base):
     __tablename__ = "doktorlartablosu" # نام دقیق جدول شما
 
@@ -47,6 +59,8 @@ class Doktor(Base):
     poliklinikid = Column(Integer, ForeignKey("polikilinikaditablosu.poliklinikid"))
     odakodu = Column(String(2))
 # 6. Arşiv Biletleri Tablo Modeli
+# kapanistarihi'ne göre aylık RANGE bölümlü (partitioned) tablo.
+# Bölümler services/arsiv_bolumleri.py ile oluşturulur ve temizlenir.
 class BiletArsiv(Base):
     __tablename__ = "sirabiletleri_arsiv"
 
@@ -58,9 +72,15 @@ class BiletArsiv(Base):
     siranumarasi = Column(Integer)
     durum = Column(String(20))
     olusturmatarihi = Column(TIMESTAMP)
-    kapanistarihi = Column(TIMESTAMP)
+    # Bölüm anahtarı: bölümlü tablolarda birincil anahtarın parçası olmak zorunda
+    kapanistarihi = Column(TIMESTAMP, primary_key=True, nullable=False)
     eskibiletid = Column(Integer) # Bu FK değil, sadece sayıyı tutar
     tahminibeklemesuresi = Column(String(50))
+    # Muayene süresi tahmini için (bkz. services/bekleme_tahmini.py)
+    cagrilmatarihi = Column(TIMESTAMP, nullable=True)
+    tamamlanmatarihi = Column(TIMESTAMP, nullable=True)
+
+    __table_args__ = {"postgresql_partition_by": "RANGE (kapanistarihi)"}
 
 # 7. Aktif Biletler Tablo Modeli
 class BiletAktif(Base):
@@ -74,8 +94,21 @@ class BiletAktif(Base):
     siranumarasi = Column(Integer)
     durum = Column(String(20))
     olusturmatarihi = Column(TIMESTAMP)
-    eskibiletid = Column(Integer, ForeignKey("sirabiletleri_arsiv.biletid"), nullable=True) # Bu FK
+    # Arşiv bölümlü olduğu için biletid tek başına UNIQUE olamaz; bu yüzden FK değil, sadece sayıyı tutar
+    eskibiletid = Column(Integer, nullable=True)
     tahminibeklemesuresi = Column(String(50))    
+    cagrilmatarihi = Column(TIMESTAMP, nullable=True)     # doktor çağırdığında
+    tamamlanmatarihi = Column(TIMESTAMP, nullable=True)   # muayene bittiğinde
+
+    # Sıra sorgularına uygun bileşik indeksler
+    __table_args__ = (
+        # takip / çağırma: poliklinikteki 'Bekliyor' / 'Cagirildi' biletler, numara sırasıyla
+        Index("ix_aktif_poliklinik_durum_sira", "poliklinikid", "durum", "siranumarasi"),
+        # doktor ekranı: doktorun bekleyen hastaları, numara sırasıyla
+        Index("ix_aktif_doktor_durum_sira", "doktorid", "durum", "siranumarasi"),
+        # günlük aralık sorguları (olusturmatarihi >= gün AND < ertesi gün)
+        Index("ix_aktif_poliklinik_tarih_sira", "poliklinikid", "olusturmatarihi", "siranumarasi"),
+    )
 
 # models.py
 
@@ -89,11 +122,13 @@ class SoruCevapFormu(Base):
     formid = Column(Integer, primary_key=True, index=True)
     # (JSONB در PostgreSQL با JSON در SQLAlchemy کار می‌کند)
     # ما می‌توانیم کل متن گفتگو را در اینجا ذخیره کنیم (برای سوابق)
-    formverisi_json = Column(JSON, nullable=True) 
+    # deferred: فقط وقتی خود ستون خوانده شود بارگذاری می‌شود (صفحه دکتر به آن نیازی ندارد)
+    # متن‌های بزرگ‌تر از FORM_METNI_ESIGI فشرده در SoruCevapFormuMetni نگهداری می‌شوند
+    formverisi_json = deferred(Column(JSON, nullable=True))
 
     # خلاصه‌ای که Gemini می‌سازد در اینجا ذخیره می‌شود
     ai_ozet = Column(String) 
-    gonderimtarihi = Column(TIMESTAMP)
+    gonderimtarihi = Column(TIMESTAMP, index=True)
 
     # اتصال یک-به-یک به بلیت فعال
     biletid = Column(Integer, ForeignKey("sirabiletleri_aktiftablosu.biletid"), unique=True)   
@@ -109,4 +144,59 @@ class OyunSkoru(Base):
     hastaid = Column(Integer, ForeignKey("hastalartablosu.hastaid"))
     oyunadi = Column(String(50)) # مثلاً "Snake" یا "Puzzle"
     skor = Column(Integer)
-    tarih = Column(TIMESTAMP)    
\ No newline at end of file
+    tarih = Column(TIMESTAMP)
+
+# ۱۰. Sıra numarası sayaçları
+# Her (poliklinik, gün, öncelik bandı) için son verilen sıra numarasını tutar.
+# Bant 0: öncelikli hastalar (1-99), Bant 1: normal hastalar (101+)
+class SiraSayaci(Base):
+    __tablename__ = "sirasayaclaritablosu"
+
+    poliklinikid = Column(Integer, ForeignKey("polikilinikaditablosu.poliklinikid"), primary_key=True)
+    gun = Column(Date, primary_key=True)
+    oncelikbandi = Column(SmallInteger, primary_key=True)
+    sonnumara = Column(Integer, nullable=False)
+
+# ۱۱. En yüksek skor tablosu (her oyun ve hasta için tek satır)
+# kayit_skor sadece yeni skor eskisinden büyükse günceller; liderlik tablosu
+# tüm skorları gruplamak yerine (oyunadi, skor, hastaid) indeksinden okunur.
+class OyunEnIyiSkor(Base):
+    __tablename__ = "oyuneniyiskorlartablosu"
+
+    oyunadi = Column(String(50), primary_key=True)
+    hastaid = Column(Integer, ForeignKey("hastalartablosu.hastaid"), primary_key=True)
+    skor = Column(Integer, nullable=False)
+    tarih = Column(TIMESTAMP)
+
+    __table_args__ = (
+        Index("ix_oyun_eniyi_oyun_skor_hasta", "oyunadi", "skor", "hastaid"),
+    )
+
+# ۱۲. Genel amaçlı sayaçlar (ör. 'form_mevcut')
+# COUNT(*) taraması yerine ilgili yazma işlemiyle aynı işlemde (transaction) artırılıp azaltılır.
+class Sayac(Base):
+    __tablename__ = "sayaclartablosu"
+
+    ad = Column(String(50), primary_key=True)
+    deger = Column(BigInteger, nullable=False, default=0)
+
+# ۱۳. Günlük form özeti (rollup)
+# gonderilen: o gün gönderilen form sayısı
+# silinen: o gün gönderilmiş olup sonradan silinen (erteleme / gün sonu) form sayısı
+class FormGunlukOzet(Base):
+    __tablename__ = "formgunlukozettablosu"
+
+    gun = Column(Date, primary_key=True)
+    gonderilen = Column(Integer, nullable=False, default=0)
+    silinen = Column(Integer, nullable=False, default=0)
+
+# ۱۴. Büyük sohbet metinleri (sıkıştırılmış)
+# formverisi_json FORM_METNI_ESIGI baytı aşarsa ana tablo yerine burada
+# gzip / zstd ile sıkıştırılmış olarak tutulur. Form silinince birlikte silinir.
+class SoruCevapFormuMetni(Base):
+    __tablename__ = "sorucevapformmetinleritablosu"
+
+    formid = Column(Integer, ForeignKey("sorucevapformlaritablosu.formid", ondelete="CASCADE"), primary_key=True)
+    sikistirma = Column(String(10), nullable=False)   # "gzip" veya "zstd"
+    boyut = Column(Integer, nullable=False)           # sıkıştırılmamış JSON boyutu (bayt)
+    veri = Column(LargeBinary, nullable=False)
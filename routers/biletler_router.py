@@ -1,10 +1,21 @@
 # routers/biletler_router.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import func, Date, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete
 import models, schemas
-from db import get_db
+from db import get_db, get_async_db, settings, SessionLocal
+from services.sira_numaratoru import sonraki_sira_numarasi
+from services.doktor_kodlari import doktor_kodlari
+from services.sira_yayini import sira_yayini
+from services.bekleme_tahmini import bekleme_tahmini, bekleme_tahmincisi
+from services.sira_durumu import sira_onbellegi
+from services.form_sayaclari import formlar_silindi
+import asyncio
 import datetime
+import json
 
 router = APIRouter(
     prefix="/api/biletler",
@@ -14,12 +25,7 @@ router = APIRouter(
 # =================================================================
 # API 1: ایجاد بلیت هوشمند (Sıra Alma)
 # =================================================================
-@router.post("/", response_model=schemas.BiletBase)
-def create_bilet(bilet_data: schemas.BiletCreate, db: Session = Depends(get_db)):
-    """
-    Yeni bir sıra bileti oluşturur.
-    - Tahmini süre: Önündeki kişi sayısı * 5 dakika olarak hesaplanır.
-    """
+def _bilet_olustur(db: Session, bilet_data: schemas.BiletCreate):
 
     # 1. پیدا کردن بیمار
     hasta = db.query(models.Hasta).filter(models.Hasta.tckimlik == bilet_data.tckimlik).first()
@@ -33,76 +39,31 @@ def create_bilet(bilet_data: schemas.BiletCreate, db: Session = Depends(get_db))
     is_oncelikli = (yas >= 65) 
 
     # 3. دریافت کدها
-    # ... (این بخش کدها که دکتر و پلی‌کلینیک را می‌گیرد بدون تغییر است - کپی کنید) ...
-    # (برای خلاصه کردن اینجا ننوشتم، اما کد قبلی خود را اینجا بگذارید)
+    # (Doktor -> Poliklinik -> Hastane -> Sehir kodları bellek önbelleğinden gelir)
     try:
-        doktor_ve_kodlar = db.query(
-            models.Doktor.doktorid, models.Doktor.poliklinikid, models.Doktor.odakodu,
-            models.Poliklinik.poliklinikkodu, models.Hastane.hastanekodu, models.Sehir.sehirkodu
-        ).join(
-            models.Poliklinik, models.Doktor.poliklinikid == models.Poliklinik.poliklinikid
-        ).join(
-            models.Hastane, models.Poliklinik.hastaneid == models.Hastane.hastaneid
-        ).join(
-            models.Sehir, models.Hastane.sehirid == models.Sehir.sehirid
-        ).filter(
-            models.Doktor.doktorid == bilet_data.doktorid
-        ).first()
-        if not doktor_ve_kodlar:
-            raise HTTPException(status_code=404, detail="Doktor bulunamadı.")
+        doktor_kodu = doktor_kodlari.getir(db, bilet_data.doktorid)
     except Exception:
         raise HTTPException(status_code=500, detail="Veritabanı hatası.")
+    if not doktor_kodu:
+        raise HTTPException(status_code=404, detail="Doktor bulunamadı.")
 
 
     # 4. محاسبه شماره نوبت
-    yeni_sira_numarasi = 0
-    if is_oncelikli:
-        son_sira = db.query(func.max(models.BiletAktif.siranumarasi)).filter(
-            models.BiletAktif.poliklinikid == doktor_ve_kodlar.poliklinikid,
-            func.cast(models.BiletAktif.olusturmatarihi, Date) == datetime.date.today(),
-            models.BiletAktif.siranumarasi < 100 
-        ).scalar()
-        yeni_sira_numarasi = (son_sira or 0) + 1
-    else:
-        son_sira = db.query(func.max(models.BiletAktif.siranumarasi)).filter(
-            models.BiletAktif.poliklinikid == doktor_ve_kodlar.poliklinikid,
-            func.cast(models.BiletAktif.olusturmatarihi, Date) == datetime.date.today(),
-            models.BiletAktif.siranumarasi >= 100 
-        ).scalar()
-        yeni_sira_numarasi = (son_sira or 100) + 1
+    # (sayaç tablosundan tek ifadeyle; MAX() taraması ve eşzamanlı çakışma yok)
+    yeni_sira_numarasi = sonraki_sira_numarasi(db, doktor_kodu.poliklinikid, is_oncelikli)
 
     # 5. ساخت کد 11 رقمی
     sira_kodu_3_hane = f"{yeni_sira_numarasi:03d}" 
-    yeni_baglanti_kodu = (
-        f"{doktor_ve_kodlar.sehirkodu}{doktor_ve_kodlar.hastanekodu}"
-        f"{doktor_ve_kodlar.poliklinikkodu}{doktor_ve_kodlar.odakodu}{sira_kodu_3_hane}"
-    )
+    yeni_baglanti_kodu = f"{doktor_kodu.onek}{sira_kodu_3_hane}"
     
     # ==============================================================================
     # --- (اصلاح شده) 6. محاسبه دقیق زمان تخمینی ---
     # ==============================================================================
     
-    # تعداد کل افرادی که همین الان در صف "Bekliyor" هستند را می‌شماریم
-    kisi_sayisi_sorgusu = db.query(func.count(models.BiletAktif.biletid)).filter(
-        models.BiletAktif.poliklinikid == doktor_ve_kodlar.poliklinikid,
-        models.BiletAktif.durum == "Bekliyor"
-    )
-    
-    if is_oncelikli:
-        # اگر من پیرمرد هستم: فقط کسانی که شماره‌شان از من کمتر است (پیرمردهای قبلی) جلوی من هستند
-        # جوان‌ها (۱۰۱+) پشت سر من می‌مانند
-        kisi_sayisi_sorgusu = kisi_sayisi_sorgusu.filter(
-            models.BiletAktif.siranumarasi < yeni_sira_numarasi
-        )
-    else:
-        # اگر من جوان هستم: همه پیرمردها (۱-۹۹) + جوان‌های قبلی (کمتر از ۱۰۱) جلوی من هستند
-        # (پس کل کسانی که الان منتظرند، جلوی من هستند)
-        pass 
-
-    bekleyen_kisi_sayisi = kisi_sayisi_sorgusu.scalar() or 0
-    
-    # زمان هر ویزیت = ۵ دقیقه
-    dakika = bekleyen_kisi_sayisi * 5
+    # افرادی که در صف همین دکتر "Bekliyor" هستند و شماره‌شان از من کمتر است جلوی من هستند
+    # (پیرمرد: فقط پیرمردهای قبلی (۱-۹۹)؛ جوان: همه پیرمردها + جوان‌های قبلی)
+    # زمان هر ویزیت از آرشیو یاد گرفته می‌شود (دکتر + ساعت روز، EWMA)
+    dakika = round(bekleme_tahmini(db, bilet_data.doktorid, yeni_sira_numarasi))
     
     if dakika == 0:
         tahmini_sure = "Hemen (Sıra Sizde)"
@@ -115,7 +76,7 @@ def create_bilet(bilet_data: schemas.BiletCreate, db: Session = Depends(get_db))
         baglantikodu=yeni_baglanti_kodu,
         hastaid=hasta.hastaid, 
         doktorid=bilet_data.doktorid,
-        poliklinikid=doktor_ve_kodlar.poliklinikid,
+        poliklinikid=doktor_kodu.poliklinikid,
         siranumarasi=yeni_sira_numarasi,
         durum="Bekliyor",
         olusturmatarihi=datetime.datetime.now(), 
@@ -130,18 +91,35 @@ def create_bilet(bilet_data: schemas.BiletCreate, db: Session = Depends(get_db))
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail="Bilet kaydedilirken hata oluştu.")
+
+    sira_yayini.degisti(yeni_bilet.poliklinikid)
     
     return yeni_bilet
 
 
+# DB_ASYNC=True iken aynı gövde AsyncSession.run_sync ile asenkron sürücü üzerinde çalışır
+if settings.DB_ASYNC:
+    @router.post("/", response_model=schemas.BiletBase)
+    async def create_bilet(bilet_data: schemas.BiletCreate, db: AsyncSession = Depends(get_async_db)):
+        """
+        Yeni bir sıra bileti oluşturur.
+        - Tahmini süre: Doktorun sırasında önündeki kişiler * doktorun (saat bazında) öğrenilmiş muayene süresi.
+        """
+        return await db.run_sync(_bilet_olustur, bilet_data)
+else:
+    @router.post("/", response_model=schemas.BiletBase)
+    def create_bilet(bilet_data: schemas.BiletCreate, db: Session = Depends(get_db)):
+        """
+        Yeni bir sıra bileti oluşturur.
+        - Tahmini süre: Doktorun sırasında önündeki kişiler * doktorun (saat bazında) öğrenilmiş muayene süresi.
+        """
+        return _bilet_olustur(db, bilet_data)
+
+
 # =================================================================
 # API 2: ردیابی بلیت (Sıra Takibi)
 # =================================================================
-@router.post("/takip/", response_model=schemas.SiraTakipDetay)
-def get_bilet_detay(giris_data: schemas.BiletTakipGiris, db: Session = Depends(get_db)):
-    """
-    Bilet Kodu VE Telefon Numarası ile sıra takip detaylarını getirir.
-    """
+def _bilet_detay_getir(db: Session, giris_data: schemas.BiletTakipGiris):
     
     # 1. دریافت اطلاعات بلیت و بیمار
     bilet_ana_bilgi = db.query(
@@ -154,6 +132,7 @@ def get_bilet_detay(giris_data: schemas.BiletTakipGiris, db: Session = Depends(g
         models.Poliklinik.poliklinikadi.label("bolum_adi"),
         models.Doktor.adsoyad.label("doktor_adi"),
         models.BiletAktif.poliklinikid,
+        models.BiletAktif.doktorid,
         models.Hasta.telefon 
     ).join(
         models.Doktor, models.BiletAktif.doktorid == models.Doktor.doktorid
@@ -172,25 +151,23 @@ def get_bilet_detay(giris_data: schemas.BiletTakipGiris, db: Session = Depends(g
     if giris_data.telefon not in bilet_ana_bilgi.telefon:
             raise HTTPException(status_code=403, detail="Telefon numarası bilet ile eşleşmiyor.") 
     
-    # 3. محاسبه "نوبت فعلی" (کسی که الان داخل اتاق است)
-    mevcut_sira_raw = db.query(func.min(models.BiletAktif.siranumarasi)).filter(
-        models.BiletAktif.poliklinikid == bilet_ana_bilgi.poliklinikid,
-        models.BiletAktif.durum == "Cagirildi",
-        func.cast(models.BiletAktif.olusturmatarihi, Date) == datetime.date.today()
-    ).scalar()
-    
-    mevcut_sira = mevcut_sira_raw or 0 
+    # وضعیت صف پلی‌کلینیک از حافظه (همه بیماران یک پلی‌کلینیک یک نسخه مشترک را می‌خوانند؛
+    # با هر تغییر وضعیت بلیت نسخه جدید ساخته می‌شود)
+    sira_durumu = sira_onbellegi.getir(db, bilet_ana_bilgi.poliklinikid)
+
+    # 3. "نوبت فعلی" (کسی که الان داخل اتاق است)
+    mevcut_sira = sira_durumu.mevcut_sira
     
-    # 4. محاسبه دقیق "نفرات باقی‌مانده"
-    # (شمارش تعداد افرادی که در صف "Bekliyor" هستند و نوبتشان از شما جلوتر است)
-    kalan_kisi_sayisi = db.query(func.count(models.BiletAktif.biletid)).filter(
-        models.BiletAktif.poliklinikid == bilet_ana_bilgi.poliklinikid,
-        models.BiletAktif.durum == "Bekliyor",
-        
-        # شرط مهم برای سیستم اولویت‌دار:
-        # اگر شماره من 101 است، تمام شماره‌های 1 تا 99 (پیرمردها) + 100 (جوان قبلی) جلوترند.
-        models.BiletAktif.siranumarasi < bilet_ana_bilgi.sizin_numaraniz
-    ).scalar()
+    # 4. "نفرات باقی‌مانده": جستجوی دودویی در لیست مرتب شماره‌های "Bekliyor"
+    # (شرط مهم برای سیستم اولویت‌دار:
+    # اگر شماره من 101 است، تمام شماره‌های 1 تا 99 (پیرمردها) + 100 (جوان قبلی) جلوترند.)
+    kalan_kisi_sayisi = sira_durumu.kalan_hasta(bilet_ana_bilgi.sizin_numaraniz)
+
+    # 5. زمان تخمینی به دقیقه (فقط برای بلیت‌های در انتظار)
+    tahmini_dakika = 0
+    if bilet_ana_bilgi.durum == "Bekliyor":
+        onundeki, iceride = sira_durumu.doktor_kuyrugu(bilet_ana_bilgi.doktorid, bilet_ana_bilgi.sizin_numaraniz)
+        tahmini_dakika = round(bekleme_tahmincisi.hazirla(db).tahmin(bilet_ana_bilgi.doktorid, onundeki, iceride_cagrilma=iceride))
 
     response_data = schemas.SiraTakipDetay(
         biletid=bilet_ana_bilgi.biletid,
@@ -199,6 +176,7 @@ def get_bilet_detay(giris_data: schemas.BiletTakipGiris, db: Session = Depends(g
         durum=bilet_ana_bilgi.durum,
         giris_zamani=bilet_ana_bilgi.giris_zamani,
         tahmini_bekleme_suresi=bilet_ana_bilgi.tahmini_bekleme_suresi,
+        tahmini_bekleme_dakika=tahmini_dakika,
         bolum_adi=bilet_ana_bilgi.bolum_adi,
         doktor_adi=bilet_ana_bilgi.doktor_adi,
         mevcut_sira=mevcut_sira,
@@ -206,6 +184,23 @@ def get_bilet_detay(giris_data: schemas.BiletTakipGiris, db: Session = Depends(g
     )
     
     return response_data
+
+
+if settings.DB_ASYNC:
+    @router.post("/takip/", response_model=schemas.SiraTakipDetay)
+    async def get_bilet_detay(giris_data: schemas.BiletTakipGiris, db: AsyncSession = Depends(get_async_db)):
+        """
+        Bilet Kodu VE Telefon Numarası ile sıra takip detaylarını getirir.
+        """
+        return await db.run_sync(_bilet_detay_getir, giris_data)
+else:
+    @router.post("/takip/", response_model=schemas.SiraTakipDetay)
+    def get_bilet_detay(giris_data: schemas.BiletTakipGiris, db: Session = Depends(get_db)):
+        """
+        Bilet Kodu VE Telefon Numarası ile sıra takip detaylarını getirir.
+        """
+        return _bilet_detay_getir(db, giris_data)
+
 # --- (REWRITTEN AND FIXED) API 3: مدیریت تاخیر یا لغو نوبت ---
 # routers/biletler_router.py
 
@@ -227,6 +222,7 @@ def ertele_veya_iptal_et(ertele_data: schemas.BiletErteleme, db: Session = Depen
     if ertele_data.aksiyon == 'iptal':
         eski_bilet.durum = "IptalEdildi"
         db.commit()
+        sira_yayini.degisti(eski_bilet.poliklinikid)
         return eski_bilet
 
     # --- سناریوی ۲: تاخیر ---
@@ -257,9 +253,14 @@ def ertele_veya_iptal_et(ertele_data: schemas.BiletErteleme, db: Session = Depen
             # ==================================================================
             # ج) *** حذف مستقیم و اجباری فرم ***
             # (این خط هر فرمی که biletid آن برابر با بلیت فعلی باشد را بدون سوال پاک می‌کند)
-            db.query(models.SoruCevapFormu).filter(
-                models.SoruCevapFormu.biletid == eski_id
-            ).delete()
+            silinen_formlar = db.execute(
+                delete(models.SoruCevapFormu)
+                .where(models.SoruCevapFormu.biletid == eski_id)
+                .returning(models.SoruCevapFormu.gonderimtarihi)
+            ).scalars().all()
+            # شمارنده فرم‌ها و خلاصه روزانه در همین تراکنش کم می‌شوند
+            if silinen_formlar:
+                formlar_silindi(db, silinen_formlar)
             
             db.flush() # اعمال آنی حذف فرم
             # ==================================================================
@@ -275,61 +276,25 @@ def ertele_veya_iptal_et(ertele_data: schemas.BiletErteleme, db: Session = Depen
             yas = bugun.year - dogum.year - ((bugun.month, bugun.day) < (dogum.month, dogum.day))
             is_oncelikli = (yas >= 65)
 
-            yeni_sira_numarasi = 0
-            if is_oncelikli:
-                son_sira = db.query(func.max(models.BiletAktif.siranumarasi)).filter(
-                    models.BiletAktif.poliklinikid == eski_poliklinik_id,
-                    func.cast(models.BiletAktif.olusturmatarihi, Date) == bugun,
-                    models.BiletAktif.siranumarasi < 100
-                ).scalar()
-                yeni_sira_numarasi = (son_sira or 0) + 1
-            else:
-                son_sira = db.query(func.max(models.BiletAktif.siranumarasi)).filter(
-                    models.BiletAktif.poliklinikid == eski_poliklinik_id,
-                    func.cast(models.BiletAktif.olusturmatarihi, Date) == bugun,
-                    models.BiletAktif.siranumarasi >= 100
-                ).scalar()
-                yeni_sira_numarasi = (son_sira or 100) + 1
+            yeni_sira_numarasi = sonraki_sira_numarasi(db, eski_poliklinik_id, is_oncelikli, bugun)
 
             sira_kodu_3_hane = f"{yeni_sira_numarasi:03d}"
             
-            # و) ساخت کد جدید (با رفع ابهام JOIN)
-            doktor_info = db.query(
-                 models.Doktor.odakodu, models.Poliklinik.poliklinikkodu, 
-                 models.Hastane.hastanekodu, models.Sehir.sehirkodu
-            ).select_from(models.Doktor)\
-             .join(models.Poliklinik, models.Doktor.poliklinikid == models.Poliklinik.poliklinikid)\
-             .join(models.Hastane, models.Poliklinik.hastaneid == models.Hastane.hastaneid)\
-             .join(models.Sehir, models.Hastane.sehirid == models.Sehir.sehirid)\
-             .filter(models.Doktor.doktorid == eski_doktor_id).first()
-
-            if not doktor_info:
+            # و) ساخت کد جدید (önek bellek önbelleğinden)
+            doktor_kodu = doktor_kodlari.getir(db, eski_doktor_id)
+
+            if not doktor_kodu:
                  raise HTTPException(status_code=500, detail="Doktor bilgileri bulunamadı.")
 
-            yeni_baglanti_kodu = (
-                f"{doktor_info.sehirkodu}"
-                f"{doktor_info.hastanekodu}"
-                f"{doktor_info.poliklinikkodu}"
-                f"{doktor_info.odakodu}"
-                f"{sira_kodu_3_hane}"
-            )
+            yeni_baglanti_kodu = f"{doktor_kodu.onek}{sira_kodu_3_hane}"
             
             # ز) محاسبه زمان و ثبت
             # ز) محاسبه زمان دقیق و منطقی (اصلاح شده)
             eklenen_dakika = int(ertele_data.aksiyon.split('_')[0])
             
-            # 1. شمارش تعداد کسانی که واقعاً در صف هستند و نوبتشان از نوبت جدید من جلوتر است
-            # (یعنی کسانی که جلوی من ایستاده‌اند)
-            kisi_sayisi_sorgusu = db.query(func.count(models.BiletAktif.biletid)).filter(
-                models.BiletAktif.poliklinikid == eski_poliklinik_id,
-                models.BiletAktif.durum == "Bekliyor",
-                models.BiletAktif.siranumarasi < yeni_sira_numarasi
-            )
-            
-            bekleyen_kisi_sayisi = kisi_sayisi_sorgusu.scalar() or 0
-            
-            # 2. محاسبه زمان واقعی انتظار (هر نفر ۵ دقیقه)
-            gercek_bekleme_suresi = bekleyen_kisi_sayisi * 5
+            # 1. و 2. زمان واقعی انتظار: کسانی که در صف همین دکتر جلوی نوبت جدید من هستند
+            # × زمان ویزیت یاد گرفته شده (دکتر + ساعت روز)
+            gercek_bekleme_suresi = round(bekleme_tahmini(db, eski_doktor_id, yeni_sira_numarasi))
             
             # 3. زمان نهایی = زمان صف + زمانی که خود کاربر خواسته به تاخیر بیفتد
             # (اینطوری اگر صف خلوت باشد هم، آن ۱۵ دقیقه تاخیر اعمال می‌شود)
@@ -353,6 +318,8 @@ def ertele_veya_iptal_et(ertele_data: schemas.BiletErteleme, db: Session = Depen
             db.add(yeni_bilet)
             db.commit()
             db.refresh(yeni_bilet)
+
+            sira_yayini.degisti(eski_poliklinik_id)
             
             return yeni_bilet
         except Exception as e:
@@ -361,4 +328,108 @@ def ertele_veya_iptal_et(ertele_data: schemas.BiletErteleme, db: Session = Depen
             raise HTTPException(status_code=500, detail=f"İşlem sırasında bir hata oluştu: {e}")
 
     else:
-        raise HTTPException(status_code=400, detail="Geçersiz işlem türü.")
\ No newline at end of file
+        raise HTTPException(status_code=400, detail="Geçersiz işlem türü.")
+
+
+# =================================================================
+# API 4: canlı sıra takibi (WebSocket / SSE)
+# =================================================================
+def _takip_bileti_bul(baglantikodu: str):
+    """Canlı takip için bileti ve hastanın telefonunu tek sorguda getirir."""
+    db = SessionLocal()
+    try:
+        return db.query(
+            models.BiletAktif.biletid,
+            models.BiletAktif.poliklinikid,
+            models.Hasta.telefon
+        ).join(
+            models.Hasta, models.BiletAktif.hastaid == models.Hasta.hastaid
+        ).filter(
+            models.BiletAktif.baglantikodu == baglantikodu
+        ).first()
+    finally:
+        db.close()
+
+
+async def _kapanana_kadar_oku(websocket: WebSocket):
+    # İstemciden gelen mesajlar önemsiz; sadece bağlantının kapanmasını bekleriz
+    while True:
+        mesaj = await websocket.receive()
+        if mesaj["type"] == "websocket.disconnect":
+            return
+
+
+@router.websocket("/canli/{baglantikodu}")
+async def canli_takip_ws(websocket: WebSocket, baglantikodu: str, telefon: str):
+    """
+    Bilet durumunu WebSocket üzerinden canlı iter.
+    Sadece biletin polikliniğinde sıra değiştiğinde mesaj gönderilir.
+    """
+    bilet = await run_in_threadpool(_takip_bileti_bul, baglantikodu)
+    if not bilet:
+        await websocket.close(code=4404)
+        return
+    if telefon not in bilet.telefon:
+        await websocket.close(code=4403)
+        return
+
+    await websocket.accept()
+    abone = await sira_yayini.abone_ol(bilet.poliklinikid, bilet.biletid)
+    okuyucu = asyncio.ensure_future(_kapanana_kadar_oku(websocket))
+    try:
+        mesaj = await sira_yayini.ilk_mesaj(abone)
+        while True:
+            await websocket.send_json(mesaj)
+            if not mesaj["aktif"]:
+                await websocket.close()
+                break
+
+            bekleme = asyncio.ensure_future(abone.kuyruk.get())
+            await asyncio.wait({bekleme, okuyucu}, return_when=asyncio.FIRST_COMPLETED)
+            if not bekleme.done():
+                bekleme.cancel()
+                break
+            mesaj = bekleme.result()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sira_yayini.abonelikten_cik(abone)
+        okuyucu.cancel()
+
+
+@router.get("/canli/{baglantikodu}/sse")
+async def canli_takip_sse(baglantikodu: str, telefon: str):
+    """
+    Bilet durumunu Server-Sent Events (text/event-stream) ile canlı iter.
+    (WebSocket kullanamayan istemciler için)
+    """
+    bilet = await run_in_threadpool(_takip_bileti_bul, baglantikodu)
+    if not bilet:
+        raise HTTPException(status_code=404, detail="Bu koda ait aktif bir bilet bulunamadı.")
+    if telefon not in bilet.telefon:
+        raise HTTPException(status_code=403, detail="Telefon numarası bilet ile eşleşmiyor.")
+
+    abone = await sira_yayini.abone_ol(bilet.poliklinikid, bilet.biletid)
+
+    async def olaylar():
+        try:
+            mesaj = await sira_yayini.ilk_mesaj(abone)
+            while True:
+                yield f"data: {json.dumps(mesaj, ensure_ascii=False)}\n\n"
+                if not mesaj["aktif"]:
+                    break
+                # Proxy'lerin bağlantıyı kesmemesi için 15 saniyede bir boş yorum gönder
+                while True:
+                    try:
+                        mesaj = await asyncio.wait_for(abone.kuyruk.get(), timeout=15)
+                        break
+                    except asyncio.TimeoutError:
+                        yield ": ping\n\n"
+        finally:
+            sira_yayini.abonelikten_cik(abone)
+
+    return StreamingResponse(
+        olaylar(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,9 +1,15 @@
 # routers/doktor_router.py
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import func, Date
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
 import models, schemas
-from db import get_db
+from db import get_db, get_async_db, settings
+from services.doktor_kodlari import doktor_kodlari
+from services.konum_onbellegi import konum_onbellegi
+from services.sira_yayini import sira_yayini
+from services.bekleme_tahmini import bekleme_tahmincisi
+from services.hizli_json import liste_yaniti
 import datetime
 
 router = APIRouter(
@@ -12,13 +18,7 @@ router = APIRouter(
 )
 
 # --- API 1: فراخوانی بیمار (Çağır) ---
-@router.post("/cagir/{baglanti_kodu}", response_model=schemas.DoktorEkraniDetay)
-def hasta_cagir(baglanti_kodu: str, db: Session = Depends(get_db)):
-    """
-    1. 11 haneli bilet kodunu alır.
-    2. Bileti bulur ve durumunu 'Cagirildi' yapar.
-    3. Hasta bilgilerini ve AI özetini döndürür.
-    """
+def _hasta_cagir(db: Session, baglanti_kodu: str):
     
     # ۱. پیدا کردن بلیت
     bilet = db.query(models.BiletAktif).filter(models.BiletAktif.baglantikodu == baglanti_kodu).first()
@@ -26,9 +26,11 @@ def hasta_cagir(baglanti_kodu: str, db: Session = Depends(get_db)):
     if not bilet:
         raise HTTPException(status_code=404, detail="Bu koda ait bilet bulunamadı.")
     
-    # ۲. تغییر وضعیت به 'Cagirildi'
+    # ۲. تغییر وضعیت به 'Cagirildi' (زمان فراخوانی برای محاسبه مدت ویزیت)
     bilet.durum = "Cagirildi"
+    bilet.cagrilmatarihi = datetime.datetime.now()
     db.commit()
+    sira_yayini.degisti(bilet.poliklinikid)
     
     # ۳. دریافت اطلاعات بیمار
     hasta = db.query(models.Hasta).filter(models.Hasta.hastaid == bilet.hastaid).first()
@@ -38,14 +40,14 @@ def hasta_cagir(baglanti_kodu: str, db: Session = Depends(get_db)):
     dogum = hasta.dogumtarihi
     yas = bugun.year - dogum.year - ((bugun.month, bugun.day) < (dogum.month, dogum.day))
 
-    # ۵. دریافت فرم هوش مصنوعی
-    form = db.query(models.SoruCevapFormu).filter(
+    # ۵. دریافت خلاصه هوش مصنوعی (فقط ستون ai_ozet؛ متن کامل چت خوانده نمی‌شود)
+    ai_ozet = db.query(models.SoruCevapFormu.ai_ozet).filter(
         models.SoruCevapFormu.biletid == bilet.biletid
-    ).first()
+    ).scalar()
     
     ai_metni = "Hasta ön bilgi formu doldurmadı."
-    if form and form.ai_ozet:
-        ai_metni = form.ai_ozet 
+    if ai_ozet:
+        ai_metni = ai_ozet 
 
     # ۶. بازگرداندن اطلاعات
     return {
@@ -56,6 +58,105 @@ def hasta_cagir(baglanti_kodu: str, db: Session = Depends(get_db)):
         "siranumarasi": bilet.siranumarasi,
         "ai_ozet": ai_metni
     }
+
+
+if settings.DB_ASYNC:
+    @router.post("/cagir/{baglanti_kodu}", response_model=schemas.DoktorEkraniDetay)
+    async def hasta_cagir(baglanti_kodu: str, db: AsyncSession = Depends(get_async_db)):
+        """
+        1. 11 haneli bilet kodunu alır.
+        2. Bileti bulur ve durumunu 'Cagirildi' yapar.
+        3. Hasta bilgilerini ve AI özetini döndürür.
+        """
+        return await db.run_sync(_hasta_cagir, baglanti_kodu)
+else:
+    @router.post("/cagir/{baglanti_kodu}", response_model=schemas.DoktorEkraniDetay)
+    def hasta_cagir(baglanti_kodu: str, db: Session = Depends(get_db)):
+        """
+        1. 11 haneli bilet kodunu alır.
+        2. Bileti bulur ve durumunu 'Cagirildi' yapar.
+        3. Hasta bilgilerini ve AI özetini döndürür.
+        """
+        return _hasta_cagir(db, baglanti_kodu)
+
+
+
+# --- API 1b: فراخوانی نفر بعدی (Sıradaki) ---
+# Tek ifade: doktorun en küçük numaralı bekleyen biletini kilitle (öncelikli
+# bant 1-99 önce gelir), 'Cagirildi' yap; hasta bilgisi, yaş ve AI özeti ile
+# birlikte döndür. SKIP LOCKED sayesinde aynı odanın iki ekranı aynı anda
+# çağırırsa ikincisi kilitli bileti atlayıp bir sonrakini alır.
+_SIRADAKI_SQL = text("""
+    WITH secilen AS (
+        SELECT biletid
+        FROM sirabiletleri_aktiftablosu
+        WHERE doktorid = :doktor_id AND durum = 'Bekliyor'
+        ORDER BY siranumarasi
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    ),
+    cagrilan AS (
+        UPDATE sirabiletleri_aktiftablosu a
+        SET durum = 'Cagirildi', cagrilmatarihi = :simdi
+        FROM secilen s
+        WHERE a.biletid = s.biletid
+        RETURNING a.biletid, a.hastaid, a.poliklinikid, a.siranumarasi
+    )
+    SELECT
+        c.biletid, c.poliklinikid, c.siranumarasi, h.adsoyad, h.tckimlik,
+        CAST(date_part('year', age(CAST(:bugun AS date), h.dogumtarihi)) AS integer) AS yas,
+        COALESCE(NULLIF(f.ai_ozet, ''), :form_yok) AS ai_ozet
+    FROM cagrilan c
+    JOIN hastalartablosu h ON h.hastaid = c.hastaid
+    LEFT JOIN sorucevapformlaritablosu f ON f.biletid = c.biletid
+""")
+
+
+def _siradaki_hasta_cagir(db: Session, doktor_id: int):
+    try:
+        satir = db.execute(_SIRADAKI_SQL, {
+            "doktor_id": doktor_id,
+            "simdi": datetime.datetime.now(),
+            "bugun": datetime.date.today(),
+            "form_yok": "Hasta ön bilgi formu doldurmadı.",
+        }).first()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Hata oluştu: {e}")
+
+    if not satir:
+        raise HTTPException(status_code=404, detail="Bekleyen hasta yok.")
+
+    sira_yayini.degisti(satir.poliklinikid)
+
+    return {
+        "biletid": satir.biletid,
+        "adsoyad": satir.adsoyad,
+        "tckimlik": satir.tckimlik,
+        "yas": satir.yas,
+        "siranumarasi": satir.siranumarasi,
+        "ai_ozet": satir.ai_ozet
+    }
+
+
+if settings.DB_ASYNC:
+    @router.post("/{doktor_id}/siradaki", response_model=schemas.DoktorEkraniDetay)
+    async def siradaki_hasta(doktor_id: int, db: AsyncSession = Depends(get_async_db)):
+        """
+        Doktorun sırasındaki bir sonraki hastayı çağırır (bilet kodu gerekmez).
+        Öncelikli hastalar (1-99) önce gelir. Tek veritabanı gidiş-dönüşü.
+        """
+        return await db.run_sync(_siradaki_hasta_cagir, doktor_id)
+else:
+    @router.post("/{doktor_id}/siradaki", response_model=schemas.DoktorEkraniDetay)
+    def siradaki_hasta(doktor_id: int, db: Session = Depends(get_db)):
+        """
+        Doktorun sırasındaki bir sonraki hastayı çağırır (bilet kodu gerekmez).
+        Öncelikli hastalar (1-99) önce gelir. Tek veritabanı gidiş-dönüşü.
+        """
+        return _siradaki_hasta_cagir(db, doktor_id)
+
     
 # --- API 2: لیست انتظار دکتر (Bekleyenler) ---
 @router.get("/bekleyenler/{doktor_id}", response_model=list[schemas.DoktorBekleyenHasta])
@@ -73,18 +174,17 @@ def get_bekleyen_hastalar(doktor_id: int, db: Session = Depends(get_db)):
         models.BiletAktif.doktorid == doktor_id,
         models.BiletAktif.durum == 'Bekliyor',
         # (برای تست، فیلتر تاریخ را فعلا غیرفعال نگه داشتم)
-        # func.cast(models.BiletAktif.olusturmatarihi, Date) == datetime.date.today()
+        # gun_filtresi(models.BiletAktif.olusturmatarihi)
     ).order_by(models.BiletAktif.siranumarasi).all()
+
+    if settings.HIZLI_JSON:
+        # Satırlar zaten şemanın kolonları; response_model doğrulaması atlanır
+        return liste_yaniti(bekleyenler)
     
     return bekleyenler
 
 # --- API 3: پایان ویزیت (Tamamla) ---
-@router.post("/tamamla/{bilet_id}", response_model=schemas.Message)
-def muayene_tamamla(bilet_id: int, db: Session = Depends(get_db)):
-    """
-    Doktor muayeneyi bitirdiğinde bu endpoint çağrılır.
-    Biletin durumunu 'Tamamlandi' yapar.
-    """
+def _muayeneyi_tamamla(db: Session, bilet_id: int):
     
     # ۱. پیدا کردن بلیت با شناسه
     bilet = db.query(models.BiletAktif).filter(models.BiletAktif.biletid == bilet_id).first()
@@ -94,6 +194,7 @@ def muayene_tamamla(bilet_id: int, db: Session = Depends(get_db)):
     
     # ۲. تغییر وضعیت
     bilet.durum = "Tamamlandi"
+    bilet.tamamlanmatarihi = datetime.datetime.now()
     
     # ۳. ذخیره در دیتابیس
     try:
@@ -101,10 +202,34 @@ def muayene_tamamla(bilet_id: int, db: Session = Depends(get_db)):
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Hata oluştu: {e}")
+
+    sira_yayini.degisti(bilet.poliklinikid)
+
+    # ۴. مدت ویزیت (فراخوانی -> پایان) میانگین زمان ویزیت دکتر را به‌روز می‌کند
+    if bilet.cagrilmatarihi is not None:
+        bekleme_tahmincisi.gozlem_ekle(bilet.doktorid, bilet.cagrilmatarihi, bilet.tamamlanmatarihi)
     
     return {"detail": "Muayene tamamlandı"}
 
 
+if settings.DB_ASYNC:
+    @router.post("/tamamla/{bilet_id}", response_model=schemas.Message)
+    async def muayene_tamamla(bilet_id: int, db: AsyncSession = Depends(get_async_db)):
+        """
+        Doktor muayeneyi bitirdiğinde bu endpoint çağrılır.
+        Biletin durumunu 'Tamamlandi' yapar.
+        """
+        return await db.run_sync(_muayeneyi_tamamla, bilet_id)
+else:
+    @router.post("/tamamla/{bilet_id}", response_model=schemas.Message)
+    def muayene_tamamla(bilet_id: int, db: Session = Depends(get_db)):
+        """
+        Doktor muayeneyi bitirdiğinde bu endpoint çağrılır.
+        Biletin durumunu 'Tamamlandi' yapar.
+        """
+        return _muayeneyi_tamamla(db, bilet_id)
+
+
 # --- (جدید) API 4: بیمار نیامد (Gelmedi) ---
 # آدرس: POST /api/doktor/gelmedi/{bilet_id}
 @router.post("/gelmedi/{bilet_id}", response_model=schemas.Message)
@@ -130,6 +255,8 @@ def hasta_gelmedi(bilet_id: int, db: Session = Depends(get_db)):
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Hata oluştu: {e}")
+
+    sira_yayini.degisti(bilet.poliklinikid)
     
     return {"detail": "Hasta durumu 'Gelmeyen' olarak güncellendi."}
 # routers/doktor_router.py
@@ -167,5 +294,9 @@ def doktor_ekle(doktor_data: schemas.DoktorCreate, db: Session = Depends(get_db)
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Doktor kaydedilemedi: {e}")
+
+    # ۴. önbellekteki doktor kodlarını ve konum ağacını geçersiz kıl
+    doktor_kodlari.gecersiz_kil()
+    konum_onbellegi.gecersiz_kil()
         
     return {"detail": f"Doktor '{yeni_doktor.adsoyad}' başarıyla eklendi."}    
\ No newline at end of file
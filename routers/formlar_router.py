@@ -1,12 +1,14 @@
 # routers/formlar_router.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 import models, schemas
 from db import get_db
+from services.form_sayaclari import form_gonderildi, istatistik, gunluk_seri
+from services.form_metinleri import metni_sikistir, metin_getir
 import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import func, Date  
 
 router = APIRouter(
     prefix="/api/formlar",      # تمام آدرس‌های این فایل با /api/formlar شروع می‌شوند
@@ -47,17 +49,25 @@ def create_form(form_data: schemas.FormCreate, db: Session = Depends(get_db)):
         )
 
     # ۳. فرم جدید را در دیتابیس ایجاد می‌کنیم
+    # (متن چت بزرگ‌تر از FORM_METNI_ESIGI فشرده در جدول جداگانه ذخیره می‌شود)
+    metin_kaydi = metni_sikistir(form_data.formverisi_json)
     db_form = models.SoruCevapFormu(
         biletid=form_data.biletid,
         ai_ozet=form_data.ai_ozet,
-        formverisi_json=form_data.formverisi_json, # (متن کامل چت، اختیاری)
+        formverisi_json=None if metin_kaydi else form_data.formverisi_json, # (متن کامل چت، اختیاری)
         gonderimtarihi=datetime.datetime.now() # زمان فعلی
     )
 
     try:
         db.add(db_form)
+        db.flush()
+        if metin_kaydi:
+            metin_kaydi.formid = db_form.formid
+            db.add(metin_kaydi)
+        # شمارنده کل و خلاصه روزانه در همان تراکنش افزایش می‌یابند
+        form_gonderildi(db, db_form.gonderimtarihi)
         db.commit()
-        db.refresh(db_form) # داده‌های کامل (شامل FormId) را از دیتابیس می‌گیریم
+        db.refresh(db_form) # داده‌های کامل (شامل FormId) را از دیتابیس می‌گیریم (متن چت deferred است و خوانده نمی‌شود)
     except Exception as e:
         db.rollback()
         print(f"Form kaydetme hatası: {e}")
@@ -67,6 +77,26 @@ def create_form(form_data: schemas.FormCreate, db: Session = Depends(get_db)):
     return db_form
 
 
+# --- API 2: دریافت متن کامل گفتگو (به صورت استریم) ---
+# آدرس: GET /api/formlar/{form_id}/metin
+@router.get("/{form_id}/metin")
+def get_form_metni(form_id: int, request: Request, db: Session = Depends(get_db)):
+    """
+    Formun tam sohbet metnini (formverisi_json) JSON olarak parça parça gönderir.
+    Sıkıştırılmış saklanan metin, istemci gzip kabul ediyorsa açılmadan iletilir.
+    """
+    gzip_kabul = "gzip" in request.headers.get("accept-encoding", "")
+    sonuc = metin_getir(db, form_id, gzip_kabul)
+    if sonuc is None:
+        raise HTTPException(status_code=404, detail="Bu forma ait sohbet metni bulunamadı.")
+
+    parcalar, kodlama = sonuc
+    basliklar = {"Vary": "Accept-Encoding"}
+    if kodlama:
+        basliklar["Content-Encoding"] = kodlama
+    return StreamingResponse(parcalar, media_type="application/json", headers=basliklar)
+
+
 
 
 
@@ -80,17 +110,33 @@ def get_form_istatistikleri(db: Session = Depends(get_db)):
     """
     Gemini tarafından doldurulan toplam ve günlük form sayısını getirir.
     (تعداد کل و روزانه فرم‌های پر شده توسط Gemini را برمی‌گرداند.)
+    Sayılar form tablosu taranmadan sayaç / günlük özet tablosundan okunur.
     """
     
-    # ۱. شمارش کل فرم‌ها
-    toplam = db.query(func.count(models.SoruCevapFormu.formid)).scalar() or 0
-    
-    # ۲. شمارش فرم‌های امروز
-    bugun = db.query(func.count(models.SoruCevapFormu.formid)).filter(
-        func.cast(models.SoruCevapFormu.gonderimtarihi, Date) == datetime.date.today()
-    ).scalar() or 0
+    # ۱. و ۲. تعداد کل و تعداد امروز (از شمارنده‌ها، بدون اسکن جدول فرم‌ها)
+    toplam, bugun = istatistik(db)
     
     return {
         "toplam_form_sayisi": toplam,
         "bugunku_form_sayisi": bugun
-    }    
\ No newline at end of file
+    }
+
+
+# --- API 4: آمار روزانه فرم‌ها (سری زمانی) ---
+# آدرس: GET /api/formlar/istatistik/gunluk?baslangic=2025-01-01&bitis=2025-01-31
+@router.get("/istatistik/gunluk", response_model=List[schemas.FormGunlukIstatistik])
+def get_form_gunluk_istatistikleri(baslangic: Optional[datetime.date] = None,
+                                   bitis: Optional[datetime.date] = None,
+                                   db: Session = Depends(get_db)):
+    """
+    Verilen tarih aralığında (varsayılan: son 30 gün) her gün için gönderilen
+    ve sonradan silinen form sayılarını getirir. Günlük özet tablosundan okunur.
+    """
+    bitis = bitis or datetime.date.today()
+    baslangic = baslangic or bitis - datetime.timedelta(days=29)
+    if baslangic > bitis:
+        raise HTTPException(status_code=400, detail="Başlangıç tarihi bitiş tarihinden sonra olamaz.")
+    if (bitis - baslangic).days > 3660:
+        raise HTTPException(status_code=400, detail="Tarih aralığı en fazla 10 yıl olabilir.")
+
+    return gunluk_seri(db, baslangic, bitis)    
\ No newline at end of file
@@ -1,10 +1,18 @@
 # routers/hastalar_router.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import or_ 
-from typing import List
+from sqlalchemy import exists, func, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from typing import List, Optional
+import io
+import tempfile
 import models, schemas
-from db import get_db
+from db import get_db, SessionLocal, settings
+from services.hasta_aktarimi import hastalari_aktar, satirlari_oku
+from services.sifre_hash import sifre_hash_havuzu, SifreKuyruguDolu
+from services.hizli_json import liste_yaniti, sema_kolonlari, json_baytlari
 
 
 
@@ -14,40 +22,232 @@ router = APIRouter(
 )
 
 
-@router.post("/", response_model=schemas.Message) 
-def create_hasta(hasta: schemas.HastaCreate, db: Session = Depends(get_db)):
+def _mesgul_yaniti():
+    # Hash havuzu dolu: istemci kısa süre sonra tekrar denesin
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Sunucu şu an yoğun, lütfen birkaç saniye sonra tekrar deneyin."},
+        headers={"Retry-After": "1"}
+    )
 
-    conditions = [
+
+def _kayit_var_mi(db: Session, hasta: schemas.HastaCreate) -> bool:
+    """
+    Aynı TC Kimlik, ad soyad veya e-posta ile kayıt var mı? Sadece bir
+    iyileştirme: tekrar eden kayıtlar için bcrypt çalıştırılmaz. Üç koşulun da
+    arkasında UNIQUE indeks vardır (BitmapOr); asıl kontrol yine eklemedeki
+    ON CONFLICT'tir, bu yüzden eşzamanlı aynı kayıtlardan sadece biri eklenir.
+    """
+    kosullar = [
         models.Hasta.tckimlik == hasta.tckimlik,
-        models.Hasta.adsoyad == hasta.adsoyad
+        models.Hasta.adsoyad == hasta.adsoyad,
     ]
     if hasta.email:
-        conditions.append(models.Hasta.email == hasta.email)
+        kosullar.append(models.Hasta.email == hasta.email)
+    return db.query(exists().where(or_(*kosullar))).scalar()
 
-    existing_hasta = db.query(models.Hasta).filter(or_(*conditions)).first()
 
-    if existing_hasta:
-        raise HTTPException(
-            status_code=400,
-            detail="Bu kayıt daha önceden yapılmış."
-        )
-
-
-    db_hasta = models.Hasta(
+def _hasta_kaydet(db: Session, hasta: schemas.HastaCreate, sifre_hash: str) -> bool:
+    """
+    Tek ifade: INSERT ... ON CONFLICT DO NOTHING RETURNING hastaid.
+    tckimlik, adsoyad veya email UNIQUE kısıtına takılırsa satır eklenmez ve False döner;
+    aynı anda iki kiosktan gelen aynı kayıtta da sadece biri eklenir.
+    """
+    ifade = insert(models.Hasta).values(
         adsoyad=hasta.adsoyad,
         tckimlik=hasta.tckimlik,
-        sifre=hasta.sifre,
+        sifre=sifre_hash,
         email=hasta.email,
         telefon=hasta.telefon,
         dogumtarihi=hasta.dogumtarihi
-    )
-    db.add(db_hasta)
+    ).on_conflict_do_nothing().returning(models.Hasta.hastaid)
+
+    hasta_id = db.execute(ifade).scalar()
     db.commit()
-    db.refresh(db_hasta)
+    return hasta_id is not None
+
+
+@router.post("/", response_model=schemas.Message) 
+async def create_hasta(hasta: schemas.HastaCreate, db: Session = Depends(get_db)):
+    """
+    Yeni hasta kaydı. Şifre bcrypt ile hashlenerek saklanır; hashleme ayrı
+    bir havuzda çalışır, havuz doluysa 503 döner.
+    Aynı TC Kimlik, ad soyad veya e-posta ile kayıt varsa hashlemeden önce
+    reddedilir; arada eşzamanlı eklenen kayıtlar üç alanın UNIQUE kısıtlarıyla
+    (ON CONFLICT) yakalanır.
+    """
+    if await run_in_threadpool(_kayit_var_mi, db, hasta):
+        raise HTTPException(
+            status_code=400,
+            detail="Bu kayıt daha önceden yapılmış."
+        )
+
+    try:
+        sifre_hash = await sifre_hash_havuzu.hashle(hasta.sifre)
+    except SifreKuyruguDolu:
+        return _mesgul_yaniti()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not await run_in_threadpool(_hasta_kaydet, db, hasta, sifre_hash):
+        raise HTTPException(
+            status_code=400,
+            detail="Bu kayıt daha önceden yapılmış."
+        )
 
     return {"detail": "Kayıt başarıyla yapıldı."}
+
+
+def _sifre_getir(db: Session, tckimlik: str):
+    return db.query(models.Hasta.hastaid, models.Hasta.sifre).filter(models.Hasta.tckimlik == tckimlik).first()
+
+
+def _sifre_guncelle(db: Session, hasta_id: int, eski_hash: str, yeni_hash: str):
+    # Arada şifre değiştiyse üzerine yazılmasın
+    db.query(models.Hasta).filter(
+        models.Hasta.hastaid == hasta_id,
+        models.Hasta.sifre == eski_hash
+    ).update({models.Hasta.sifre: yeni_hash}, synchronize_session=False)
+    db.commit()
+
+
+@router.post("/giris", response_model=schemas.Message)
+async def hasta_giris(giris: schemas.HastaGiris, db: Session = Depends(get_db)):
+    """
+    TC Kimlik ve şifre ile giriş doğrulaması.
+    Eski (düz metin veya farklı maliyetli) şifreler başarılı girişte güncel
+    maliyetle yeniden hashlenir (SIFRE_GIRISTE_YENIDEN_HASH).
+    """
+    kayit = await run_in_threadpool(_sifre_getir, db, giris.tckimlik)
+
+    # Kayıt yoksa da bcrypt (sahte hash'e karşı) çalışır: iki yol aynı sürede döner
+    try:
+        dogru, yeni_hash = await sifre_hash_havuzu.dogrula(giris.sifre, kayit.sifre if kayit else None)
+    except SifreKuyruguDolu:
+        return _mesgul_yaniti()
+
+    if not kayit or not dogru:
+        raise HTTPException(status_code=401, detail="TC Kimlik veya şifre hatalı.")
+
+    if yeni_hash:
+        await run_in_threadpool(_sifre_guncelle, db, kayit.hastaid, kayit.sifre, yeni_hash)
+
+    return {"detail": "Giriş başarılı."}
+def _hasta_filtresi(sorgu, son_id: int, ara: Optional[str]):
+    """
+    Keyset sayfalama (hastaid > son_id, hastaid sırasıyla) ve önek araması:
+    sadece rakamsa tckimlik, değilse adsoyad (büyük/küçük harf duyarsız) ile başlayanlar.
+    Query ve select() için aynı şekilde çalışır.
+    """
+    sorgu = sorgu.filter(models.Hasta.hastaid > son_id)
+    if ara:
+        desen = ara.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        if ara.isdigit():
+            sorgu = sorgu.filter(models.Hasta.tckimlik.like(desen, escape="\\"))
+        else:
+            # lower(sabit) planlama sırasında hesaplanır; ix_hasta_adsoyad_onek kullanılır
+            sorgu = sorgu.filter(func.lower(models.Hasta.adsoyad).like(func.lower(desen), escape="\\"))
+    return sorgu.order_by(models.Hasta.hastaid)
+
+
 @router.get("/", response_model=List[schemas.HastaBase]) 
-def get_all_hastalar(db: Session = Depends(get_db)):
+def get_all_hastalar(response: Response, son_id: int = 0, limit: Optional[int] = None,
+                     ara: Optional[str] = None, db: Session = Depends(get_db)):
+    """
+    Hastaları hastaid sırasıyla sayfa sayfa getirir.
+    Sonraki sayfa için 'X-Sonraki-Id' başlığındaki değer son_id olarak gönderilir
+    (başlık yoksa son sayfadır). 'ara': ad soyad veya TC kimlik öneki.
+    """
+    limit = limit or settings.HASTA_SAYFA_BOYUTU
+    if limit < 1 or limit > settings.HASTA_SAYFA_AZAMI:
+        raise HTTPException(status_code=400, detail=f"Limit 1 ile {settings.HASTA_SAYFA_AZAMI} arasında olmalıdır.")
+
+    if settings.HIZLI_JSON:
+        # Sadece yanıttaki kolonlar (şifre hash'i okunmaz), ORM nesnesi ve ikinci doğrulama yok
+        hastalar = _hasta_filtresi(db.query(*sema_kolonlari(models.Hasta, schemas.HastaBase)), son_id, ara).limit(limit).all()
+    else:
+        hastalar = _hasta_filtresi(db.query(models.Hasta), son_id, ara).limit(limit).all()
+
+    basliklar = {"X-Sonraki-Id": str(hastalar[-1].hastaid)} if len(hastalar) == limit else {}
+    if settings.HIZLI_JSON:
+        return liste_yaniti(hastalar, basliklar)
+
+    response.headers.update(basliklar)
+    return hastalar
+
+
+def _ndjson_satirlari(son_id: int, ara: Optional[str]):
+    # StreamingResponse threadpool'da tükettiği için oturum üreteç içinde açılır
+    db = SessionLocal()
+    try:
+        ifade = _hasta_filtresi(select(*sema_kolonlari(models.Hasta, schemas.HastaBase)), son_id, ara) \
+            .execution_options(yield_per=settings.HASTA_DISA_AKTARIM_PARTI)
+        # yield_per: sunucu taraflı imleç; tablo belleğe alınmaz, her parti tek parça yazılır
+        for parti in db.execute(ifade).partitions():
+            yield b"".join(json_baytlari(satir._asdict()) + b"\n" for satir in parti)
+    finally:
+        db.close()
+
+
+@router.get("/disa-aktar")
+def hastalari_disa_aktar(son_id: int = 0, ara: Optional[str] = None):
+    """
+    Hastaları NDJSON olarak akıtır (satır başına bir hasta, hastaid sırasıyla).
+    Kesilen aktarım son satırın hastaid'si son_id verilerek devam ettirilir.
+    """
+    return StreamingResponse(_ndjson_satirlari(son_id, ara), media_type="application/x-ndjson")
+
+
+# --- Toplu hasta aktarımı (CSV / NDJSON) ---
+@router.post("/toplu", response_model=schemas.HastaAktarimSonucu)
+async def hastalari_toplu_aktar(request: Request, bicim: str = "csv"):
+    """
+    İstek gövdesindeki CSV (başlık satırlı) veya NDJSON hasta listesini içe aktarır.
+    Kolonlar: adsoyad, tckimlik, sifre, email, telefon, dogumtarihi
+    Hatalı / tekrar eden satırlar reddedilir, geri kalanı kaydedilir.
+    """
+    if bicim not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="Biçim 'csv' veya 'ndjson' olmalıdır.")
+
+    # Gövde belleği doldurmasın diye büyükse diske taşan geçici dosyaya akıtılır.
+    # Disk yazımı event loop'u bloklamasın diye parçalar biriktirilip thread'de yazılır.
+    dosya = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    tampon = bytearray()
+    async for parca in request.stream():
+        tampon += parca
+        if len(tampon) >= 1024 * 1024:
+            await run_in_threadpool(dosya.write, bytes(tampon))
+            tampon.clear()
+    await run_in_threadpool(dosya.write, bytes(tampon))
+    await run_in_threadpool(dosya.seek, 0)
+
+    reddedilenler = []
+    sayac = {"red": 0}
+
+    def reddet(red: dict):
+        sayac["red"] += 1
+        if len(reddedilenler) < 1000:
+            reddedilenler.append(red)
+
+    def aktar():
+        metin = io.TextIOWrapper(dosya, encoding="utf-8-sig", newline="")
+        db = SessionLocal()
+        try:
+            return hastalari_aktar(db, satirlari_oku(metin, bicim), reddet)
+        finally:
+            db.close()
+            metin.close()
+
+    try:
+        eklenen = await run_in_threadpool(aktar)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Dosya UTF-8 olmalıdır.")
+    except Exception as e:
+        print(f"Toplu aktarım hatası: {e}")
+        raise HTTPException(status_code=500, detail=f"Aktarım sırasında hata oluştu: {e}")
 
-    hastalar = db.query(models.Hasta).all()
-    return hastalar
\ No newline at end of file
+    return {
+        "eklenen_sayisi": eklenen,
+        "reddedilen_sayisi": sayac["red"],
+        "reddedilenler": reddedilenler
+    }
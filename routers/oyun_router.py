@@ -1,9 +1,13 @@
 # routers/oyun_router.py
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import desc
 import models, schemas
-from db import get_db
+from db import get_db, get_async_db, settings
+from services.liderlik import en_iyi_skoru_guncelle, liderleri_getir, sirayi_getir
+from services.skor_tamponu import skor_tamponu, skorlari_kaydet
+from services.hizli_json import HizliJSONResponse
 import datetime
 import traceback
 
@@ -24,6 +28,11 @@ def kayit_skor(skor_data: schemas.SkorCreate, db: Session = Depends(get_db)):
     if skor_data.skor < 0:
         raise HTTPException(status_code=400, detail="Skor negatif olamaz.")
 
+    # Tampon açıksa skor kuyruğa alınır; hasta kontrolü toplu yazma sırasında tek sorguyla yapılır
+    if settings.OYUN_SKOR_TAMPONU:
+        skor_tamponu.ekle(skor_data)
+        return {"detail": "Skor başarıyla kaydedildi!"}
+
     # Check وجود بیمار
     hasta = db.query(models.Hasta).filter(models.Hasta.hastaid == skor_data.hastaid).first()
     if not hasta:
@@ -38,6 +47,8 @@ def kayit_skor(skor_data: schemas.SkorCreate, db: Session = Depends(get_db)):
 
     try:
         db.add(yeni_skor)
+        # en yüksek skor tablosu (sadece yeni skor daha büyükse değişir)
+        en_iyi_skoru_guncelle(db, yeni_skor.hastaid, yeni_skor.oyunadi, yeni_skor.skor, yeni_skor.tarih)
         db.commit()
     except Exception as e:
         db.rollback()
@@ -49,33 +60,82 @@ def kayit_skor(skor_data: schemas.SkorCreate, db: Session = Depends(get_db)):
     return {"detail": "Skor başarıyla kaydedildi!"}
 
 
+# ------------------ 1.1) ثبت گروهی امتیازها ------------------
+@router.post("/skorlar", response_model=schemas.TopluSkorSonucu)
+def kayit_skorlar(skorlar: list[schemas.SkorCreate], db: Session = Depends(get_db)):
+    """
+    Birden fazla skoru tek istekte kaydeder.
+    Hastalar tek sorguyla doğrulanır, skorlar tek INSERT ile eklenir.
+    Geçersiz satırlar atlanır ve yanıtta listelenir.
+    """
+    if len(skorlar) > settings.OYUN_SKOR_TOPLU_LIMIT:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Tek istekte en fazla {settings.OYUN_SKOR_TOPLU_LIMIT} skor gönderilebilir."
+        )
+
+    try:
+        reddedilenler = skorlari_kaydet(db, skorlar)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print("\n--- DATABASE ERROR ---")
+        traceback.print_exc()
+        print("--- END ERROR ---\n")
+        raise HTTPException(status_code=500, detail=f"Skorlar kaydedilemedi: {e}")
+
+    return {
+        "kaydedilen_sayisi": len(skorlar) - len(reddedilenler),
+        "reddedilenler": reddedilenler
+    }
+
+
 # ------------------ 2) دریافت لیدربورد ------------------
 from sqlalchemy import func
 
-@router.get("/liderler/{oyun_adi}", response_model=list[schemas.SkorBase])
-def get_liderler(oyun_adi: str, db: Session = Depends(get_db)):
-    """
-    Bir oyun için HER KULLANICININ EN YÜKSEK skorunu getirir (Top 10).
-    """
+def _liderleri_getir(db: Session, oyun_adi: str):
 
     try:
-        liderler = (
-            db.query(
-                models.Hasta.adsoyad.label("adsoyad"),
-                func.max(models.OyunSkoru.skor).label("skor")
-            )
-            .join(
-                models.Hasta,
-                models.OyunSkoru.hastaid == models.Hasta.hastaid
-            )
-            .filter(models.OyunSkoru.oyunadi == oyun_adi)
-            .group_by(models.Hasta.adsoyad)
-            .order_by(func.max(models.OyunSkoru.skor).desc())
-            .limit(10)
-            .all()
-        )
+        # her hasta için tek satır (oyuneniyiskorlartablosu); aynı isimli hastalar birleşmez
+        liderler = liderleri_getir(db, oyun_adi, limit=10)
     except Exception:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail="Liderboard alınamadı.")
 
+    if settings.HIZLI_JSON:
+        # SkorBase alanları doğrudan satırdan (hastaid yanıtta yok)
+        return HizliJSONResponse([{"adsoyad": l.adsoyad, "skor": l.skor} for l in liderler])
+
     return liderler
+
+
+if settings.DB_ASYNC:
+    @router.get("/liderler/{oyun_adi}", response_model=list[schemas.SkorBase])
+    async def get_liderler(oyun_adi: str, db: AsyncSession = Depends(get_async_db)):
+        """
+        Bir oyun için HER KULLANICININ EN YÜKSEK skorunu getirir (Top 10).
+        """
+        return await db.run_sync(_liderleri_getir, oyun_adi)
+else:
+    @router.get("/liderler/{oyun_adi}", response_model=list[schemas.SkorBase])
+    def get_liderler(oyun_adi: str, db: Session = Depends(get_db)):
+        """
+        Bir oyun için HER KULLANICININ EN YÜKSEK skorunu getirir (Top 10).
+        """
+        return _liderleri_getir(db, oyun_adi)
+
+
+# ------------------ 3) رتبه بیمار ------------------
+@router.get("/sira/{oyun_adi}/{hasta_id}", response_model=schemas.SkorSirasi)
+def get_hasta_sirasi(oyun_adi: str, hasta_id: int, sayfa_boyutu: int = 10, db: Session = Depends(get_db)):
+    """
+    Hastanın oyundaki sırasını ve sırasının bulunduğu liderlik sayfasını getirir.
+    """
+    if sayfa_boyutu < 1 or sayfa_boyutu > 100:
+        raise HTTPException(status_code=400, detail="Sayfa boyutu 1 ile 100 arasında olmalıdır.")
+
+    sonuc = sirayi_getir(db, oyun_adi, hasta_id, sayfa_boyutu)
+    if not sonuc:
+        raise HTTPException(status_code=404, detail="Bu hastanın bu oyunda skoru yok.")
+
+    return sonuc
@@ -1,75 +1,96 @@
 # routers/sehirler_router.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from typing import List
-import models, schemas
-from db import get_db
+import schemas
+from db import get_db, settings
+from services.konum_onbellegi import konum_onbellegi
 
 
 router = APIRouter(
-    prefix="/api/konum", 
-    tags=["Konum İşlemleri"] 
+    prefix="/api/konum",
+    tags=["Konum İşlemleri"]
 )
 
 
+def _onbellekli_yanit(request: Request, govde: bytes, surum: str) -> Response:
+    """
+    Önceden üretilmiş JSON gövdesini ETag ve Cache-Control başlıklarıyla döndürür.
+    İstemcinin If-None-Match başlığı güncel ETag ile eşleşiyorsa 304 döner.
+    """
+    etag = f'"{surum}"'
+    basliklar = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.KONUM_CACHE_MAX_AGE}, must-revalidate",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        etiketler = [e.strip().removeprefix("W/") for e in if_none_match.split(",")]
+        if "*" in etiketler or etag in etiketler:
+            return Response(status_code=304, headers=basliklar)
+
+    return Response(content=govde, media_type="application/json", headers=basliklar)
+
+
 @router.get("/sehirler", response_model=List[schemas.SehirBase])
-def get_sehirler(db: Session = Depends(get_db)):
+def get_sehirler(request: Request, db: Session = Depends(get_db)):
 
-    sehirler = db.query(models.Sehir).order_by(models.Sehir.sehiradi).all()
-    return sehirler
+    goruntu = konum_onbellegi.getir(db)
+    return _onbellekli_yanit(request, goruntu.sehirler, goruntu.surum)
 
 # آدرس نهایی: GET /api/konum/hastaneler/{sehir_kodu}
 @router.get("/hastaneler/{sehir_kodu}", response_model=List[schemas.HastaneBase])
-def get_hastaneler_by_sehir(sehir_kodu: str, db: Session = Depends(get_db)):
-  
-    sehir = db.query(models.Sehir).filter(models.Sehir.sehirkodu == sehir_kodu).first()
-    if not sehir:
+def get_hastaneler_by_sehir(sehir_kodu: str, request: Request, db: Session = Depends(get_db)):
+
+    goruntu = konum_onbellegi.getir(db)
+    govde = goruntu.hastaneler.get(sehir_kodu)
+    if govde is None:
         raise HTTPException(status_code=404, detail="شهر مورد نظر یافت نشد.")
 
-    hastaneler = db.query(models.Hastane).filter(models.Hastane.sehirid == sehir.sehirid).all()
-    return hastaneler
+    return _onbellekli_yanit(request, govde, goruntu.surum)
 
 @router.get("/konum/{sehir_kodu}/{hastane_kodu}/poliklinikler", response_model=List[schemas.PoliklinikBase])
-def get_poliklinikler_by_hastane(sehir_kodu: str, hastane_kodu: str, db: Session = Depends(get_db)):
+def get_poliklinikler_by_hastane(sehir_kodu: str, hastane_kodu: str, request: Request, db: Session = Depends(get_db)):
     """
     Verilen şehir ve hastane koduna ait tüm poliklinikleri getirir.
     (تمام پلی‌کلینیک‌های متعلق به کد شهر و کد بیمارستان داده شده را برمی‌گرداند.)
     """
 
-    # ۱. ابتدا بیمارستان را بر اساس هر دو کد پیدا کن تا مطمئن شویم معتبر است
-    hastane = db.query(models.Hastane).join(models.Sehir).filter(
-        models.Sehir.sehirkodu == sehir_kodu,
-        models.Hastane.hastanekodu == hastane_kodu
-    ).first()
+    # ۱. بیمارستان را بر اساس هر دو کد در حافظه پیدا کن
+    goruntu = konum_onbellegi.getir(db)
+    govde = goruntu.poliklinikler.get((sehir_kodu, hastane_kodu))
 
-    if not hastane:
+    if govde is None:
         raise HTTPException(status_code=404, detail="Bu şehirde böyle bir hastane bulunamadı.")
 
-    # ۲. حالا پلی‌کلینیک‌ها را بر اساس hastaneid پیدا شده فیلتر کن
-    poliklinikler = db.query(models.Poliklinik).filter(
-        models.Poliklinik.hastaneid == hastane.hastaneid
-    ).order_by(models.Poliklinik.poliklinikadi).all()
-
-    return poliklinikler
+    # ۲. پلی‌کلینیک‌های آن بیمارستان (مرتب شده بر اساس نام)
+    return _onbellekli_yanit(request, govde, goruntu.surum)
 
 @router.get("/konum/doktorlar/{poliklinik_kodu}", response_model=List[schemas.DoktorBase])
-def get_doktorlar_by_poliklinik(poliklinik_kodu: str, db: Session = Depends(get_db)):
+def get_doktorlar_by_poliklinik(poliklinik_kodu: str, request: Request, db: Session = Depends(get_db)):
     """
     Verilen poliklinik koduna ('01' gibi) ait tüm doktorları getirir.
     (تمام پزشکان متعلق به کد پلی‌کلینیک داده شده (مثلاً '01') را برمی‌گرداند.)
     """
 
-    # ۱. ابتدا پلی‌کلینیک را بر اساس کد آن پیدا کن
-    poliklinik = db.query(models.Poliklinik).filter(
-        models.Poliklinik.poliklinikkodu == poliklinik_kodu
-    ).first()
+    # ۱. پلی‌کلینیک را بر اساس کد آن در حافظه پیدا کن
+    goruntu = konum_onbellegi.getir(db)
+    govde = goruntu.doktorlar.get(poliklinik_kodu)
 
-    if not poliklinik:
+    if govde is None:
         raise HTTPException(status_code=404, detail="Poliklinik bulunamadı.")
 
-    # ۲. حالا پزشکان را بر اساس poliklinikid پیدا شده فیلتر کن
-    doktorlar = db.query(models.Doktor).filter(
-        models.Doktor.poliklinikid == poliklinik.poliklinikid
-    ).order_by(models.Doktor.adsoyad).all()
+    # ۲. پزشکان آن پلی‌کلینیک (مرتب شده بر اساس نام)
+    return _onbellekli_yanit(request, govde, goruntu.surum)
+
+# آدرس: GET /api/konum/agac
+@router.get("/agac", response_model=List[schemas.SehirAgac])
+def get_konum_agaci(request: Request, db: Session = Depends(get_db)):
+    """
+    Şehir -> Hastane -> Poliklinik -> Doktor ağacının tamamını tek yanıtta getirir.
+    (کل درخت شهر/بیمارستان/پلی‌کلینیک/پزشک را در یک پاسخ برمی‌گرداند.)
+    """
 
-    return doktorlar
\ No newline at end of file
+    goruntu = konum_onbellegi.getir(db)
+    return _onbellekli_yanit(request, goruntu.agac, goruntu.surum)
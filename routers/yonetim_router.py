@@ -1,53 +1,99 @@
 # routers/yonetim_router.py
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import text # برای اجرای دستورات SQL خام
-from db import get_db
+from fastapi import APIRouter, BackgroundTasks, HTTPException
+from db import settings, SessionLocal
+from services.arsivleme import gun_sonu_arsivleyici
+from services.arsiv_bolumleri import gelecek_bolumleri_olustur, eski_bolumleri_temizle
+from services.sira_yayini import sira_yayini
 
 router = APIRouter(
     prefix="/api/yonetim",
     tags=["Yönetim (Admin) İşlemleri"]
 )
 
+
+def _gun_sonu_calistir(parca_boyutu: int) -> dict:
+    # Arşivin yazılacağı ay bölümlerinin var olduğundan emin ol
+    db = SessionLocal()
+    try:
+        gelecek_bolumleri_olustur(db)
+    finally:
+        db.close()
+
+    sonuc = gun_sonu_arsivleyici.calistir(parca_boyutu)
+    sira_yayini.tumu_degisti()
+    return sonuc
+
+
 # --- API: پایان روز (Gün Sonu) ---
 @router.post("/gun-sonu")
-def gun_sonu_islemi(db: Session = Depends(get_db)):
+def gun_sonu_islemi(background_tasks: BackgroundTasks, parca_boyutu: int = None, arka_planda: bool = False):
     """
     **DİKKAT:** Bu işlem 'Gün Sonu' temizliğidir.
-    1. Aktif biletleri Arşiv tablosuna taşır.
-    2. İlgili formları siler.
-    3. Aktif biletler tablosunu tamamen boşaltır.
-    Bu işlemden sonra sayaçlar sıfırlanır ve yarın için temiz bir başlangıç yapılır.
+    1. Aktif biletleri parça parça Arşiv tablosuna taşır (DELETE ... RETURNING).
+    2. İlgili formları aynı ifade içinde siler.
+    3. İşlem başladıktan sonra oluşturulan biletlere dokunmaz; bilet alma devam eder.
+    Bir hata olursa tekrar çalıştırmak kalan biletlerden devam eder.
+    arka_planda=true ise hemen döner; ilerleme GET /api/yonetim/gun-sonu/durum ile izlenir.
     """
-    try:
-        # 1. کپی کردن بلیت‌ها به آرشیو
-        # (دقیقا همان منطق SQL که قبلاً تست کردیم)
-        sql_archive = text("""
-            INSERT INTO sirabiletleri_arsiv 
-            (biletid, baglantikodu, hastaid, doktorid, poliklinikid, siranumarasi, durum, olusturmatarihi, eskibiletid, tahminibeklemesuresi, kapanistarihi)
-            SELECT 
-                biletid, baglantikodu, hastaid, doktorid, poliklinikid, siranumarasi, durum, olusturmatarihi, eskibiletid, tahminibeklemesuresi, NOW()
-            FROM sirabiletleri_aktiftablosu;
-        """)
-        db.execute(sql_archive)
-
-        # 2. حذف فرم‌های وابسته (برای جلوگیری از خطای کلید خارجی)
-        sql_delete_forms = text("""
-            DELETE FROM sorucevapformlaritablosu
-            WHERE biletid IN (SELECT biletid FROM sirabiletleri_aktiftablosu);
-        """)
-        db.execute(sql_delete_forms)
-
-        # 3. خالی کردن جدول بلیت‌های فعال
-        sql_truncate = text("DELETE FROM sirabiletleri_aktiftablosu;")
-        db.execute(sql_truncate)
-
-        # ذخیره نهایی تغییرات
-        db.commit()
-        
-        return {"detail": "Gün sonu işlemi başarıyla tamamlandı. Sistem yarına hazır."}
+    parca_boyutu = parca_boyutu or settings.GUN_SONU_PARCA_BOYUTU
+    if parca_boyutu < 1:
+        raise HTTPException(status_code=400, detail="Parça boyutu en az 1 olmalıdır.")
+    if gun_sonu_arsivleyici.durum.get("calisiyor"):
+        raise HTTPException(status_code=409, detail="Gün sonu işlemi zaten çalışıyor.")
+
+    if arka_planda:
+        background_tasks.add_task(_gun_sonu_calistir, parca_boyutu)
+        return {"detail": "Gün sonu işlemi başlatıldı."}
 
+    try:
+        sonuc = _gun_sonu_calistir(parca_boyutu)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
-        db.rollback() # اگر خطایی رخ داد، همه چیز را به حالت قبل برگردان
         print(f"Gün sonu hatası: {e}")
-        raise HTTPException(status_code=500, detail=f"İşlem sırasında hata oluştu: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"İşlem sırasında hata oluştu: {str(e)}")
+
+    if sonuc["tamamlandi"]:
+        detay = "Gün sonu işlemi başarıyla tamamlandı. Sistem yarına hazır."
+    else:
+        detay = (f"Gün sonu işlemi tamamlanamadı: {sonuc['kalan_bilet']} bilet kilitli olduğu için taşınamadı. "
+                 "İşlemi tekrar çalıştırın.")
+    return {
+        "detail": detay,
+        "tamamlandi": sonuc["tamamlandi"],
+        "tasinan_bilet": sonuc["tasinan_bilet"],
+        "kalan_bilet": sonuc["kalan_bilet"],
+        "silinen_form": sonuc["silinen_form"],
+        "silinen_sayac": sonuc["silinen_sayac"],
+        "parca_sayisi": sonuc["parca_sayisi"],
+    }
+
+
+# --- API: ilerleme durumu ---
+@router.get("/gun-sonu/durum")
+def gun_sonu_durumu():
+    """Son (veya devam eden) gün sonu işleminin ilerlemesini getirir."""
+    return gun_sonu_arsivleyici.durum
+
+
+# --- API: arşiv bakımı (bölüm oluşturma + saklama süresi) ---
+@router.post("/arsiv/bakim")
+def arsiv_bakimi(saklama_ay: int = None, mod: str = None):
+    """
+    1. Bu ay ve sonraki ARSIV_ONCEDEN_AY ay için eksik arşiv bölümlerini oluşturur.
+    2. Saklama süresinden eski bölümleri ayırır (detach) veya siler (drop).
+    """
+    db = SessionLocal()
+    try:
+        olusturulan = gelecek_bolumleri_olustur(db)
+        temizlenen = eski_bolumleri_temizle(db, saklama_ay, mod)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        db.rollback()
+        print(f"Arşiv bakım hatası: {e}")
+        raise HTTPException(status_code=500, detail=f"İşlem sırasında hata oluştu: {str(e)}")
+    finally:
+        db.close()
+
+    return {"olusturulan_bolumler": olusturulan, "temizlenen_bolumler": temizlenen}
@@ -20,6 +20,10 @@ class HastaCreate(BaseModel):
     telefon: Optional[str] = None
     dogumtarihi: Optional[date] = None
 
+class HastaGiris(BaseModel):
+    tckimlik: str
+    sifre: str
+
 class HastaBase(BaseModel):
     hastaid: int
     adsoyad: str
@@ -102,6 +106,7 @@ class SiraTakipDetay(BaseModel):
     durum: str
     giris_zamani: datetime
     tahmini_bekleme_suresi: str
+    tahmini_bekleme_dakika: Optional[int] = None   # güncel tahmin (dakika); beklemiyorsa 0
     bolum_adi: str
     doktor_adi: str
     mevcut_sira: int
@@ -190,4 +195,66 @@ class DoktorCreate(BaseModel):
 # =================================================================
 class FormIstatistik(BaseModel):
     toplam_form_sayisi: int   # تعداد کل
-    bugunku_form_sayisi: int  # تعداد امروز    
\ No newline at end of file
+    bugunku_form_sayisi: int  # تعداد امروز    
+
+class FormGunlukIstatistik(BaseModel):
+    gun: date
+    gonderilen: int           # فرم‌های ارسال شده در آن روز
+    silinen: int              # فرم‌های همان روز که بعداً حذف شدند (تاخیر / پایان روز)
+
+# =================================================================
+# ۱۳. مدل‌های درخت موقعیت (Konum Ağacı)
+# =================================================================
+class PoliklinikAgac(PoliklinikBase):
+    doktorlar: list[DoktorBase] = []
+
+class HastaneAgac(HastaneBase):
+    poliklinikler: list[PoliklinikAgac] = []
+
+class SehirAgac(SehirBase):
+    hastaneler: list[HastaneAgac] = []
+
+# =================================================================
+# ۱۴. مدل‌های رتبه‌بندی بازی (Oyun Sıralaması)
+# =================================================================
+class LiderSatiri(BaseModel):
+    hastaid: int
+    adsoyad: str
+    skor: int
+
+    class Config:
+        from_attributes = True
+
+class SkorSirasi(BaseModel):
+    hastaid: int
+    oyunadi: str
+    skor: int
+    sira: int               # رتبه بیمار (امتیازهای برابر رتبه یکسان دارند)
+    sayfa: int              # صفحه‌ای از لیدربورد که بیمار در آن است (از ۰)
+    sayfa_boyutu: int
+    liderler: list[LiderSatiri]
+
+# =================================================================
+# ۱۵. مدل‌های ثبت گروهی امتیاز (Toplu Skor)
+# =================================================================
+class SkorRed(BaseModel):
+    sira: int        # ترتیب آیتم در لیست ارسالی (از ۰)
+    hastaid: int
+    neden: str
+
+class TopluSkorSonucu(BaseModel):
+    kaydedilen_sayisi: int
+    reddedilenler: list[SkorRed]
+
+# =================================================================
+# ۱۶. مدل‌های ورود گروهی بیماران (Toplu Hasta Aktarımı)
+# =================================================================
+class HastaRed(BaseModel):
+    satir: int                      # شماره سطر در فایل (از ۱)
+    tckimlik: Optional[str] = None
+    neden: str
+
+class HastaAktarimSonucu(BaseModel):
+    eklenen_sayisi: int
+    reddedilen_sayisi: int
+    reddedilenler: list[HastaRed]   # حداکثر ۱۰۰۰ مورد اول
@@ -0,0 +1,213 @@
+# services/arsiv_bolumleri.py
+import datetime
+import re
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+import models
+from db import settings
+
+ARSIV_TABLOSU = models.BiletArsiv.__tablename__
+# Aralığa uymayan satırlar için yedek bölüm (insert hiçbir zaman başarısız olmasın)
+VARSAYILAN_BOLUM = f"{ARSIV_TABLOSU}_varsayilan"
+_BOLUM_ADI = re.compile(rf"^{ARSIV_TABLOSU}_(\d{{4}})_(\d{{2}})$")
+
+
+def _ay_basi(tarih: datetime.date) -> datetime.date:
+    return tarih.replace(day=1)
+
+
+def _ay_ekle(ay: datetime.date, sayi: int) -> datetime.date:
+    yil, ay_no = divmod(ay.month - 1 + sayi, 12)
+    return datetime.date(ay.year + yil, ay_no + 1, 1)
+
+
+def bolum_adi(ay: datetime.date) -> str:
+    return f"{ARSIV_TABLOSU}_{ay.year:04d}_{ay.month:02d}"
+
+
+def _bolum_adlari(db: Session) -> list[str]:
+    return db.execute(text("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = CAST(:tablo AS regclass)
+    """), {"tablo": ARSIV_TABLOSU}).scalars().all()
+
+
+def bolumlu_mu(db: Session) -> bool:
+    """Arşiv tablosu bölümlü (partitioned) mi? Eski kurulumlarda 'arsiv-bolumle' çalıştırılana kadar değildir."""
+    return db.execute(text("""
+        SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:tablo))
+    """), {"tablo": ARSIV_TABLOSU}).scalar()
+
+
+def _kolonlar(db: Session, tablo: str) -> list[str]:
+    return db.execute(text("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = :tablo
+        ORDER BY ordinal_position
+    """), {"tablo": tablo}).scalars().all()
+
+
+def bolumleri_listele(db: Session) -> dict[str, datetime.date]:
+    """Aylık bölümlerin adlarını ve ay başlangıçlarını döndürür (varsayılan bölüm hariç)."""
+    bolumler = {}
+    for ad in _bolum_adlari(db):
+        eslesme = _BOLUM_ADI.match(ad)
+        if eslesme:
+            bolumler[ad] = datetime.date(int(eslesme.group(1)), int(eslesme.group(2)), 1)
+    return bolumler
+
+
+def ay_bolumu_olustur(db: Session, ay: datetime.date) -> int:
+    """
+    Ayın bölümünü oluşturur. Varsayılan bölümde bu aya düşen satırlar varsa
+    (bölüm yokken arşivlenmiş) PostgreSQL bölümü oluşturmaz; bu satırlar aynı
+    işlem içinde geçici tabloya alınıp yeni bölüme taşınır. Taşınan satır sayısını döndürür.
+    """
+    ay = _ay_basi(ay)
+    baslangic, bitis = ay.isoformat(), _ay_ekle(ay, 1).isoformat()
+    aralik = {"baslangic": baslangic, "bitis": bitis}
+
+    tasinacak = 0
+    if VARSAYILAN_BOLUM in _bolum_adlari(db):
+        tasinacak = db.execute(text(
+            f'SELECT COUNT(*) FROM "{VARSAYILAN_BOLUM}" '
+            f"WHERE kapanistarihi >= CAST(:baslangic AS timestamp) AND kapanistarihi < CAST(:bitis AS timestamp)"
+        ), aralik).scalar()
+
+    gecici = f"_tasinan_{bolum_adi(ay)}"
+    kolonlar = ", ".join(f'"{k}"' for k in _kolonlar(db, ARSIV_TABLOSU))
+    if tasinacak:
+        db.execute(text(f'CREATE TEMP TABLE "{gecici}" (LIKE "{ARSIV_TABLOSU}") ON COMMIT DROP'))
+        db.execute(text(f"""
+            WITH tasinan AS (
+                DELETE FROM "{VARSAYILAN_BOLUM}"
+                WHERE kapanistarihi >= CAST(:baslangic AS timestamp) AND kapanistarihi < CAST(:bitis AS timestamp)
+                RETURNING {kolonlar}
+            )
+            INSERT INTO "{gecici}" ({kolonlar}) SELECT {kolonlar} FROM tasinan
+        """), aralik)
+
+    db.execute(text(
+        f'CREATE TABLE IF NOT EXISTS "{bolum_adi(ay)}" PARTITION OF "{ARSIV_TABLOSU}" '
+        f"FOR VALUES FROM ('{baslangic}') TO ('{bitis}')"
+    ))
+
+    if tasinacak:
+        db.execute(text(f'INSERT INTO "{ARSIV_TABLOSU}" ({kolonlar}) SELECT {kolonlar} FROM "{gecici}"'))
+        db.execute(text(f'DROP TABLE "{gecici}"'))
+    return tasinacak
+
+
+def gelecek_bolumleri_olustur(db: Session, ay_sayisi: Optional[int] = None) -> list[str]:
+    """
+    İçinde bulunulan ay ve sonraki 'ay_sayisi' ay için eksik bölümleri oluşturur.
+    Var olan bölümlere dokunmaz; günlük çalıştırılması güvenlidir.
+    Arşiv henüz bölümlü değilse (eski kurulum) hiçbir şey yapmaz; gün sonu
+    bölümsüz tabloya yazmaya devam eder, geçiş 'python cli.py arsiv-bolumle' ile yapılır.
+    """
+    ay_sayisi = settings.ARSIV_ONCEDEN_AY if ay_sayisi is None else ay_sayisi
+    if not bolumlu_mu(db):
+        print(f"Uyarı: '{ARSIV_TABLOSU}' bölümlü değil, bölüm oluşturma atlandı. "
+              "Geçiş için: python cli.py arsiv-bolumle")
+        return []
+    mevcut = set(_bolum_adlari(db))
+    bu_ay = _ay_basi(datetime.date.today())
+
+    olusturulan = []
+    for i in range(ay_sayisi + 1):
+        ay = _ay_ekle(bu_ay, i)
+        if bolum_adi(ay) not in mevcut:
+            ay_bolumu_olustur(db, ay)
+            olusturulan.append(bolum_adi(ay))
+
+    if VARSAYILAN_BOLUM not in mevcut:
+        db.execute(text(f'CREATE TABLE IF NOT EXISTS "{VARSAYILAN_BOLUM}" PARTITION OF "{ARSIV_TABLOSU}" DEFAULT'))
+        olusturulan.append(VARSAYILAN_BOLUM)
+
+    db.commit()
+    return olusturulan
+
+
+def eski_bolumleri_temizle(db: Session, saklama_ay: Optional[int] = None, mod: Optional[str] = None) -> list[str]:
+    """
+    Saklama süresinden (ay) eski bölümleri ayırır (detach) veya siler (drop).
+    Satır satır DELETE yerine bölüm bazında çalıştığı için maliyeti sabittir.
+    'detach' modunda ayrılan tablolar yedeklenip sonra elle silinebilir.
+    """
+    saklama_ay = settings.ARSIV_SAKLAMA_AY if saklama_ay is None else saklama_ay
+    mod = mod or settings.ARSIV_TEMIZLEME_MODU
+    if mod not in ("detach", "drop"):
+        raise ValueError(f"Geçersiz temizleme modu: {mod}")
+
+    # Bitişi bu tarihten önce olan bölümler saklama süresinin dışındadır
+    sinir = _ay_ekle(_ay_basi(datetime.date.today()), -saklama_ay)
+
+    temizlenen = []
+    for ad, ay in sorted(bolumleri_listele(db).items(), key=lambda x: x[1]):
+        if _ay_ekle(ay, 1) > sinir:
+            continue
+        db.execute(text(f'ALTER TABLE "{ARSIV_TABLOSU}" DETACH PARTITION "{ad}"'))
+        if mod == "drop":
+            db.execute(text(f'DROP TABLE "{ad}"'))
+        temizlenen.append(ad)
+
+    db.commit()
+    return temizlenen
+
+
+def tabloyu_bolumle(db: Session) -> int:
+    """
+    Bölümsüz eski arşiv tablosunu bölümlü yapıya taşır (tek seferlik geçiş).
+    Eski satırlar kapanistarihi'ne göre ilgili aylık bölümlere kopyalanır.
+    Tek işlem (transaction) içinde çalışır; hata olursa hiçbir şey değişmez.
+    """
+    if bolumlu_mu(db):
+        return 0
+
+    eski = f"{ARSIV_TABLOSU}_eski"
+    # Aktif tablodaki eskibiletid FK'si bölümlü tabloya bağlanamaz
+    db.execute(text(
+        "ALTER TABLE sirabiletleri_aktiftablosu DROP CONSTRAINT IF EXISTS sirabiletleri_aktiftablosu_eskibiletid_fkey"
+    ))
+    db.execute(text(f'ALTER TABLE "{ARSIV_TABLOSU}" RENAME TO "{eski}"'))
+    db.execute(text(f'ALTER TABLE "{eski}" RENAME CONSTRAINT "{ARSIV_TABLOSU}_pkey" TO "{eski}_pkey"'))
+    db.execute(text(f'ALTER INDEX IF EXISTS "ix_{ARSIV_TABLOSU}_biletid" RENAME TO "ix_{eski}_biletid"'))
+
+    models.BiletArsiv.__table__.create(bind=db.connection())
+
+    # Eski verinin kapsadığı tüm aylar için bölüm oluştur
+    en_eski = db.execute(text(
+        f'SELECT MIN(COALESCE(kapanistarihi, olusturmatarihi, NOW())) FROM "{eski}"'
+    )).scalar()
+    bu_ay = _ay_basi(datetime.date.today())
+    ay = _ay_basi(en_eski.date()) if en_eski else bu_ay
+    while ay <= _ay_ekle(bu_ay, settings.ARSIV_ONCEDEN_AY):
+        ay_bolumu_olustur(db, ay)
+        ay = _ay_ekle(ay, 1)
+    db.execute(text(f'CREATE TABLE IF NOT EXISTS "{VARSAYILAN_BOLUM}" PARTITION OF "{ARSIV_TABLOSU}" DEFAULT'))
+
+    # Kolonlar modelden: eski tabloda da olan her kolon kopyalanır (sonradan eklenen
+    # cagrilmatarihi / tamamlanmatarihi gibi kolonlar dahil)
+    eski_kolonlar = set(_kolonlar(db, eski))
+    hedef, kaynak = [], []
+    for kolon in models.BiletArsiv.__table__.columns:
+        if kolon.name == "kapanistarihi":
+            hedef.append('"kapanistarihi"')
+            kaynak.append("COALESCE(kapanistarihi, olusturmatarihi, NOW())" if "kapanistarihi" in eski_kolonlar
+                          else "COALESCE(olusturmatarihi, NOW())")
+        elif kolon.name in eski_kolonlar:
+            hedef.append(f'"{kolon.name}"')
+            kaynak.append(f'"{kolon.name}"')
+
+    kopyalanan = db.execute(text(
+        f'INSERT INTO "{ARSIV_TABLOSU}" ({", ".join(hedef)}) SELECT {", ".join(kaynak)} FROM "{eski}"'
+    )).rowcount
+
+    db.execute(text(f'DROP TABLE "{eski}"'))
+    db.commit()
+    return kopyalanan
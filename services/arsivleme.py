@@ -0,0 +1,165 @@
+# services/arsivleme.py
+import datetime
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import text
+
+from db import SessionLocal, settings
+from services.form_sayaclari import silinen_form_cte
+
+# Tek bir parça: kilitlenebilen ilk N bileti seç, formlarını sil (form sayacı ve
+# günlük özet aynı ifadede düşülür), biletleri aktif tablodan silip
+# (DELETE ... RETURNING) aynı ifade içinde arşive ekle.
+# SKIP LOCKED sayesinde o an güncellenen biletler beklenmez, sonraki parçada alınır.
+_PARCA_SQL = text("""
+    WITH secilen AS (
+        SELECT biletid
+        FROM sirabiletleri_aktiftablosu
+        WHERE olusturmatarihi < :sinir OR olusturmatarihi IS NULL
+        ORDER BY biletid
+        LIMIT :parca_boyutu
+        FOR UPDATE SKIP LOCKED
+    ),
+    silinen_formlar AS (
+        DELETE FROM sorucevapformlaritablosu f
+        USING secilen s
+        WHERE f.biletid = s.biletid
+        RETURNING f.formid, f.gonderimtarihi
+    ),""" + silinen_form_cte("silinen_formlar") + """,
+    tasinan AS (
+        DELETE FROM sirabiletleri_aktiftablosu a
+        USING secilen s
+        WHERE a.biletid = s.biletid
+        RETURNING a.biletid, a.baglantikodu, a.hastaid, a.doktorid, a.poliklinikid,
+                  a.siranumarasi, a.durum, a.olusturmatarihi, a.eskibiletid, a.tahminibeklemesuresi,
+                  a.cagrilmatarihi, a.tamamlanmatarihi
+    ),
+    arsivlenen AS (
+        INSERT INTO sirabiletleri_arsiv
+        (biletid, baglantikodu, hastaid, doktorid, poliklinikid, siranumarasi, durum, olusturmatarihi, eskibiletid, tahminibeklemesuresi,
+         cagrilmatarihi, tamamlanmatarihi, kapanistarihi)
+        SELECT
+            biletid, baglantikodu, hastaid, doktorid, poliklinikid, siranumarasi, durum, olusturmatarihi, eskibiletid, tahminibeklemesuresi,
+            cagrilmatarihi, tamamlanmatarihi, NOW()
+        FROM tasinan
+        RETURNING biletid
+    )
+    SELECT
+        (SELECT count(*) FROM arsivlenen) AS bilet_sayisi,
+        (SELECT count(*) FROM silinen_formlar) AS form_sayisi
+""")
+
+
+# Sınırdan önce oluşturulmuş, hâlâ aktif tabloda olan biletler (kilitli olanlar dahil)
+_KALAN_SQL = text("""
+    SELECT count(*)
+    FROM sirabiletleri_aktiftablosu
+    WHERE olusturmatarihi < :sinir OR olusturmatarihi IS NULL
+""")
+
+
+# Geçmiş günlerin sıra sayaçları (services/sira_numaratoru.py) artık kullanılmaz;
+# her gün poliklinik ve bant başına yeni satır açıldığı için tablo büyümesin
+_ESKI_SAYACLAR_SQL = text("""
+    DELETE FROM sirasayaclaritablosu WHERE gun < :gun
+""")
+
+
+class GunSonuArsivleyici:
+    """
+    Aktif biletleri parça parça arşive taşır. Her parça ayrı bir işlemde
+    (transaction) commit edilir; tablo bütünüyle kilitlenmez ve yeni gün için
+    bilet oluşturma devam eder. Bir hata olursa taşınmış parçalar kalıcıdır;
+    işlem tekrar çalıştırıldığında kalan biletlerden devam eder.
+
+    SKIP LOCKED ile hiç satır taşınamayan bir parça, işin bittiği anlamına
+    gelmez (kalan biletler o an kilitli olabilir). Bu durumda kalan biletler
+    sayılır; varsa kısa beklemelerle GUN_SONU_KILITLI_TEKRAR kez yeniden denenir,
+    hâlâ kalan varsa sonuç 'tamamlandi': False ve 'kalan_bilet' ile döner.
+    Son olarak sınır gününden önceki sıra sayacı satırları silinir.
+    """
+
+    def __init__(self):
+        self._kilit = threading.Lock()
+        self.durum = {"calisiyor": False}
+
+    def calistir(self, parca_boyutu: int, sinir: Optional[datetime.datetime] = None) -> dict:
+        # Aynı anda tek çalıştırma
+        if not self._kilit.acquire(blocking=False):
+            raise RuntimeError("Gün sonu işlemi zaten çalışıyor.")
+
+        # Başlangıç anından sonra oluşturulan biletler (ertesi günün biletleri) taşınmaz
+        sinir = sinir or datetime.datetime.now()
+        self.durum = {
+            "calisiyor": True,
+            "baslangic": datetime.datetime.now().isoformat(),
+            "sinir": sinir.isoformat(),
+            "parca_boyutu": parca_boyutu,
+            "parca_sayisi": 0,
+            "tasinan_bilet": 0,
+            "silinen_form": 0,
+            "kalan_bilet": 0,
+            "silinen_sayac": 0,
+            "tamamlandi": False,
+            "hata": None,
+        }
+        try:
+            tekrar = 0
+            while True:
+                db = SessionLocal()
+                try:
+                    sonuc = db.execute(_PARCA_SQL, {"sinir": sinir, "parca_boyutu": parca_boyutu}).one()
+                    db.commit()
+                except Exception:
+                    db.rollback()
+                    raise
+                finally:
+                    db.close()
+
+                if sonuc.bilet_sayisi == 0:
+                    kalan = self._kalan(sinir)
+                    self.durum["kalan_bilet"] = kalan
+                    if kalan == 0 or tekrar >= settings.GUN_SONU_KILITLI_TEKRAR:
+                        break
+                    # Kalan biletler başka işlemlerce kilitli: kilit bırakılınca tekrar dene
+                    tekrar += 1
+                    time.sleep(settings.GUN_SONU_KILITLI_BEKLEME_MS / 1000)
+                    continue
+                tekrar = 0
+                self.durum["parca_sayisi"] += 1
+                self.durum["tasinan_bilet"] += sonuc.bilet_sayisi
+                self.durum["silinen_form"] += sonuc.form_sayisi
+            self.durum["tamamlandi"] = self.durum["kalan_bilet"] == 0
+            self.durum["silinen_sayac"] = self._eski_sayaclari_sil(sinir.date())
+        except Exception as e:
+            self.durum["hata"] = str(e)
+            raise
+        finally:
+            self.durum["calisiyor"] = False
+            self.durum["bitis"] = datetime.datetime.now().isoformat()
+            self._kilit.release()
+
+        return dict(self.durum)
+
+    @staticmethod
+    def _eski_sayaclari_sil(gun: datetime.date) -> int:
+        db = SessionLocal()
+        try:
+            silinen = db.execute(_ESKI_SAYACLAR_SQL, {"gun": gun}).rowcount
+            db.commit()
+            return silinen
+        finally:
+            db.close()
+
+    @staticmethod
+    def _kalan(sinir: datetime.datetime) -> int:
+        db = SessionLocal()
+        try:
+            return db.execute(_KALAN_SQL, {"sinir": sinir}).scalar()
+        finally:
+            db.close()
+
+
+gun_sonu_arsivleyici = GunSonuArsivleyici()
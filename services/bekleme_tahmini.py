@@ -0,0 +1,357 @@
+# services/bekleme_tahmini.py
+import bisect
+import datetime
+import threading
+from typing import Optional
+
+from sqlalchemy import and_, func, text
+from sqlalchemy.orm import Session
+
+import models
+from db import settings
+from services.tarih import gun_araligi
+
+# (ortalama dakika, gözlem sayısı)
+Ortalama = tuple[float, int]
+
+# Isınma: son N günün arşivi + bugün tamamlanmış aktif biletler, zaman sırasıyla
+_ISINMA_SQL = text("""
+    SELECT doktorid, cagrilmatarihi, tamamlanmatarihi
+    FROM sirabiletleri_arsiv
+    WHERE kapanistarihi >= :baslangic
+      AND doktorid IS NOT NULL AND cagrilmatarihi IS NOT NULL AND tamamlanmatarihi IS NOT NULL
+    UNION ALL
+    SELECT doktorid, cagrilmatarihi, tamamlanmatarihi
+    FROM sirabiletleri_aktiftablosu
+    WHERE doktorid IS NOT NULL AND cagrilmatarihi IS NOT NULL AND tamamlanmatarihi IS NOT NULL
+    ORDER BY tamamlanmatarihi
+""")
+
+
+class _SiraSayaci:
+    """Fenwick ağacı: sıra numarası bazında 'şu numaradan küçük kaç bilet var' (O(log n))."""
+
+    def __init__(self, boyut: int):
+        self._agac = [0] * (boyut + 1)
+
+    def ekle(self, konum: int, deger: int) -> None:
+        konum += 1
+        while konum < len(self._agac):
+            self._agac[konum] += deger
+            konum += konum & -konum
+
+    def oncekiler(self, konum: int) -> int:
+        """konum'dan (hariç) önceki toplam."""
+        toplam = 0
+        while konum > 0:
+            toplam += self._agac[konum]
+            konum -= konum & -konum
+        return toplam
+
+
+def _guncelle(tablo: dict, anahtar, dakika: float, alfa: float) -> None:
+    eski = tablo.get(anahtar)
+    if eski is None:
+        tablo[anahtar] = (dakika, 1)
+        return
+    ortalama, sayi = eski
+    sayi += 1
+    # İlk gözlemlerde ağırlık 1/n (basit ortalama), sonra sabit alfa
+    agirlik = max(alfa, 1 / sayi)
+    tablo[anahtar] = (ortalama + agirlik * (dakika - ortalama), sayi)
+
+
+class BeklemeTahmincisi:
+    """
+    Muayene süresini doktor ve günün saati bazında üstel ağırlıklı hareketli
+    ortalama (EWMA) ile öğrenir.
+    - Gözlem: bir biletin çağrılma -> tamamlanma süresi (dakika).
+    - Her tamamlanan muayene ortalamaları O(1) günceller.
+    - (doktor, saat) için yeterli gözlem yoksa doktorun genel ortalaması,
+      o da yoksa tüm doktorların ortalaması, o da yoksa TAHMIN_VARSAYILAN_DAKIKA kullanılır.
+    İlk kullanımda son TAHMIN_ISINMA_GUN günün arşivinden ısıtılır.
+    """
+
+    def __init__(self, alfa: Optional[float] = None):
+        self._kilit = threading.Lock()
+        self._alfa = alfa
+        self._yuklendi = False
+        # Isınmayı tek bir istek yapsın; diğerleri beklemez (yükleme sürerken varsayılanlar kullanılır)
+        self._yukleniyor = False
+        self._saatlik: dict[tuple[int, int], Ortalama] = {}
+        self._doktorlar: dict[int, Ortalama] = {}
+        self._genel: dict[None, Ortalama] = {}
+        # Doktor başına 24 saatlik süre ve kümülatif kapasite tablosu; ortalamalar
+        # değiştikçe (sürüm) ilk tahminde yeniden kurulur
+        self._surum = 0
+        self._tablolar: dict[int, tuple] = {}
+
+    @property
+    def alfa(self) -> float:
+        return self._alfa if self._alfa is not None else settings.TAHMIN_EWMA_ALFA
+
+    @staticmethod
+    def _sure(baslangic: datetime.datetime, bitis: datetime.datetime) -> Optional[float]:
+        dakika = (bitis - baslangic).total_seconds() / 60
+        # Negatif / aşırı uzun süreler (unutulan 'tamamla' vb.) öğrenmeyi bozmasın
+        if dakika <= 0 or dakika > settings.TAHMIN_AZAMI_DAKIKA:
+            return None
+        return dakika
+
+    def _ekle(self, saatlik, doktorlar, genel, doktor_id, baslangic, bitis) -> None:
+        dakika = self._sure(baslangic, bitis)
+        if dakika is None:
+            return
+        _guncelle(saatlik, (doktor_id, baslangic.hour), dakika, self.alfa)
+        _guncelle(doktorlar, doktor_id, dakika, self.alfa)
+        _guncelle(genel, None, dakika, self.alfa)
+
+    def yukle(self, db: Session) -> None:
+        """Ortalamaları arşivdeki tamamlanmış muayenelerden yeniden hesaplar."""
+        baslangic = gun_araligi()[0] - datetime.timedelta(days=settings.TAHMIN_ISINMA_GUN)
+        saatlik, doktorlar, genel = {}, {}, {}
+        for satir in db.execute(_ISINMA_SQL, {"baslangic": baslangic}):
+            self._ekle(saatlik, doktorlar, genel, satir.doktorid, satir.cagrilmatarihi, satir.tamamlanmatarihi)
+        with self._kilit:
+            self._saatlik, self._doktorlar, self._genel = saatlik, doktorlar, genel
+            self._surum += 1
+            self._yuklendi = True
+
+    def gozlem_ekle(self, doktor_id: int, cagrilma: datetime.datetime, tamamlanma: datetime.datetime) -> None:
+        """Tamamlanan bir muayeneyi ortalamalara ekler (O(1))."""
+        with self._kilit:
+            self._ekle(self._saatlik, self._doktorlar, self._genel, doktor_id, cagrilma, tamamlanma)
+            self._surum += 1
+
+    def hizmet_suresi(self, doktor_id: int, saat: int) -> float:
+        """Doktorun verilen saatteki tahmini muayene süresi (dakika)."""
+        for tablo, anahtar in ((self._saatlik, (doktor_id, saat)), (self._doktorlar, doktor_id), (self._genel, None)):
+            deger = tablo.get(anahtar)
+            if deger is not None and deger[1] >= settings.TAHMIN_ASGARI_GOZLEM:
+                return deger[0]
+        return settings.TAHMIN_VARSAYILAN_DAKIKA
+
+    def _saat_tablosu(self, doktor_id: int) -> tuple[list[float], list[float]]:
+        """
+        (saatlik süreler, kümülatif kapasite). kapasite[h]: gece yarısından h:00'a
+        kadar muayene edilebilecek hasta sayısı (saat başına 60 / süre).
+        """
+        anahtar = (self._surum, settings.TAHMIN_ASGARI_GOZLEM, settings.TAHMIN_VARSAYILAN_DAKIKA)
+        kayit = self._tablolar.get(doktor_id)
+        if kayit is not None and kayit[0] == anahtar:
+            return kayit[1], kayit[2]
+        sureler = [self.hizmet_suresi(doktor_id, saat) for saat in range(24)]
+        kapasite = [0.0]
+        for sure in sureler:
+            kapasite.append(kapasite[-1] + 60 / sure)
+        self._tablolar[doktor_id] = (anahtar, sureler, kapasite)
+        return sureler, kapasite
+
+    def tahmin(self, doktor_id: int, onundeki: int, zaman: Optional[datetime.datetime] = None,
+               iceride_cagrilma: Optional[datetime.datetime] = None) -> float:
+        """
+        Önünde 'onundeki' kişi olan hastanın tahmini bekleme süresi (dakika).
+        iceride_cagrilma: doktorun şu an muayene ettiği hastanın çağrılma zamanı;
+        o hastanın kalan süresi de eklenir. Saat sınırı geçildikçe o saatin
+        ortalaması kullanılır: doktorun 24 saatlik kümülatif kapasite tablosunda
+        'onundeki' hastanın biteceği an aranır. Süre kişi sayısından bağımsızdır
+        (sabit zaman; tablo ortalamalar değiştiğinde bir kez, 24 adımda kurulur).
+        Saat sınırına taşan muayene, sınırdan sonra o saatin hızıyla devam eder
+        sayılır (hasta hasta toplamadan farkı birkaç kişilik kuyrukta bile küçüktür).
+        """
+        zaman = zaman or datetime.datetime.now()
+        toplam = 0.0
+        if iceride_cagrilma is not None:
+            gecen = (zaman - iceride_cagrilma).total_seconds() / 60
+            toplam = max(0.0, self.hizmet_suresi(doktor_id, iceride_cagrilma.hour) - gecen)
+        if onundeki <= 0:
+            return toplam
+
+        sureler, kapasite = self._saat_tablosu(doktor_id)
+        baslangic = zaman + datetime.timedelta(minutes=toplam)
+        saat = baslangic.hour
+        # Başlangıç anına kadarki kapasite + önündekiler = bitiş anındaki kapasite
+        konum = saat + (baslangic.minute * 60 + baslangic.second + baslangic.microsecond / 1e6) / 3600
+        hedef = kapasite[saat] + (konum - saat) * 60 / sureler[saat] + onundeki
+        gun, kalan = divmod(hedef, kapasite[24])
+        bitis_saati = min(bisect.bisect_right(kapasite, kalan) - 1, 23)
+        bitis = gun * 24 + bitis_saati + (kalan - kapasite[bitis_saati]) * sureler[bitis_saati] / 60
+        return toplam + (bitis - konum) * 60
+
+    def hazirla(self, db: Session) -> "BeklemeTahmincisi":
+        """
+        Henüz ısıtılmadıysa arşivden yükler. Sorgu sırasında kilit tutulmaz:
+        DB_ASYNC=True iken bu metod event loop thread'inde (run_sync) çalışır ve
+        sorgu beklerken aynı thread'de başka bir istek buraya gelebilir. O sırada
+        gelen istekler yüklemeyi beklemeden mevcut (boşsa varsayılan) değerlerle tahmin yapar.
+        """
+        if self._yuklendi:
+            return self
+        with self._kilit:
+            if self._yuklendi or self._yukleniyor:
+                return self
+            self._yukleniyor = True
+        try:
+            self.yukle(db)
+        finally:
+            with self._kilit:
+                self._yukleniyor = False
+        return self
+
+    def gecersiz_kil(self) -> None:
+        with self._kilit:
+            self._yuklendi = False
+
+
+def doktor_kuyrugu(db: Session, doktor_id: int, siranumarasi: int) -> tuple[int, Optional[datetime.datetime]]:
+    """
+    Tek sorguda: doktorun sırasında bu numaradan önce bekleyen kişi sayısı ve
+    bugün çağrılıp henüz tamamlanmamış (içerideki) hastanın çağrılma zamanı.
+    """
+    baslangic, bitis = gun_araligi()
+    onundeki, iceride = db.query(
+        func.count(models.BiletAktif.biletid).filter(and_(
+            models.BiletAktif.durum == "Bekliyor",
+            models.BiletAktif.siranumarasi < siranumarasi,
+        )),
+        func.max(models.BiletAktif.cagrilmatarihi).filter(and_(
+            models.BiletAktif.durum == "Cagirildi",
+            models.BiletAktif.cagrilmatarihi >= baslangic,
+            models.BiletAktif.cagrilmatarihi < bitis,
+        )),
+    ).filter(
+        models.BiletAktif.doktorid == doktor_id
+    ).one()
+    return onundeki or 0, iceride
+
+
+def bekleme_tahmini(db: Session, doktor_id: int, siranumarasi: int) -> float:
+    """Yeni / bekleyen bir bilet için tahmini bekleme süresi (dakika)."""
+    onundeki, iceride = doktor_kuyrugu(db, doktor_id, siranumarasi)
+    return bekleme_tahmincisi.hazirla(db).tahmin(doktor_id, onundeki, iceride_cagrilma=iceride)
+
+
+def _tahmin_anlari(grup: list, ayrilma) -> list[tuple]:
+    """
+    Bir poliklinik gününün biletleri için, her biletin oluşturulduğu anda
+    önünde bekleyen kişi sayısı (poliklinik ve doktor bazında) ve doktorun
+    o an içerideki hastasının çağrılma zamanı. Olaylar zaman sırasıyla tek
+    geçişte işlenir (O(n log n)):
+    - kuyruğa giriş / çıkış, sıra numarasına göre Fenwick ağaçlarında sayılır,
+    - çağrılma / tamamlanma, doktor başına içerideki hastalar kümesinde tutulur.
+    Aynı anda olan çıkışlar ve çağrılmalar tahminden önce, girişler sonra işlenir
+    (önündeki: oluşturma < t ve çıkış > t; içerideki: çağrılma <= t < tamamlanma).
+    """
+    numaralar = {n: i for i, n in enumerate(sorted({s.siranumarasi for s in grup}))}
+    poliklinik = _SiraSayaci(len(numaralar))
+    doktorlar: dict[int, _SiraSayaci] = {}
+    iceridekiler: dict[int, set] = {}
+
+    CIKIS, ICERI, DISARI, TAHMIN, GIRIS = range(5)
+    adimlar = []
+    for s in grup:
+        cikis = ayrilma(s)
+        # Hiç beklemeyen (veya iptal zamanı bilinmeyen) biletler kimsenin önünde sayılmaz
+        if not (s.durum == "IptalEdildi" and cikis is None) and (cikis is None or cikis > s.olusturmatarihi):
+            adimlar.append((s.olusturmatarihi, GIRIS, s))
+            if cikis is not None:
+                adimlar.append((cikis, CIKIS, s))
+        if s.cagrilmatarihi is not None and (s.tamamlanmatarihi is None or s.tamamlanmatarihi > s.cagrilmatarihi):
+            adimlar.append((s.cagrilmatarihi, ICERI, s))
+            if s.tamamlanmatarihi is not None:
+                adimlar.append((s.tamamlanmatarihi, DISARI, s))
+        if s.doktorid is not None and s.cagrilmatarihi is not None:
+            adimlar.append((s.olusturmatarihi, TAHMIN, s))
+    adimlar.sort(key=lambda a: (a[0], a[1]))
+
+    sonuc = []
+    for zaman, tur, s in adimlar:
+        if tur in (GIRIS, CIKIS):
+            deger = 1 if tur == GIRIS else -1
+            konum = numaralar[s.siranumarasi]
+            poliklinik.ekle(konum, deger)
+            if s.doktorid not in doktorlar:
+                doktorlar[s.doktorid] = _SiraSayaci(len(numaralar))
+            doktorlar[s.doktorid].ekle(konum, deger)
+        elif tur == ICERI:
+            iceridekiler.setdefault(s.doktorid, set()).add(s)
+        elif tur == DISARI:
+            iceridekiler[s.doktorid].discard(s)
+        else:
+            konum = numaralar[s.siranumarasi]
+            doktor = doktorlar.get(s.doktorid)
+            iceride = max((d.cagrilmatarihi for d in iceridekiler.get(s.doktorid, ()) if d is not s), default=None)
+            sonuc.append((zaman, 0, s, poliklinik.oncekiler(konum), doktor.oncekiler(konum) if doktor else 0, iceride))
+    return sonuc
+
+
+def geriye_donuk_test(db: Session, gun_sayisi: int = 30, alfa: Optional[float] = None) -> dict:
+    """
+    Arşivdeki son 'gun_sayisi' günü zaman sırasıyla yeniden oynatır:
+    her bilet oluşturulduğu anda tahmin edilir (o ana kadar tamamlanmış
+    muayenelerle öğrenmiş boş bir tahminciyle), sonra gerçek bekleme
+    (oluşturma -> çağrılma) ile karşılaştırılır. Karşılaştırma için eski
+    sabit formül (poliklinikte önündeki kişi * 5 dk) da hesaplanır.
+    """
+    baslangic = gun_araligi()[0] - datetime.timedelta(days=gun_sayisi)
+    satirlar = db.query(
+        models.BiletArsiv.biletid,
+        models.BiletArsiv.doktorid,
+        models.BiletArsiv.poliklinikid,
+        models.BiletArsiv.siranumarasi,
+        models.BiletArsiv.durum,
+        models.BiletArsiv.olusturmatarihi,
+        models.BiletArsiv.cagrilmatarihi,
+        models.BiletArsiv.tamamlanmatarihi,
+        models.BiletArsiv.kapanistarihi,
+    ).filter(
+        models.BiletArsiv.kapanistarihi >= baslangic,
+        models.BiletArsiv.olusturmatarihi.isnot(None),
+    ).all()
+
+    def ayrilma(s):
+        # Biletin bekleme sırasından çıktığı an (bilinmiyorsa None)
+        if s.cagrilmatarihi is not None:
+            return s.cagrilmatarihi
+        if s.durum == "Ertelendi":
+            return s.kapanistarihi
+        return None
+
+    # Her bilet için oluşturulduğu anda önünde bekleyenleri (poliklinik ve doktor bazında) say
+    gruplar: dict[tuple, list] = {}
+    for s in satirlar:
+        gruplar.setdefault((s.poliklinikid, s.olusturmatarihi.date()), []).append(s)
+
+    olaylar = []
+    for grup in gruplar.values():
+        olaylar.extend(_tahmin_anlari(grup, ayrilma))
+    for s in satirlar:
+        if s.doktorid is not None and s.cagrilmatarihi is not None and s.tamamlanmatarihi is not None:
+            olaylar.append((s.tamamlanmatarihi, 1, s, 0, 0, None))
+    # Aynı anda olan tamamlanma, tahminden önce öğrenilsin
+    olaylar.sort(key=lambda o: (o[0], -o[1]))
+
+    tahminci = BeklemeTahmincisi(alfa)
+    ewma_hata = sabit_hata = gercek_toplam = 0.0
+    sayi = 0
+    for zaman, tur, s, onundeki_pol, onundeki_dok, iceride in olaylar:
+        if tur == 1:
+            tahminci.gozlem_ekle(s.doktorid, s.cagrilmatarihi, s.tamamlanmatarihi)
+            continue
+        gercek = (s.cagrilmatarihi - s.olusturmatarihi).total_seconds() / 60
+        if gercek < 0:
+            continue
+        ewma_hata += abs(tahminci.tahmin(s.doktorid, onundeki_dok, zaman, iceride) - gercek)
+        sabit_hata += abs(onundeki_pol * 5 - gercek)
+        gercek_toplam += gercek
+        sayi += 1
+
+    return {
+        "bilet_sayisi": sayi,
+        "ortalama_gercek_bekleme_dakika": round(gercek_toplam / sayi, 2) if sayi else None,
+        "ewma_mae_dakika": round(ewma_hata / sayi, 2) if sayi else None,
+        "sabit_5dk_mae_dakika": round(sabit_hata / sayi, 2) if sayi else None,
+    }
+
+
+bekleme_tahmincisi = BeklemeTahmincisi()
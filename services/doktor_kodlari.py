@@ -0,0 +1,80 @@
+# services/doktor_kodlari.py
+import threading
+from typing import NamedTuple, Optional
+
+from sqlalchemy.orm import Session
+
+import models
+
+
+class DoktorKodu(NamedTuple):
+    poliklinikid: int
+    # sehirkodu + hastanekodu + poliklinikkodu + odakodu (bilet kodunun ilk 8 hanesi)
+    onek: str
+
+
+class DoktorKoduCozucu:
+    """
+    doktorid -> (poliklinikid, bağlantı kodu öneki) eşlemesini bellekte tutar.
+    Doktor -> Poliklinik -> Hastane -> Sehir birleşimi tüm doktorlar için tek
+    sorguyla yüklenir; bilet oluşturma yolunda tekrar çalıştırılmaz.
+    """
+
+    def __init__(self):
+        self._kilit = threading.Lock()
+        self._kodlar: Optional[dict[int, DoktorKodu]] = None
+
+    @staticmethod
+    def _sorgu(db: Session):
+        return db.query(
+            models.Doktor.doktorid, models.Doktor.poliklinikid, models.Doktor.odakodu,
+            models.Poliklinik.poliklinikkodu, models.Hastane.hastanekodu, models.Sehir.sehirkodu
+        ).select_from(models.Doktor) \
+         .join(models.Poliklinik, models.Doktor.poliklinikid == models.Poliklinik.poliklinikid) \
+         .join(models.Hastane, models.Poliklinik.hastaneid == models.Hastane.hastaneid) \
+         .join(models.Sehir, models.Hastane.sehirid == models.Sehir.sehirid)
+
+    @staticmethod
+    def _kod(satir) -> DoktorKodu:
+        return DoktorKodu(
+            poliklinikid=satir.poliklinikid,
+            onek=f"{satir.sehirkodu}{satir.hastanekodu}{satir.poliklinikkodu}{satir.odakodu}",
+        )
+
+    def yukle(self, db: Session) -> dict[int, DoktorKodu]:
+        """Tüm doktorların kodlarını toplu olarak yükler."""
+        kodlar = {satir.doktorid: self._kod(satir) for satir in self._sorgu(db).all()}
+        with self._kilit:
+            self._kodlar = kodlar
+        return kodlar
+
+    def getir(self, db: Session, doktor_id: int) -> Optional[DoktorKodu]:
+        """
+        Doktorun kodunu döndürür. Önbellek henüz yüklenmemişse toplu yükleme
+        yapılır; önbellekte olmayan bir doktor için tek satırlık sorgu atılır.
+        """
+        kodlar = self._kodlar
+        if kodlar is None:
+            kodlar = self.yukle(db)
+
+        kod = kodlar.get(doktor_id)
+        if kod is not None:
+            return kod
+
+        satir = self._sorgu(db).filter(models.Doktor.doktorid == doktor_id).first()
+        if not satir:
+            return None
+
+        kod = self._kod(satir)
+        with self._kilit:
+            if self._kodlar is not None:
+                self._kodlar[doktor_id] = kod
+        return kod
+
+    def gecersiz_kil(self) -> None:
+        """Önbelleği boşaltır; bir sonraki istekte yeniden yüklenir."""
+        with self._kilit:
+            self._kodlar = None
+
+
+doktor_kodlari = DoktorKoduCozucu()
@@ -0,0 +1,88 @@
+# services/form_metinleri.py
+import gzip
+import json
+import zlib
+from typing import Any, Iterator, Optional
+
+from sqlalchemy import Text, cast
+from sqlalchemy.orm import Session
+
+import models
+from db import settings
+
+try:
+    import zstandard
+except ImportError:  # isteğe bağlı bağımlılık
+    zstandard = None
+
+PARCA_BOYUTU = 64 * 1024
+
+
+def _yontem() -> str:
+    if settings.FORM_METNI_SIKISTIRMA == "zstd" and zstandard is not None:
+        return "zstd"
+    return "gzip"
+
+
+def metni_sikistir(veri: Any) -> Optional[models.SoruCevapFormuMetni]:
+    """
+    Sohbet metni FORM_METNI_ESIGI baytı aşıyorsa sıkıştırılmış kaydı döndürür
+    (formid çağıran tarafından atanır); aşmıyorsa None (ana tabloda kalır).
+    """
+    if veri is None or settings.FORM_METNI_ESIGI <= 0:
+        return None
+    ham = json.dumps(veri, ensure_ascii=False).encode("utf-8")
+    if len(ham) < settings.FORM_METNI_ESIGI:
+        return None
+
+    yontem = _yontem()
+    if yontem == "zstd":
+        sikistirilmis = zstandard.ZstdCompressor().compress(ham)
+    else:
+        sikistirilmis = gzip.compress(ham, compresslevel=6)
+    return models.SoruCevapFormuMetni(sikistirma=yontem, boyut=len(ham), veri=sikistirilmis)
+
+
+def _ac(yontem: str, veri: bytes) -> Iterator[bytes]:
+    if yontem == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd ile sıkıştırılmış metin için 'zstandard' paketi gerekli.")
+        yield from zstandard.ZstdDecompressor().read_to_iter(veri, read_size=PARCA_BOYUTU)
+        return
+    acici = zlib.decompressobj(16 + zlib.MAX_WBITS)  # gzip başlığı
+    for i in range(0, len(veri), PARCA_BOYUTU):
+        parca = acici.decompress(veri[i:i + PARCA_BOYUTU])
+        if parca:
+            yield parca
+    kalan = acici.flush()
+    if kalan:
+        yield kalan
+
+
+def _parcala(veri: bytes) -> Iterator[bytes]:
+    for i in range(0, len(veri), PARCA_BOYUTU):
+        yield veri[i:i + PARCA_BOYUTU]
+
+
+def metin_getir(db: Session, form_id: int, gzip_kabul: bool) -> Optional[tuple[Iterator[bytes], Optional[str]]]:
+    """
+    Formun sohbet metnini JSON bayt parçaları olarak döndürür: (parçalar, içerik kodlaması).
+    gzip ile saklanan metin, istemci kabul ediyorsa açılmadan olduğu gibi gönderilir.
+    Ana tablodaki metin PostgreSQL'de metne çevrilir (Python'da JSON ayrıştırılmaz).
+    Form veya metin yoksa None.
+    """
+    sikistirilmis = db.query(
+        models.SoruCevapFormuMetni.sikistirma, models.SoruCevapFormuMetni.veri
+    ).filter(models.SoruCevapFormuMetni.formid == form_id).first()
+    if sikistirilmis:
+        if sikistirilmis.sikistirma == "gzip" and gzip_kabul:
+            return _parcala(sikistirilmis.veri), "gzip"
+        return _ac(sikistirilmis.sikistirma, sikistirilmis.veri), None
+
+    metin = db.query(cast(models.SoruCevapFormu.formverisi_json, Text)).filter(
+        models.SoruCevapFormu.formid == form_id
+    ).scalar()
+    # JSON null (metin hiç gönderilmemiş veya yan tabloda) da yok sayılır
+    if metin is None or metin == "null":
+        return None
+    return _parcala(metin.encode("utf-8")), None
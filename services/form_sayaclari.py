@@ -0,0 +1,122 @@
+# services/form_sayaclari.py
+import datetime
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Tablodaki (silinmemiş) form sayısı
+FORM_MEVCUT = "form_mevcut"
+
+# Günlük özet + genel sayaç tek ifadede güncellenir. Çağıranın işleminde
+# (transaction) çalışır; form yazımıyla birlikte commit / rollback olur.
+_GUNCELLE_SQL = text("""
+    WITH ozet AS (
+        INSERT INTO formgunlukozettablosu (gun, gonderilen, silinen)
+        VALUES (:gun, :gonderilen, :silinen)
+        ON CONFLICT (gun) DO UPDATE
+            SET gonderilen = formgunlukozettablosu.gonderilen + EXCLUDED.gonderilen,
+                silinen = formgunlukozettablosu.silinen + EXCLUDED.silinen
+    )
+    INSERT INTO sayaclartablosu (ad, deger)
+    VALUES (:ad, :fark)
+    ON CONFLICT (ad) DO UPDATE SET deger = sayaclartablosu.deger + EXCLUDED.deger
+""")
+
+# Silinen formları (gonderimtarihi) RETURNING ile döndüren bir CTE'nin ardına
+# eklenecek CTE'ler; özet ve sayaç silme ile aynı ifadede güncellenir
+# (bkz. services/arsivleme.py)
+_SILINEN_FORM_CTE_SQL = """
+    silinen_form_gunleri AS (
+        SELECT CAST(COALESCE(gonderimtarihi, NOW()) AS date) AS gun, count(*) AS sayi
+        FROM {kaynak}
+        GROUP BY 1
+    ),
+    form_ozeti AS (
+        INSERT INTO formgunlukozettablosu (gun, gonderilen, silinen)
+        SELECT gun, 0, sayi FROM silinen_form_gunleri
+        ON CONFLICT (gun) DO UPDATE
+            SET silinen = formgunlukozettablosu.silinen + EXCLUDED.silinen
+    ),
+    form_sayaci AS (
+        INSERT INTO sayaclartablosu (ad, deger)
+        SELECT '{ad}', -count(*) FROM {kaynak}
+        HAVING count(*) > 0
+        ON CONFLICT (ad) DO UPDATE SET deger = sayaclartablosu.deger + EXCLUDED.deger
+    )
+"""
+
+
+def silinen_form_cte(kaynak: str) -> str:
+    return _SILINEN_FORM_CTE_SQL.format(kaynak=kaynak, ad=FORM_MEVCUT)
+
+
+def form_gonderildi(db: Session, gonderimtarihi: datetime.datetime) -> None:
+    db.execute(_GUNCELLE_SQL, {
+        "gun": gonderimtarihi.date(), "gonderilen": 1, "silinen": 0, "ad": FORM_MEVCUT, "fark": 1
+    })
+
+
+def formlar_silindi(db: Session, gonderimtarihleri: list[Optional[datetime.datetime]]) -> None:
+    """Silinen formların gönderim tarihlerine göre günlük özeti ve sayacı düşürür."""
+    gunler: dict[datetime.date, int] = {}
+    for tarih in gonderimtarihleri:
+        gun = (tarih or datetime.datetime.now()).date()
+        gunler[gun] = gunler.get(gun, 0) + 1
+    for gun, sayi in gunler.items():
+        db.execute(_GUNCELLE_SQL, {"gun": gun, "gonderilen": 0, "silinen": sayi, "ad": FORM_MEVCUT, "fark": -sayi})
+
+
+def istatistik(db: Session, gun: Optional[datetime.date] = None) -> tuple[int, int]:
+    """(tablodaki form sayısı, verilen günde gönderilip hâlâ duran form sayısı) — iki birincil anahtar okuması."""
+    satir = db.execute(text("""
+        SELECT
+            (SELECT deger FROM sayaclartablosu WHERE ad = :ad) AS toplam,
+            (SELECT gonderilen - silinen FROM formgunlukozettablosu WHERE gun = :gun) AS gunluk
+    """), {"ad": FORM_MEVCUT, "gun": gun or datetime.date.today()}).one()
+    return satir.toplam or 0, satir.gunluk or 0
+
+
+def gunluk_seri(db: Session, baslangic: datetime.date, bitis: datetime.date) -> list[dict]:
+    """[baslangic, bitis] aralığındaki her gün için gönderilen / silinen sayıları (eksik günler 0)."""
+    satirlar = {
+        s.gun: s for s in db.execute(text("""
+            SELECT gun, gonderilen, silinen
+            FROM formgunlukozettablosu
+            WHERE gun BETWEEN :baslangic AND :bitis
+        """), {"baslangic": baslangic, "bitis": bitis})
+    }
+    seri = []
+    gun = baslangic
+    while gun <= bitis:
+        satir = satirlar.get(gun)
+        seri.append({
+            "gun": gun,
+            "gonderilen": satir.gonderilen if satir else 0,
+            "silinen": satir.silinen if satir else 0,
+        })
+        gun += datetime.timedelta(days=1)
+    return seri
+
+
+def yeniden_hesapla(db: Session) -> int:
+    """
+    Sayacı form tablosundan yeniden hesaplar ve özet satırı olmayan günler için
+    mevcut formlardan özet oluşturur (ilk kurulum / sapma düzeltme).
+    Silinmiş formların geçmişi geri getirilemez; var olan özet satırlarına dokunulmaz.
+    """
+    toplam = db.execute(text("SELECT count(*) FROM sorucevapformlaritablosu")).scalar()
+    db.execute(text("""
+        INSERT INTO sayaclartablosu (ad, deger) VALUES (:ad, :deger)
+        ON CONFLICT (ad) DO UPDATE SET deger = EXCLUDED.deger
+    """), {"ad": FORM_MEVCUT, "deger": toplam})
+    db.execute(text("""
+        INSERT INTO formgunlukozettablosu (gun, gonderilen, silinen)
+        SELECT CAST(gonderimtarihi AS date), count(*), 0
+        FROM sorucevapformlaritablosu
+        WHERE gonderimtarihi IS NOT NULL
+        GROUP BY 1
+        ON CONFLICT (gun) DO NOTHING
+    """))
+    db.commit()
+    return toplam
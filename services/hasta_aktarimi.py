@@ -0,0 +1,181 @@
+# services/hasta_aktarimi.py
+import csv
+import io
+import json
+from typing import Callable, Iterable, Iterator, Optional
+
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+import schemas
+from db import settings
+from services.sifre_hash import sifre_hash_havuzu
+
+_KOLONLAR = ("adsoyad", "tckimlik", "sifre", "email", "telefon", "dogumtarihi")
+_hasta_dogrulayici = TypeAdapter(schemas.HastaCreate)
+
+_GECICI_TABLO_SQL = text("""
+    CREATE TEMP TABLE IF NOT EXISTS hasta_aktarim (
+        satir integer,
+        adsoyad text,
+        tckimlik varchar(11),
+        sifre varchar(255),
+        email varchar(255),
+        telefon text,
+        dogumtarihi date
+    ) ON COMMIT DELETE ROWS
+""")
+
+# Tabloda tckimlik/adsoyad/email karşılığı olan (zaten kayıtlı) satırları geçici
+# tablodan çıkarır (tek anti-join; tekil kayıt kuralı POST /api/hastalar ile aynı);
+# şifreler sadece geride kalanlar için hashlenir.
+_KAYITLILARI_AYIKLA_SQL = text("""
+    DELETE FROM hasta_aktarim g
+    WHERE EXISTS (SELECT 1 FROM hastalartablosu h WHERE h.tckimlik = g.tckimlik)
+       OR EXISTS (SELECT 1 FROM hastalartablosu h WHERE h.adsoyad = g.adsoyad)
+       OR (g.email IS NOT NULL AND EXISTS (SELECT 1 FROM hastalartablosu h WHERE h.email = g.email))
+    RETURNING g.satir, g.tckimlik
+""")
+
+_SIFRELERI_YAZ_SQL = text("""
+    UPDATE hasta_aktarim g SET sifre = v.sifre
+    FROM unnest(CAST(:satirlar AS integer[]), CAST(:sifreler AS varchar[])) AS v(satir, sifre)
+    WHERE g.satir = v.satir
+""")
+
+# Kalan satırları ekler. Ayıklama ile ekleme arasında başka bir istekle eklenen
+# kayıtlar ON CONFLICT ile atlanır ve ikinci SELECT ile döner.
+_EKLE_SQL = text("""
+    WITH eklenen AS (
+        INSERT INTO hastalartablosu (adsoyad, tckimlik, sifre, email, telefon, dogumtarihi)
+        SELECT g.adsoyad, g.tckimlik, g.sifre, g.email, g.telefon, g.dogumtarihi
+        FROM hasta_aktarim g
+        ORDER BY g.satir
+        ON CONFLICT DO NOTHING
+        RETURNING tckimlik
+    )
+    SELECT g.satir, g.tckimlik
+    FROM hasta_aktarim g
+    WHERE NOT EXISTS (SELECT 1 FROM eklenen e WHERE e.tckimlik = g.tckimlik)
+    ORDER BY g.satir
+""")
+
+
+def satirlari_oku(dosya: io.TextIOBase, bicim: str) -> Iterator[tuple[int, object]]:
+    """
+    CSV (başlık satırlı) veya NDJSON akışını satır satır okur.
+    (satır_no, dict) döndürür; okunamayan satırlar için (satır_no, hata_mesajı).
+    """
+    if bicim == "csv":
+        okuyucu = csv.DictReader(dosya)
+        for satir_no, satir in enumerate(okuyucu, start=1):
+            yield satir_no, {k: (v if v != "" else None) for k, v in satir.items() if k in _KOLONLAR}
+    elif bicim == "ndjson":
+        for satir_no, satir in enumerate(dosya, start=1):
+            if not satir.strip():
+                continue
+            try:
+                yield satir_no, json.loads(satir)
+            except json.JSONDecodeError as e:
+                yield satir_no, f"Geçersiz JSON: {e.msg}"
+    else:
+        raise ValueError(f"Desteklenmeyen biçim: {bicim}")
+
+
+def _copy_yaz(db: Session, satirlar: list[tuple]) -> None:
+    """Satırları PostgreSQL COPY ile geçici tabloya yazar (psycopg 3 veya psycopg2)."""
+    ham = db.connection().connection.driver_connection
+    kolonlar = "satir, adsoyad, tckimlik, sifre, email, telefon, dogumtarihi"
+
+    with ham.cursor() as imlec:
+        if hasattr(imlec, "copy"):
+            # psycopg 3
+            with imlec.copy(f"COPY hasta_aktarim ({kolonlar}) FROM STDIN") as copy:
+                for satir in satirlar:
+                    copy.write_row(satir)
+        else:
+            # psycopg2
+            tampon = io.StringIO()
+            yazici = csv.writer(tampon)
+            for satir in satirlar:
+                yazici.writerow(["\\N" if d is None else d for d in satir])
+            tampon.seek(0)
+            imlec.copy_expert(f"COPY hasta_aktarim ({kolonlar}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", tampon)
+
+
+def _parti_yaz(db: Session, parti: list[tuple[int, schemas.HastaCreate]], reddet: Callable[[dict], None]) -> int:
+    db.execute(_GECICI_TABLO_SQL)
+    # 1. Satırlar şifresiz yüklenir, zaten kayıtlı olanlar ayıklanır
+    _copy_yaz(db, [
+        (satir_no, h.adsoyad, h.tckimlik, None, h.email, h.telefon, h.dogumtarihi)
+        for satir_no, h in parti
+    ])
+    zaten_kayitli = db.execute(_KAYITLILARI_AYIKLA_SQL).all()
+    ayiklanan = {satir.satir for satir in zaten_kayitli}
+    kalan = [(satir_no, h) for satir_no, h in parti if satir_no not in ayiklanan]
+
+    # 2. Sadece eklenecek satırların şifreleri hash havuzunda paralel hashlenir
+    if kalan:
+        hashler = sifre_hash_havuzu.toplu_hashle([h.sifre for _, h in kalan])
+        db.execute(_SIFRELERI_YAZ_SQL, {"satirlar": [satir_no for satir_no, _ in kalan], "sifreler": hashler})
+        zaten_kayitli += db.execute(_EKLE_SQL).all()
+    db.commit()
+
+    for satir in sorted(zaten_kayitli, key=lambda s: s.satir):
+        reddet({"satir": satir.satir, "tckimlik": satir.tckimlik, "neden": "Bu kayıt daha önceden yapılmış."})
+    return len(parti) - len(zaten_kayitli)
+
+
+def hastalari_aktar(db: Session, kayitlar: Iterable[tuple[int, object]],
+                    reddet: Callable[[dict], None], parti_boyutu: Optional[int] = None) -> int:
+    """
+    Hastaları partiler halinde içe aktarır ve eklenen kayıt sayısını döndürür.
+    - Her satır HastaCreate kurallarıyla ayrı ayrı doğrulanır (satır başına hata
+      mesajı için); hatalı satırlar reddedilir.
+    - Parti içindeki tekrar eden tckimlik/adsoyad/email reddedilir.
+    - Geçerli satırlar COPY ile geçici tabloya yüklenir, tabloyla tek anti-join
+      ile zaten kayıtlı olanlar ayıklanır; bcrypt sadece eklenecek satırlar için
+      çalışır. Her parti ayrı commit edilir; bir satırın reddedilmesi partinin
+      geri kalanını etkilemez.
+    """
+    parti_boyutu = parti_boyutu or settings.HASTA_AKTARIM_PARTI
+    eklenen = 0
+    parti: list[tuple[int, schemas.HastaCreate]] = []
+    partideki_tc: set[str] = set()
+    partideki_ad: set[str] = set()
+    partideki_email: set[str] = set()
+
+    for satir_no, veri in kayitlar:
+        if isinstance(veri, str):
+            reddet({"satir": satir_no, "tckimlik": None, "neden": veri})
+            continue
+        try:
+            hasta = _hasta_dogrulayici.validate_python(veri)
+            if len(hasta.sifre.encode("utf-8")) > 72:
+                reddet({"satir": satir_no, "tckimlik": hasta.tckimlik, "neden": "Şifre en fazla 72 bayt olabilir."})
+                continue
+        except ValidationError as e:
+            hatalar = "; ".join(f"{'.'.join(map(str, h['loc']))}: {h['msg']}" for h in e.errors())
+            tckimlik = veri.get("tckimlik") if isinstance(veri, dict) else None
+            reddet({"satir": satir_no, "tckimlik": tckimlik, "neden": hatalar})
+            continue
+
+        if (hasta.tckimlik in partideki_tc or hasta.adsoyad in partideki_ad
+                or (hasta.email and hasta.email in partideki_email)):
+            reddet({"satir": satir_no, "tckimlik": hasta.tckimlik, "neden": "Dosyada tekrar eden kayıt."})
+            continue
+
+        parti.append((satir_no, hasta))
+        partideki_tc.add(hasta.tckimlik)
+        partideki_ad.add(hasta.adsoyad)
+        if hasta.email:
+            partideki_email.add(hasta.email)
+
+        if len(parti) >= parti_boyutu:
+            eklenen += _parti_yaz(db, parti, reddet)
+            parti, partideki_tc, partideki_ad, partideki_email = [], set(), set(), set()
+
+    if parti:
+        eklenen += _parti_yaz(db, parti, reddet)
+    return eklenen
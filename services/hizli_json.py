@@ -0,0 +1,54 @@
+# services/hizli_json.py
+"""
+Sıcak liste endpoint'leri için hızlı serileştirme yolu (HIZLI_JSON=True).
+
+Eski yol: tam ORM nesneleri -> response_model ile from_attributes doğrulaması
+-> jsonable_encoder -> json.dumps. Hızlı yol: sadece şemadaki kolonlar satır
+(tuple) olarak seçilir, sözlükler doğrudan kurulur ve orjson (kuruluysa) ile
+yazılır. Veritabanı kolonları şemayla birebir eşleştiği için ikinci bir
+doğrulama yapılmaz.
+"""
+import datetime
+import json
+from typing import Optional
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # isteğe bağlı bağımlılık; yoksa standart json kullanılır
+    orjson = None
+
+
+def _varsayilan(deger):
+    if isinstance(deger, (datetime.date, datetime.datetime, datetime.time)):
+        return deger.isoformat()
+    raise TypeError(f"JSON'a çevrilemeyen tür: {type(deger).__name__}")
+
+
+def json_baytlari(veri) -> bytes:
+    """Kompakt UTF-8 JSON (orjson ile aynı çıktı: ayraçlarda boşluk yok, ASCII kaçışı yok)."""
+    if orjson is not None:
+        return orjson.dumps(veri)
+    return json.dumps(veri, ensure_ascii=False, separators=(",", ":"), default=_varsayilan).encode("utf-8")
+
+
+class HizliJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return json_baytlari(content)
+
+
+def sema_kolonlari(model, sema) -> list:
+    """Pydantic şemasındaki alanlara karşılık gelen model kolonları (sırası şemadaki gibi)."""
+    return [getattr(model, alan) for alan in sema.model_fields]
+
+
+def satir_sozlukleri(satirlar) -> list[dict]:
+    """Kolon sorgusu satırlarını (Row) sözlüğe çevirir; anahtarlar kolon etiketleridir."""
+    return [satir._asdict() for satir in satirlar]
+
+
+def liste_yaniti(satirlar, basliklar: Optional[dict] = None) -> HizliJSONResponse:
+    return HizliJSONResponse(satir_sozlukleri(satirlar), headers=basliklar)
@@ -0,0 +1,140 @@
+# services/konum_onbellegi.py
+import hashlib
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+import models, schemas
+from db import settings
+from services.hizli_json import json_baytlari, satir_sozlukleri, sema_kolonlari
+
+# Çıktı orjson ile de standart json ile de aynı baytlardır (ETag değişmez)
+_json = json_baytlari
+
+
+class KonumAnlikGoruntusu:
+    """
+    Şehir -> Hastane -> Poliklinik -> Doktor ağacının değişmez bir kopyası.
+    Her endpoint'in JSON gövdesi yükleme sırasında bir kez üretilir;
+    'surum' tüm ağacın SHA-256 özetidir ve ETag olarak kullanılır.
+    """
+
+    def __init__(self, sehirler, hastaneler, poliklinikler, doktorlar):
+        # Girdiler şema kolonlarının satırlarıdır; sözlükler doğrudan kurulur
+        sehir_listesi = satir_sozlukleri(sehirler)
+        hastane_listesi = satir_sozlukleri(hastaneler)
+        poliklinik_listesi = satir_sozlukleri(poliklinikler)
+        doktor_listesi = satir_sozlukleri(doktorlar)
+
+        # Gruplama (sıralama veritabanından geldiği gibi korunur)
+        hastaneler_by_sehir: dict[int, list] = {}
+        for h in hastane_listesi:
+            hastaneler_by_sehir.setdefault(h["sehirid"], []).append(h)
+        poliklinikler_by_hastane: dict[int, list] = {}
+        for p in poliklinik_listesi:
+            poliklinikler_by_hastane.setdefault(p["hastaneid"], []).append(p)
+        doktorlar_by_poliklinik: dict[int, list] = {}
+        for d in doktor_listesi:
+            doktorlar_by_poliklinik.setdefault(d["poliklinikid"], []).append(d)
+
+        # Koddan kimliğe eşlemeler (aynı koddan birden fazla varsa en küçük id kullanılır)
+        sehir_by_kod: dict[str, dict] = {}
+        for s in sorted(sehir_listesi, key=lambda x: x["sehirid"]):
+            sehir_by_kod.setdefault(s["sehirkodu"], s)
+        poliklinik_by_kod: dict[str, dict] = {}
+        for p in sorted(poliklinik_listesi, key=lambda x: x["poliklinikid"]):
+            poliklinik_by_kod.setdefault(p["poliklinikkodu"], p)
+
+        # ۱. /sehirler
+        self.sehirler = _json(sehir_listesi)
+
+        # ۲. /hastaneler/{sehir_kodu}
+        self.hastaneler: dict[str, bytes] = {
+            kod: _json(hastaneler_by_sehir.get(s["sehirid"], []))
+            for kod, s in sehir_by_kod.items()
+        }
+
+        # ۳. /konum/{sehir_kodu}/{hastane_kodu}/poliklinikler
+        sehir_kodu_by_id = {s["sehirid"]: s["sehirkodu"] for s in sehir_listesi}
+        self.poliklinikler: dict[tuple[str, str], bytes] = {}
+        for h in sorted(hastane_listesi, key=lambda x: x["hastaneid"]):
+            anahtar = (sehir_kodu_by_id.get(h["sehirid"]), h["hastanekodu"])
+            if anahtar[0] is not None and anahtar not in self.poliklinikler:
+                self.poliklinikler[anahtar] = _json(poliklinikler_by_hastane.get(h["hastaneid"], []))
+
+        # ۴. /konum/doktorlar/{poliklinik_kodu}
+        self.doktorlar: dict[str, bytes] = {
+            kod: _json(doktorlar_by_poliklinik.get(p["poliklinikid"], []))
+            for kod, p in poliklinik_by_kod.items()
+        }
+
+        # ۵. /agac (tüm ağaç tek yanıtta)
+        agac = [
+            {
+                **s,
+                "hastaneler": [
+                    {
+                        **h,
+                        "poliklinikler": [
+                            {**p, "doktorlar": doktorlar_by_poliklinik.get(p["poliklinikid"], [])}
+                            for p in poliklinikler_by_hastane.get(h["hastaneid"], [])
+                        ],
+                    }
+                    for h in hastaneler_by_sehir.get(s["sehirid"], [])
+                ],
+            }
+            for s in sehir_listesi
+        ]
+        self.agac = _json(agac)
+        self.surum = hashlib.sha256(self.agac).hexdigest()
+
+
+class KonumOnbellegi:
+    """
+    Konum ağacının anlık görüntüsünü bellekte tutar.
+    İlk istekte yüklenir, KONUM_ONBELLEK_SURESI dolunca ya da
+    gecersiz_kil() çağrılınca yeniden oluşturulur.
+    """
+
+    def __init__(self):
+        self._kilit = threading.Lock()
+        self._goruntu: Optional[KonumAnlikGoruntusu] = None
+        self._yuklenme_zamani = 0.0
+
+    def _gecerli_mi(self) -> bool:
+        return (
+            self._goruntu is not None
+            and time.monotonic() - self._yuklenme_zamani < settings.KONUM_ONBELLEK_SURESI
+        )
+
+    def getir(self, db: Session) -> KonumAnlikGoruntusu:
+        if self._gecerli_mi():
+            return self._goruntu
+
+        with self._kilit:
+            # Kilidi bekleyen diğer istekler yeniden yükleme yapmasın
+            if self._gecerli_mi():
+                return self._goruntu
+
+            goruntu = KonumAnlikGoruntusu(
+                sehirler=db.query(*sema_kolonlari(models.Sehir, schemas.SehirBase))
+                           .order_by(models.Sehir.sehiradi).all(),
+                hastaneler=db.query(*sema_kolonlari(models.Hastane, schemas.HastaneBase))
+                           .order_by(models.Hastane.hastaneid).all(),
+                poliklinikler=db.query(*sema_kolonlari(models.Poliklinik, schemas.PoliklinikBase))
+                              .order_by(models.Poliklinik.poliklinikadi).all(),
+                doktorlar=db.query(*sema_kolonlari(models.Doktor, schemas.DoktorBase))
+                          .order_by(models.Doktor.adsoyad).all(),
+            )
+            self._goruntu = goruntu
+            self._yuklenme_zamani = time.monotonic()
+            return goruntu
+
+    def gecersiz_kil(self) -> None:
+        with self._kilit:
+            self._goruntu = None
+
+
+konum_onbellegi = KonumOnbellegi()
@@ -0,0 +1,98 @@
+# services/liderlik.py
+import datetime
+from typing import Optional
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+import models
+
+_tablo = models.OyunEnIyiSkor.__table__
+
+
+def en_iyi_skorlari_guncelle(db: Session, skorlar: list[dict]) -> None:
+    """
+    Her (oyunadi, hastaid) için en yüksek skoru tek ifadeyle günceller.
+    Satır sadece yeni skor mevcut skordan büyükse değişir.
+    skorlar: [{"oyunadi", "hastaid", "skor", "tarih"}, ...] (aynı anahtar bir kez)
+    Commit çağırana aittir.
+    """
+    if not skorlar:
+        return
+
+    ifade = insert(_tablo).values(skorlar)
+    ifade = ifade.on_conflict_do_update(
+        index_elements=[_tablo.c.oyunadi, _tablo.c.hastaid],
+        set_={"skor": ifade.excluded.skor, "tarih": ifade.excluded.tarih},
+        where=_tablo.c.skor < ifade.excluded.skor,
+    )
+    db.execute(ifade)
+
+
+def en_iyi_skoru_guncelle(db: Session, hastaid: int, oyunadi: str, skor: int,
+                          tarih: Optional[datetime.datetime] = None) -> None:
+    en_iyi_skorlari_guncelle(db, [{
+        "oyunadi": oyunadi,
+        "hastaid": hastaid,
+        "skor": skor,
+        "tarih": tarih or datetime.datetime.now(),
+    }])
+
+
+def _sirali_sorgu(db: Session, oyun_adi: str):
+    # Sıralama: skor azalan, eşitlikte hastaid azalan -> indeksin geriye taranması
+    return db.query(
+        models.OyunEnIyiSkor.hastaid,
+        models.Hasta.adsoyad.label("adsoyad"),
+        models.OyunEnIyiSkor.skor
+    ).join(
+        models.Hasta, models.OyunEnIyiSkor.hastaid == models.Hasta.hastaid
+    ).filter(
+        models.OyunEnIyiSkor.oyunadi == oyun_adi
+    ).order_by(
+        models.OyunEnIyiSkor.skor.desc(), models.OyunEnIyiSkor.hastaid.desc()
+    )
+
+
+def liderleri_getir(db: Session, oyun_adi: str, limit: int = 10, offset: int = 0):
+    """İlk 'limit' oyuncuyu (offset'ten başlayarak) indeks üzerinden okur."""
+    return _sirali_sorgu(db, oyun_adi).offset(offset).limit(limit).all()
+
+
+def sirayi_getir(db: Session, oyun_adi: str, hasta_id: int, sayfa_boyutu: int = 10) -> Optional[dict]:
+    """
+    Hastanın oyundaki sırasını ve sırasının bulunduğu liderlik sayfasını döndürür.
+    Sıra: kendisinden yüksek skoru olan oyuncu sayısı + 1 (eşit skorlar aynı sırayı paylaşır).
+    """
+    kayit = db.query(models.OyunEnIyiSkor.skor).filter(
+        models.OyunEnIyiSkor.oyunadi == oyun_adi,
+        models.OyunEnIyiSkor.hastaid == hasta_id
+    ).first()
+    if not kayit:
+        return None
+
+    daha_yuksek = db.query(func.count()).select_from(models.OyunEnIyiSkor).filter(
+        models.OyunEnIyiSkor.oyunadi == oyun_adi,
+        models.OyunEnIyiSkor.skor > kayit.skor
+    ).scalar()
+
+    # Liste içindeki konum (eşitlikte hastaid azalan sıralamaya göre)
+    onceki = db.query(func.count()).select_from(models.OyunEnIyiSkor).filter(
+        models.OyunEnIyiSkor.oyunadi == oyun_adi,
+        or_(
+            models.OyunEnIyiSkor.skor > kayit.skor,
+            and_(models.OyunEnIyiSkor.skor == kayit.skor, models.OyunEnIyiSkor.hastaid > hasta_id)
+        )
+    ).scalar()
+
+    sayfa = onceki // sayfa_boyutu
+    return {
+        "hastaid": hasta_id,
+        "oyunadi": oyun_adi,
+        "skor": kayit.skor,
+        "sira": daha_yuksek + 1,
+        "sayfa": sayfa,
+        "sayfa_boyutu": sayfa_boyutu,
+        "liderler": liderleri_getir(db, oyun_adi, sayfa_boyutu, sayfa * sayfa_boyutu),
+    }
@@ -0,0 +1,308 @@
+# services/metrikler.py
+import bisect
+import contextvars
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+# Saniye cinsinden gecikme kovaları (Prometheus varsayılanlarına yakın)
+SURE_KOVALARI = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SORGU_KOVALARI = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Sabit kovalı histogram. Kova sayıları kümülatif değil tutulur, yazdırırken toplanır."""
+
+    __slots__ = ("kovalar", "sayilar", "toplam", "adet")
+
+    def __init__(self, kovalar: tuple):
+        self.kovalar = kovalar
+        self.sayilar = [0] * (len(kovalar) + 1)  # son eleman: +Inf
+        self.toplam = 0.0
+        self.adet = 0
+
+    def gozlemle(self, deger: float) -> None:
+        self.sayilar[bisect.bisect_left(self.kovalar, deger)] += 1
+        self.toplam += deger
+        self.adet += 1
+
+
+class IstekOlcumu:
+    """Tek bir HTTP isteği boyunca çalışan SQL ifadelerinin sayısı ve süresi."""
+
+    __slots__ = ("sorgu_sayisi", "db_suresi")
+
+    def __init__(self):
+        self.sorgu_sayisi = 0
+        self.db_suresi = 0.0
+
+
+class _IsParcacigiSayaclari:
+    """
+    Bir iş parçacığının sayaçları. Sadece sahibi olan iş parçacığı yazar;
+    sorgu başına kilit alınmaz, okurken (yazdir) tüm iş parçacıkları toplanır.
+    """
+
+    __slots__ = ("sorgu", "db_suresi", "alinan", "birakilan", "yeni_baglanti")
+
+    def __init__(self):
+        self.sorgu = 0
+        self.db_suresi = 0.0
+        self.alinan: dict[str, int] = {}
+        self.birakilan: dict[str, int] = {}
+        self.yeni_baglanti: dict[str, int] = {}
+
+
+# Threadpool'a (run_in_threadpool) kopyalanan bağlam üzerinden aynı nesneye ulaşılır
+_istek_olcumu: contextvars.ContextVar[Optional[IstekOlcumu]] = contextvars.ContextVar("istek_olcumu", default=None)
+
+
+def _kacis(deger) -> str:
+    return str(deger).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _etiketler(**etiketler) -> str:
+    return ",".join(f'{ad}="{_kacis(deger)}"' for ad, deger in etiketler.items())
+
+
+class Metrikler:
+    """
+    Uygulama metrikleri (bellek içi, süreç başına) ve Prometheus metin çıktısı.
+    - HTTP: yol şablonu + yöntem + durum kodu başına gecikme histogramı
+    - İstek başına SQL ifadesi sayısı ve toplam veritabanı süresi
+    - Havuz: oturumun bağlantı alma süresi, kullanımdaki ve yeni açılan bağlantılar
+    """
+
+    def __init__(self):
+        self._kilit = threading.Lock()
+        self._istek_suresi: dict[tuple, Histogram] = {}
+        self._istek_sorgu: dict[tuple, Histogram] = {}
+        self._istek_db: dict[tuple, Histogram] = {}
+        self._havuz_bekleme: dict[str, Histogram] = {}
+        self._motorlar: dict[str, Engine] = {}
+        self._motor_adlari: dict[int, str] = {}
+        self._yerel = threading.local()
+        self._sayaclar: list[_IsParcacigiSayaclari] = []
+
+    def _sayac(self) -> _IsParcacigiSayaclari:
+        sayac = getattr(self._yerel, "sayac", None)
+        if sayac is None:
+            # İş parçacığı başına bir kez kilit alınır
+            sayac = self._yerel.sayac = _IsParcacigiSayaclari()
+            with self._kilit:
+                self._sayaclar.append(sayac)
+        return sayac
+
+    # --- HTTP ---
+    def istek_baslat(self):
+        return _istek_olcumu.set(IstekOlcumu())
+
+    def istek_bitir(self, belirtec, yontem: str, yol: str, durum: int, sure: float) -> None:
+        olcum = _istek_olcumu.get()
+        _istek_olcumu.reset(belirtec)
+        with self._kilit:
+            for tablo, anahtar, kovalar, deger in (
+                (self._istek_suresi, (yontem, yol, durum), SURE_KOVALARI, sure),
+                (self._istek_sorgu, (yontem, yol), SORGU_KOVALARI, olcum.sorgu_sayisi),
+                (self._istek_db, (yontem, yol), SURE_KOVALARI, olcum.db_suresi),
+            ):
+                histogram = tablo.get(anahtar)
+                if histogram is None:
+                    histogram = tablo[anahtar] = Histogram(kovalar)
+                histogram.gozlemle(deger)
+
+    # --- SQL ---
+    def _sorgu_bitti(self, sure: float) -> None:
+        olcum = _istek_olcumu.get()
+        if olcum is not None:
+            olcum.sorgu_sayisi += 1
+            olcum.db_suresi += sure
+        sayac = self._sayac()
+        sayac.sorgu += 1
+        sayac.db_suresi += sure
+
+    @staticmethod
+    def _artir(tablo: dict, ad: str) -> None:
+        tablo[ad] = tablo.get(ad, 0) + 1
+
+    def motoru_izle(self, motor: Engine, ad: str = "sync") -> None:
+        """Motorun cursor ve havuz olaylarına bağlanır (her motor için bir kez)."""
+        if ad in self._motorlar:
+            return
+        self._motorlar[ad] = motor
+        self._motor_adlari[id(motor)] = ad
+        self._havuz_bekleme[ad] = Histogram(SURE_KOVALARI)
+
+        @event.listens_for(motor, "before_cursor_execute")
+        def _once(baglanti, cursor, ifade, parametreler, baglam, coklu):
+            baglanti.info.setdefault("metrik_baslangic", []).append(time.perf_counter())
+
+        @event.listens_for(motor, "after_cursor_execute")
+        def _sonra(baglanti, cursor, ifade, parametreler, baglam, coklu):
+            self._sorgu_bitti(time.perf_counter() - baglanti.info["metrik_baslangic"].pop())
+
+        @event.listens_for(motor, "handle_error")
+        def _hata(istisna_baglami):
+            baslangiclar = istisna_baglami.connection.info.get("metrik_baslangic") if istisna_baglami.connection else None
+            if baslangiclar:
+                self._sorgu_bitti(time.perf_counter() - baslangiclar.pop())
+
+        # Havuz olayları motor üzerinden dinlenir: engine.dispose() ile oluşan yeni
+        # havuza da taşınır ve havuz türünden (QueuePool / NullPool) bağımsızdır
+        @event.listens_for(motor, "connect")
+        def _yeni(dbapi_baglanti, kayit):
+            self._artir(self._sayac().yeni_baglanti, ad)
+
+        @event.listens_for(motor, "checkout")
+        def _alindi(dbapi_baglanti, kayit, vekil):
+            self._artir(self._sayac().alinan, ad)
+
+        @event.listens_for(motor, "checkin")
+        def _birakildi(dbapi_baglanti, kayit):
+            self._artir(self._sayac().birakilan, ad)
+
+    def oturumlari_izle(self) -> None:
+        """
+        Oturumların bağlantı alma süresi (havuz bekleme + pre-ping + gerekirse
+        yeni bağlantı): Session bir ifade çalıştırmadan önce zaman damgası
+        alınır (do_orm_execute), bağlantı alınıp işlem başladığında
+        (after_begin) süre motorun histogramına yazılır. Bağlantı, bağımlılıkta
+        (get_db) önceden alınmaz; sorgu çalıştırmayan (önbellekten dönen) istekler
+        havuza hiç uğramaz.
+        """
+        if event.contains(Session, "do_orm_execute", _baglanti_istegi):
+            return
+        event.listen(Session, "do_orm_execute", _baglanti_istegi)
+        event.listen(Session, "after_begin", _baglanti_alindi)
+
+    def _baglanti_suresi(self, motor: Engine, sure: float) -> None:
+        ad = self._motor_adlari.get(id(motor))
+        if ad is None:
+            return
+        with self._kilit:
+            self._havuz_bekleme[ad].gozlemle(sure)
+
+    # --- Prometheus çıktısı ---
+    @staticmethod
+    def _histogram_yaz(satirlar: list, ad: str, aciklama: str, tablo: dict, etiket_adlari: tuple) -> None:
+        satirlar.append(f"# HELP {ad} {aciklama}")
+        satirlar.append(f"# TYPE {ad} histogram")
+        for anahtar, h in sorted(tablo.items(), key=lambda x: str(x[0])):
+            degerler = anahtar if isinstance(anahtar, tuple) else (anahtar,)
+            etiket = _etiketler(**dict(zip(etiket_adlari, degerler)))
+            kumulatif = 0
+            for sinir, sayi in zip(h.kovalar + ("+Inf",), h.sayilar):
+                kumulatif += sayi
+                satirlar.append(f'{ad}_bucket{{{etiket},le="{sinir}"}} {kumulatif}')
+            satirlar.append(f"{ad}_sum{{{etiket}}} {h.toplam}")
+            satirlar.append(f"{ad}_count{{{etiket}}} {h.adet}")
+
+    def yazdir(self) -> str:
+        satirlar: list[str] = []
+        with self._kilit:
+            sayaclar = list(self._sayaclar)
+        sorgu_toplam = sum(s.sorgu for s in sayaclar)
+        db_sure_toplam = sum(s.db_suresi for s in sayaclar)
+        kullanimda = {ad: sum(s.alinan.get(ad, 0) - s.birakilan.get(ad, 0) for s in sayaclar) for ad in self._motorlar}
+        yeni_baglanti = {ad: sum(s.yeni_baglanti.get(ad, 0) for s in sayaclar) for ad in self._motorlar}
+
+        with self._kilit:
+            self._histogram_yaz(satirlar, "mess_http_istek_suresi_saniye",
+                                "HTTP istek süresi (yol şablonu, yöntem, durum kodu)",
+                                self._istek_suresi, ("yontem", "yol", "durum"))
+            self._histogram_yaz(satirlar, "mess_http_istek_sorgu_sayisi",
+                                "İstek başına çalışan SQL ifadesi sayısı",
+                                self._istek_sorgu, ("yontem", "yol"))
+            self._histogram_yaz(satirlar, "mess_http_istek_db_suresi_saniye",
+                                "İstek başına toplam veritabanı süresi",
+                                self._istek_db, ("yontem", "yol"))
+            self._histogram_yaz(satirlar, "mess_db_havuz_bekleme_saniye",
+                                "Oturumun bağlantı alma süresi (havuz bekleme + pre-ping)",
+                                self._havuz_bekleme, ("motor",))
+
+            satirlar.append("# HELP mess_db_sorgu_toplam Çalışan toplam SQL ifadesi (arka plan işleri dahil)")
+            satirlar.append("# TYPE mess_db_sorgu_toplam counter")
+            satirlar.append(f"mess_db_sorgu_toplam {sorgu_toplam}")
+            satirlar.append("# HELP mess_db_sure_saniye_toplam Toplam SQL süresi (arka plan işleri dahil)")
+            satirlar.append("# TYPE mess_db_sure_saniye_toplam counter")
+            satirlar.append(f"mess_db_sure_saniye_toplam {db_sure_toplam}")
+
+            satirlar.append("# HELP mess_db_havuz_kullanimdaki_baglanti Havuzdan alınmış (kullanımdaki) bağlantı sayısı")
+            satirlar.append("# TYPE mess_db_havuz_kullanimdaki_baglanti gauge")
+            for ad, sayi in sorted(kullanimda.items()):
+                satirlar.append(f"mess_db_havuz_kullanimdaki_baglanti{{{_etiketler(motor=ad)}}} {sayi}")
+
+            satirlar.append("# HELP mess_db_yeni_baglanti_toplam Açılan yeni veritabanı bağlantısı (NullPool'da her istek)")
+            satirlar.append("# TYPE mess_db_yeni_baglanti_toplam counter")
+            for ad, sayi in sorted(yeni_baglanti.items()):
+                satirlar.append(f"mess_db_yeni_baglanti_toplam{{{_etiketler(motor=ad)}}} {sayi}")
+
+        # QueuePool boyut bilgisi (NullPool'da yok)
+        boyutlar = [(ad, m.pool) for ad, m in sorted(self._motorlar.items()) if hasattr(m.pool, "size")]
+        if boyutlar:
+            satirlar.append("# HELP mess_db_havuz_boyutu Havuzun sabit boyutu (pool_size)")
+            satirlar.append("# TYPE mess_db_havuz_boyutu gauge")
+            for ad, havuz in boyutlar:
+                satirlar.append(f"mess_db_havuz_boyutu{{{_etiketler(motor=ad)}}} {havuz.size()}")
+            satirlar.append("# HELP mess_db_havuz_bosta_baglanti Havuzda boşta bekleyen bağlantı sayısı")
+            satirlar.append("# TYPE mess_db_havuz_bosta_baglanti gauge")
+            for ad, havuz in boyutlar:
+                satirlar.append(f"mess_db_havuz_bosta_baglanti{{{_etiketler(motor=ad)}}} {havuz.checkedin()}")
+
+        return "\n".join(satirlar) + "\n"
+
+
+metrikler = Metrikler()
+
+
+def _baglanti_istegi(orm_ifadesi) -> None:
+    oturum = orm_ifadesi.session
+    if oturum.in_transaction():
+        # Bağlantı zaten alınmış; bu ifade havuza uğramaz
+        oturum.info.pop("metrik_baglanti_istegi", None)
+    else:
+        oturum.info["metrik_baglanti_istegi"] = time.perf_counter()
+
+
+def _baglanti_alindi(oturum, islem, baglanti) -> None:
+    baslangic = oturum.info.pop("metrik_baglanti_istegi", None)
+    if baslangic is not None:
+        metrikler._baglanti_suresi(baglanti.engine, time.perf_counter() - baslangic)
+
+
+class MetrikMiddleware:
+    """
+    Saf ASGI middleware (BaseHTTPMiddleware değil): yanıt gövdesini sarmaz,
+    sadece yanıt başlangıcındaki durum kodunu okur; SSE / akış yanıtlarında
+    ek maliyet yoktur. Yol etiketi eşleşen route şablonudur
+    (/api/biletler/canli/{baglantikodu}); eşleşmeyenler tek etikette toplanır.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        belirtec = metrikler.istek_baslat()
+        baslangic = time.perf_counter()
+        durum = 500
+
+        async def gonder(mesaj):
+            nonlocal durum
+            if mesaj["type"] == "http.response.start":
+                durum = mesaj["status"]
+            await send(mesaj)
+
+        try:
+            await self.app(scope, receive, gonder)
+        finally:
+            route = scope.get("route")
+            yol = getattr(route, "path", None) or "eslesmeyen"
+            metrikler.istek_bitir(belirtec, scope["method"], yol, durum, time.perf_counter() - baslangic)
@@ -0,0 +1,134 @@
+# services/sifre_hash.py
+import asyncio
+import functools
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import bcrypt
+
+from db import settings
+
+
+class SifreKuyruguDolu(Exception):
+    """Hash havuzunda bekleyen iş sayısı SIFRE_HASH_KUYRUK sınırına ulaştı."""
+
+
+def _isci_sayisi() -> int:
+    return settings.SIFRE_HASH_ISCI or os.cpu_count() or 1
+
+
+def _baytlar(sifre: str) -> bytes:
+    ham = sifre.encode("utf-8")
+    # bcrypt sadece ilk 72 baytı kullanır (bcrypt 5 fazlasında hata verir)
+    if len(ham) > 72:
+        raise ValueError("Şifre en fazla 72 bayt olabilir.")
+    return ham
+
+
+def hashle(sifre: str, maliyet: Optional[int] = None) -> str:
+    """Şifreyi bcrypt ile hashler (CPU yoğun; event loop'ta doğrudan çağırmayın)."""
+    maliyet = maliyet or settings.SIFRE_BCRYPT_MALIYET
+    return bcrypt.hashpw(_baytlar(sifre), bcrypt.gensalt(rounds=maliyet)).decode("ascii")
+
+
+def bcrypt_mi(kayitli: str) -> bool:
+    return kayitli.startswith(("$2a$", "$2b$", "$2y$"))
+
+
+def _maliyet(kayitli: str) -> int:
+    return int(kayitli.split("$")[2])
+
+
+@functools.lru_cache(maxsize=None)
+def _sahte_hash(maliyet: int) -> bytes:
+    return bcrypt.hashpw(b"sahte-sifre", bcrypt.gensalt(rounds=maliyet))
+
+
+def dogrula(sifre: str, kayitli: Optional[str]) -> tuple[bool, Optional[str]]:
+    """
+    Şifreyi kayıtlı değerle karşılaştırır: (doğru mu, yeni hash veya None).
+    - Kayıt yoksa (kayitli=None) sahte bir hash'e karşı bcrypt yine çalışır;
+      yanıt süresinden TC Kimlik'in kayıtlı olup olmadığı anlaşılmaz.
+    - Eski düz metin kayıtlar sabit zamanlı karşılaştırılır; doğruysa ve
+      SIFRE_GIRISTE_YENIDEN_HASH açıksa hashlenir.
+    - Maliyeti SIFRE_BCRYPT_MALIYET'ten farklı hash'ler, SIFRE_GIRISTE_YENIDEN_HASH
+      açıksa güncel maliyetle yeniden hashlenir.
+    """
+    try:
+        ham = _baytlar(sifre)
+    except ValueError:
+        return False, None
+
+    if kayitli is None:
+        bcrypt.checkpw(ham, _sahte_hash(settings.SIFRE_BCRYPT_MALIYET))
+        return False, None
+
+    if not bcrypt_mi(kayitli):
+        if not hmac.compare_digest(ham, kayitli.encode("utf-8")):
+            return False, None
+        return True, hashle(sifre) if settings.SIFRE_GIRISTE_YENIDEN_HASH else None
+
+    if not bcrypt.checkpw(ham, kayitli.encode("ascii")):
+        return False, None
+    if settings.SIFRE_GIRISTE_YENIDEN_HASH and _maliyet(kayitli) != settings.SIFRE_BCRYPT_MALIYET:
+        return True, hashle(sifre)
+    return True, None
+
+
+class SifreHashHavuzu:
+    """
+    bcrypt işlerini event loop ve Starlette threadpool'u dışında, sınırlı
+    boyutlu ayrı bir iş parçacığı havuzunda çalıştırır. bcrypt hesaplama
+    sırasında GIL'i bıraktığı için iş parçacıkları çekirdekleri paralel kullanır.
+    Kabul kontrolü: çalışan + bekleyen iş sayısı SIFRE_HASH_KUYRUK'a ulaşınca
+    yeni iş kuyruğa alınmaz, SifreKuyruguDolu fırlatılır (endpoint 503 döner).
+    """
+
+    def __init__(self):
+        self._kilit = threading.Lock()
+        self._havuz: Optional[ThreadPoolExecutor] = None
+        self._bekleyen = 0
+
+    def _havuzu_al(self) -> ThreadPoolExecutor:
+        with self._kilit:
+            if self._havuz is None:
+                self._havuz = ThreadPoolExecutor(max_workers=_isci_sayisi(), thread_name_prefix="sifre-hash")
+            return self._havuz
+
+    async def _calistir(self, islem, *args):
+        havuz = self._havuzu_al()
+        with self._kilit:
+            if self._bekleyen >= settings.SIFRE_HASH_KUYRUK:
+                raise SifreKuyruguDolu()
+            self._bekleyen += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(havuz, islem, *args)
+        finally:
+            with self._kilit:
+                self._bekleyen -= 1
+
+    async def hashle(self, sifre: str) -> str:
+        return await self._calistir(hashle, sifre)
+
+    async def dogrula(self, sifre: str, kayitli: Optional[str]) -> tuple[bool, Optional[str]]:
+        return await self._calistir(dogrula, sifre, kayitli)
+
+    def toplu_hashle(self, sifreler: list[str]) -> list[str]:
+        """Toplu aktarım gibi arka plan işleri için (kabul kontrolü uygulanmaz)."""
+        return list(self._havuzu_al().map(hashle, sifreler))
+
+    @property
+    def bekleyen(self) -> int:
+        return self._bekleyen
+
+    def kapat(self) -> None:
+        with self._kilit:
+            havuz, self._havuz = self._havuz, None
+        if havuz is not None:
+            havuz.shutdown(wait=True)
+
+
+sifre_hash_havuzu = SifreHashHavuzu()
@@ -0,0 +1,121 @@
+# services/sira_durumu.py
+import bisect
+import datetime
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+import models
+from db import settings
+
+
+@dataclass(frozen=True)
+class SiraDurumu:
+    """
+    Bir polikliniğin anlık sıra durumu.
+    - mevcut_sira: bugün 'Cagirildi' durumundaki en küçük numara (yoksa 0)
+    - bekleyenler: 'Bekliyor' durumundaki numaralar (artan sırada)
+    - biletler: biletid -> (siranumarasi, durum)
+    - doktor_bekleyenler: doktorid -> o doktorun 'Bekliyor' numaraları (artan sırada)
+    - iceridekiler: doktorid -> bugün çağrılmış, henüz bitmemiş hastanın çağrılma zamanı
+    """
+    poliklinikid: int
+    mevcut_sira: int
+    bekleyenler: tuple[int, ...]
+    biletler: dict[int, tuple[int, str]] = field(default_factory=dict)
+    doktor_bekleyenler: dict[int, tuple[int, ...]] = field(default_factory=dict)
+    iceridekiler: dict[int, datetime.datetime] = field(default_factory=dict)
+
+    def kalan_hasta(self, siranumarasi: int) -> int:
+        """Numarası verilen biletten önce sırada bekleyen kişi sayısı."""
+        return bisect.bisect_left(self.bekleyenler, siranumarasi)
+
+    def doktor_kuyrugu(self, doktorid: int, siranumarasi: int) -> tuple[int, Optional[datetime.datetime]]:
+        """Doktorun sırasında bu numaradan önce bekleyenler ve içerideki hastanın çağrılma zamanı."""
+        onundeki = bisect.bisect_left(self.doktor_bekleyenler.get(doktorid, ()), siranumarasi)
+        return onundeki, self.iceridekiler.get(doktorid)
+
+
+def sira_durumu_hesapla(db: Session, poliklinik_id: int) -> SiraDurumu:
+    """Polikliniğin tüm aktif biletlerini tek sorguda okuyup sıra durumunu çıkarır."""
+    satirlar = db.query(
+        models.BiletAktif.biletid,
+        models.BiletAktif.siranumarasi,
+        models.BiletAktif.durum,
+        models.BiletAktif.olusturmatarihi,
+        models.BiletAktif.doktorid,
+        models.BiletAktif.cagrilmatarihi,
+    ).filter(
+        models.BiletAktif.poliklinikid == poliklinik_id
+    ).all()
+
+    bugun = datetime.date.today()
+    cagirilanlar = [
+        s.siranumarasi for s in satirlar
+        if s.durum == "Cagirildi" and s.olusturmatarihi and s.olusturmatarihi.date() == bugun
+    ]
+    bekleyenler = sorted(s.siranumarasi for s in satirlar if s.durum == "Bekliyor")
+
+    doktor_bekleyenler: dict[int, list[int]] = {}
+    iceridekiler: dict[int, datetime.datetime] = {}
+    for s in satirlar:
+        if s.durum == "Bekliyor":
+            doktor_bekleyenler.setdefault(s.doktorid, []).append(s.siranumarasi)
+        elif s.durum == "Cagirildi" and s.cagrilmatarihi and s.cagrilmatarihi.date() == bugun:
+            if s.doktorid not in iceridekiler or iceridekiler[s.doktorid] < s.cagrilmatarihi:
+                iceridekiler[s.doktorid] = s.cagrilmatarihi
+
+    return SiraDurumu(
+        poliklinikid=poliklinik_id,
+        mevcut_sira=min(cagirilanlar, default=0),
+        bekleyenler=tuple(bekleyenler),
+        biletler={s.biletid: (s.siranumarasi, s.durum) for s in satirlar},
+        doktor_bekleyenler={d: tuple(sorted(n)) for d, n in doktor_bekleyenler.items()},
+        iceridekiler=iceridekiler,
+    )
+
+
+class SiraDurumuOnbellegi:
+    """
+    Poliklinik başına sıra durumunun bellek içi anlık görüntüsü.
+    Her bilet durumu değişikliği polikliniğin sürüm sayacını artırır
+    (sira_yayini.degisti üzerinden); sürümü değişmiş veya
+    SIRA_ONBELLEK_SURESI saniyeden eski görüntü yeniden hesaplanır.
+    Süre sınırı, sayacın görmediği değişiklikler (diğer işlemler/worker'lar)
+    için bir güvenlik ağıdır.
+    """
+
+    def __init__(self):
+        self._kilit = threading.Lock()
+        self._surumler: dict[int, int] = {}
+        # poliklinikid -> (sürüm, oluşturulma anı, durum)
+        self._anliklar: dict[int, tuple[int, float, SiraDurumu]] = {}
+
+    def surum_artir(self, poliklinik_id: int) -> None:
+        with self._kilit:
+            self._surumler[poliklinik_id] = self._surumler.get(poliklinik_id, 0) + 1
+
+    def tumunu_gecersiz_kil(self) -> None:
+        with self._kilit:
+            self._anliklar = {}
+
+    def getir(self, db: Session, poliklinik_id: int) -> SiraDurumu:
+        simdi = time.monotonic()
+        with self._kilit:
+            surum = self._surumler.get(poliklinik_id, 0)
+            anlik = self._anliklar.get(poliklinik_id)
+        if anlik is not None and anlik[0] == surum and simdi - anlik[1] < settings.SIRA_ONBELLEK_SURESI:
+            return anlik[2]
+
+        # Sürüm hesaplamadan önce okunur: hesaplama sırasında gelen değişiklik
+        # sürümü artırır ve bu görüntü bir sonraki istekte eskimiş sayılır
+        durum = sira_durumu_hesapla(db, poliklinik_id)
+        with self._kilit:
+            self._anliklar[poliklinik_id] = (surum, simdi, durum)
+        return durum
+
+
+sira_onbellegi = SiraDurumuOnbellegi()
@@ -0,0 +1,117 @@
+# services/sira_numaratoru.py
+import datetime
+from typing import Optional
+
+from sqlalchemy import func, select, union_all, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+import models
+from services.tarih import gun_araligi, gun_filtresi
+
+# Öncelik bantları: öncelikli hastalar 1-99, normal hastalar 101 ve sonrası
+ONCELIKLI_BANT = 0
+NORMAL_BANT = 1
+
+# Her bandın numara aralığı: (ilk numara, son numara; None = sınırsız)
+_BANT_ARALIGI = {
+    ONCELIKLI_BANT: (1, 99),
+    NORMAL_BANT: (101, None),
+}
+
+
+def _gunun_son_numarasi(poliklinik_id: int, gun: datetime.date, bant: int):
+    """
+    Bugün bu bantta verilmiş en büyük numara (aktif + ertelemeyle arşive taşınmış
+    biletler). Sayaç satırı gün içinde ilk kez oluşturulurken (ör. gün ortasında
+    devreye alma) verilmiş numaraların tekrar verilmemesi için kullanılır.
+
+    Alt sorgular sadece poliklinik ve gün aralığıyla süzülür; böylece aktif
+    tabloda (poliklinikid, olusturmatarihi) ix_aktif_poliklinik_tarih_sira'nın
+    indeks koşulu olur ve sadece o günün satırları okunur. Bant koşulu dışarıda,
+    toplama (FILTER) uygulanır: alt sorgulara inmediği için planlayıcı bandı
+    (siranumarasi) indeks koşulu yapıp durum indeksinde poliklinikin tüm
+    günlerini taramaz.
+    """
+    ilk, son = _BANT_ARALIGI[bant]
+    parcalar = []
+    for model in (models.BiletAktif, models.BiletArsiv):
+        kosullar = [
+            model.poliklinikid == poliklinik_id,
+            gun_filtresi(model.olusturmatarihi, gun),
+        ]
+        if model is models.BiletArsiv:
+            # bugün arşive giren biletler: sadece bu ayın bölümü taranır
+            kosullar.append(model.kapanistarihi >= gun_araligi(gun)[0])
+        parcalar.append(select(model.siranumarasi).where(*kosullar))
+    numaralar = union_all(*parcalar).subquery()
+
+    bantta = numaralar.c.siranumarasi >= ilk
+    if son is not None:
+        bantta = bantta & (numaralar.c.siranumarasi <= son)
+    return select(func.max(numaralar.c.siranumarasi).filter(bantta)).scalar_subquery()
+
+
+def _bantta_ayir(db: Session, poliklinik_id: int, gun: datetime.date, bant: int) -> Optional[int]:
+    """Banttaki sıradaki numara; bant dolduysa None."""
+    ilk, son = _BANT_ARALIGI[bant]
+    tablo = models.SiraSayaci.__table__
+    anahtar = (
+        (tablo.c.poliklinikid == poliklinik_id)
+        & (tablo.c.gun == gun)
+        & (tablo.c.oncelikbandi == bant)
+    )
+    sinir = (tablo.c.sonnumara < son) if son is not None else None
+
+    # 1. Günün sayacı varsa: tek UPDATE ... RETURNING (yaygın yol)
+    guncelle = update(tablo).where(anahtar).values(sonnumara=tablo.c.sonnumara + 1)
+    if sinir is not None:
+        guncelle = guncelle.where(sinir)
+    numara = db.execute(guncelle.returning(tablo.c.sonnumara)).scalar()
+    if numara is not None:
+        return numara
+
+    # 2. Sayaç yok (günün ilk bileti) ya da bant dolu: bugün verilmiş numaralardan
+    #    devam ederek oluştur. Eşzamanlı ilk istekte biri ekler, diğeri çakışmada artırır.
+    baslangic = func.greatest(ilk, func.coalesce(_gunun_son_numarasi(poliklinik_id, gun, bant), 0) + 1)
+    ekle = insert(tablo).values(
+        poliklinikid=poliklinik_id,
+        gun=gun,
+        oncelikbandi=bant,
+        sonnumara=baslangic,
+    )
+    ekle = ekle.on_conflict_do_update(
+        index_elements=[tablo.c.poliklinikid, tablo.c.gun, tablo.c.oncelikbandi],
+        set_={"sonnumara": tablo.c.sonnumara + 1},
+        where=sinir,
+    ).returning(tablo.c.sonnumara)
+    numara = db.execute(ekle).scalar()
+
+    if numara is None or (son is not None and numara > son):
+        return None
+    return numara
+
+
+def sonraki_sira_numarasi(
+    db: Session,
+    poliklinik_id: int,
+    is_oncelikli: bool,
+    gun: Optional[datetime.date] = None,
+) -> int:
+    """
+    Poliklinik, gün ve öncelik bandı için sıradaki numarayı sayaç tablosundan ayırır.
+
+    Sayaç satırı, çağıran işlem (transaction) commit edilene kadar kilitli
+    kalır; bu yüzden aynı banttaki eşzamanlı istekler sırayla numara alır ve
+    aynı numara iki kez verilmez. Bilet kaydı başarısız olup rollback
+    yapılırsa sayaç artışı da geri alınır, numaralarda boşluk oluşmaz.
+
+    Öncelikli bant 99'da doludur: günün 100. öncelikli hastası normal banttan
+    numara alır (101 ile çakışan bir numara verilmez).
+    """
+    gun = gun or datetime.date.today()
+    if is_oncelikli:
+        numara = _bantta_ayir(db, poliklinik_id, gun, ONCELIKLI_BANT)
+        if numara is not None:
+            return numara
+    return _bantta_ayir(db, poliklinik_id, gun, NORMAL_BANT)
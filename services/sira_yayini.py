@@ -0,0 +1,125 @@
+# services/sira_yayini.py
+import asyncio
+import threading
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from db import SessionLocal
+from services.sira_durumu import SiraDurumu, sira_onbellegi
+
+
+class Abone:
+    """Tek bir bileti takip eden istemci (WebSocket veya SSE bağlantısı)."""
+
+    def __init__(self, poliklinikid: int, biletid: int):
+        self.poliklinikid = poliklinikid
+        self.biletid = biletid
+        # Sadece en son durum önemli: kuyruk dolu ise eski mesaj atılır
+        self.kuyruk: asyncio.Queue = asyncio.Queue(maxsize=1)
+
+    def mesaj(self, durum: SiraDurumu) -> dict:
+        bilet = durum.biletler.get(self.biletid)
+        if bilet is None:
+            return {"biletid": self.biletid, "aktif": False}
+
+        siranumarasi, bilet_durumu = bilet
+        return {
+            "biletid": self.biletid,
+            "aktif": True,
+            "sizin_numaraniz": siranumarasi,
+            "durum": bilet_durumu,
+            "mevcut_sira": durum.mevcut_sira,
+            "kalan_hasta": durum.kalan_hasta(siranumarasi),
+        }
+
+    def gonder(self, mesaj: dict) -> None:
+        if self.kuyruk.full():
+            self.kuyruk.get_nowait()
+        self.kuyruk.put_nowait(mesaj)
+
+
+class SiraYayini:
+    """
+    Poliklinik bazında sıra değişikliklerini abonelere iter (push).
+    Bir poliklinikte değişiklik olduğunda sıra durumu bir kez hesaplanır ve
+    o polikliniğin tüm abonelerine dağıtılır. Aynı anda gelen değişiklikler
+    tek bir hesaplamada birleştirilir.
+    """
+
+    def __init__(self):
+        self._kilit = threading.Lock()
+        self._aboneler: dict[int, set[Abone]] = {}
+        self._bekleyen: set[int] = set()
+        self._dongu: Optional[asyncio.AbstractEventLoop] = None
+
+    async def abone_ol(self, poliklinikid: int, biletid: int) -> Abone:
+        self._dongu = asyncio.get_running_loop()
+        abone = Abone(poliklinikid, biletid)
+        with self._kilit:
+            self._aboneler.setdefault(poliklinikid, set()).add(abone)
+        return abone
+
+    def abonelikten_cik(self, abone: Abone) -> None:
+        with self._kilit:
+            aboneler = self._aboneler.get(abone.poliklinikid)
+            if aboneler is not None:
+                aboneler.discard(abone)
+                if not aboneler:
+                    del self._aboneler[abone.poliklinikid]
+
+    def degisti(self, poliklinikid: int) -> None:
+        """
+        Bilet durumunu değiştiren her endpoint commit sonrası bunu çağırır.
+        Sıra durumu önbelleğinin sürümünü artırır; threadpool içinden de
+        çağrılabilir. Abone yoksa yayın yapılmaz.
+        """
+        sira_onbellegi.surum_artir(poliklinikid)
+        if self._dongu is None or poliklinikid not in self._aboneler:
+            return
+        self._dongu.call_soon_threadsafe(self._planla, poliklinikid)
+
+    def tumu_degisti(self) -> None:
+        """Gün sonu gibi tüm poliklinikleri etkileyen işlemlerden sonra çağrılır."""
+        sira_onbellegi.tumunu_gecersiz_kil()
+        with self._kilit:
+            poliklinikler = list(self._aboneler)
+        for poliklinikid in poliklinikler:
+            self.degisti(poliklinikid)
+
+    def _planla(self, poliklinikid: int) -> None:
+        if poliklinikid in self._bekleyen:
+            return
+        self._bekleyen.add(poliklinikid)
+        asyncio.ensure_future(self._yayinla(poliklinikid))
+
+    async def _yayinla(self, poliklinikid: int) -> None:
+        # Hesaplama başlamadan önce bekleyenlerden çıkar; bu sırada gelen
+        # değişiklik yeni bir yayın planlar
+        self._bekleyen.discard(poliklinikid)
+        try:
+            durum = await run_in_threadpool(self._hesapla, poliklinikid)
+        except Exception as e:
+            print(f"Sıra yayını hatası: {e}")
+            return
+
+        with self._kilit:
+            aboneler = list(self._aboneler.get(poliklinikid, ()))
+        for abone in aboneler:
+            abone.gonder(abone.mesaj(durum))
+
+    @staticmethod
+    def _hesapla(poliklinikid: int) -> SiraDurumu:
+        db = SessionLocal()
+        try:
+            return sira_onbellegi.getir(db, poliklinikid)
+        finally:
+            db.close()
+
+    async def ilk_mesaj(self, abone: Abone) -> dict:
+        """Yeni abone için güncel durumu hesaplar."""
+        durum = await run_in_threadpool(self._hesapla, abone.poliklinikid)
+        return abone.mesaj(durum)
+
+
+sira_yayini = SiraYayini()
@@ -0,0 +1,117 @@
+# services/skor_tamponu.py
+import datetime
+import threading
+import traceback
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+import models, schemas
+from db import SessionLocal, settings
+from services.liderlik import en_iyi_skorlari_guncelle
+
+
+def skorlari_kaydet(db: Session, skorlar: list[schemas.SkorCreate],
+                    tarihler: list[datetime.datetime] = None) -> list[dict]:
+    """
+    Skorları toplu olarak kaydeder:
+    1. Tüm hasta kimlikleri tek bir IN sorgusuyla doğrulanır.
+    2. Geçerli skorlar tek bir çok satırlı INSERT ile eklenir.
+    3. En yüksek skor tablosu (oyun, hasta) başına tek satırla güncellenir.
+    Geçersiz satırlar atlanır ve [{"sira", "hastaid", "neden"}] olarak döndürülür.
+    Commit çağırana aittir.
+    """
+    simdi = datetime.datetime.now()
+    tarihler = tarihler or [simdi] * len(skorlar)
+
+    hasta_idleri = {s.hastaid for s in skorlar}
+    mevcut = {
+        satir.hastaid
+        for satir in db.query(models.Hasta.hastaid).filter(models.Hasta.hastaid.in_(hasta_idleri)).all()
+    } if hasta_idleri else set()
+
+    reddedilenler = []
+    satirlar = []
+    en_iyiler: dict[tuple[str, int], dict] = {}
+    for i, (skor, tarih) in enumerate(zip(skorlar, tarihler)):
+        if skor.skor < 0:
+            reddedilenler.append({"sira": i, "hastaid": skor.hastaid, "neden": "Skor negatif olamaz."})
+            continue
+        if skor.hastaid not in mevcut:
+            reddedilenler.append({"sira": i, "hastaid": skor.hastaid, "neden": "Bu hasta mevcut değil."})
+            continue
+
+        satirlar.append({"hastaid": skor.hastaid, "oyunadi": skor.oyunadi, "skor": skor.skor, "tarih": tarih})
+        anahtar = (skor.oyunadi, skor.hastaid)
+        if anahtar not in en_iyiler or en_iyiler[anahtar]["skor"] < skor.skor:
+            en_iyiler[anahtar] = {"oyunadi": skor.oyunadi, "hastaid": skor.hastaid, "skor": skor.skor, "tarih": tarih}
+
+    if satirlar:
+        db.execute(insert(models.OyunSkoru.__table__).values(satirlar))
+        en_iyi_skorlari_guncelle(db, list(en_iyiler.values()))
+
+    return reddedilenler
+
+
+class SkorTamponu:
+    """
+    Tekil skor isteklerini bellekte biriktirip toplu yazar (write-behind).
+    Tampon OYUN_SKOR_TAMPON_BOYUTU satıra ulaşınca ya da ilk skordan
+    OYUN_SKOR_TAMPON_MS milisaniye sonra tek işlemde (transaction) boşaltılır.
+    Not: süreç beklenmedik şekilde kapanırsa yazılmamış skorlar kaybolur.
+    """
+
+    def __init__(self):
+        self._kosul = threading.Condition()
+        self._bekleyenler: list[tuple[schemas.SkorCreate, datetime.datetime]] = []
+        self._is_parcacigi = None
+
+    def ekle(self, skor: schemas.SkorCreate) -> None:
+        with self._kosul:
+            self._bekleyenler.append((skor, datetime.datetime.now()))
+            if self._is_parcacigi is None:
+                self._is_parcacigi = threading.Thread(target=self._dongu, name="skor-tamponu", daemon=True)
+                self._is_parcacigi.start()
+            # Boş tampona gelen ilk skor: boşaltıcıyı uyandır (OYUN_SKOR_TAMPON_MS sayacı başlar);
+            # boyut dolduysa süreyi beklemeden yazdır
+            if len(self._bekleyenler) == 1 or len(self._bekleyenler) >= settings.OYUN_SKOR_TAMPON_BOYUTU:
+                self._kosul.notify()
+
+    def _dongu(self) -> None:
+        while True:
+            with self._kosul:
+                while not self._bekleyenler:
+                    self._kosul.wait()
+                # İlk skordan sonra en fazla OYUN_SKOR_TAMPON_MS bekle (boyut dolarsa erken uyanır)
+                if len(self._bekleyenler) < settings.OYUN_SKOR_TAMPON_BOYUTU:
+                    self._kosul.wait(timeout=settings.OYUN_SKOR_TAMPON_MS / 1000)
+                parti = self._bekleyenler
+                self._bekleyenler = []
+            self._yaz(parti)
+
+    def _yaz(self, parti) -> None:
+        if not parti:
+            return
+        db = SessionLocal()
+        try:
+            reddedilenler = skorlari_kaydet(db, [s for s, _ in parti], [t for _, t in parti])
+            db.commit()
+            for red in reddedilenler:
+                print(f"Tampondaki skor atlandı (hastaid={red['hastaid']}): {red['neden']}")
+        except Exception:
+            db.rollback()
+            print("\n--- SKOR TAMPONU HATASI ---")
+            traceback.print_exc()
+            print("--- END ERROR ---\n")
+        finally:
+            db.close()
+
+    def bosalt(self) -> None:
+        """Bekleyen tüm skorları hemen yazar (uygulama kapanırken çağrılır)."""
+        with self._kosul:
+            parti = self._bekleyenler
+            self._bekleyenler = []
+        self._yaz(parti)
+
+
+skor_tamponu = SkorTamponu()
@@ -0,0 +1,145 @@
+# services/sorgu_butcesi.py
+"""
+SQL ifadesi sayacı: endpoint başına sorgu bütçesi ve N+1 (aynı ifadenin
+tekrarı) tespiti.
+
+Testlerde (tests/conftest.py'deki 'sorgu_butcesi' fixture'ı):
+    with sorgu_butcesi(azami=3, tekrar_esigi=2):
+        istemci.post("/api/doktor/7/siradaki")
+Blok içinde bütçe aşılırsa veya aynı ifade 'tekrar_esigi' kez çalışırsa
+SorguButcesiAsildi (AssertionError) fırlatılır; mesajda ifadelerin listesi yer alır.
+
+Geliştirmede SORGU_DENETIMI=True ile her istek için aynı kontrol yapılır ve
+aşımlar konsola yazılır (SorguDenetimMiddleware).
+"""
+import collections
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from sqlalchemy import event
+
+from db import engine, async_engine, settings
+
+
+class SorguButcesiAsildi(AssertionError):
+    """sorgu_butcesi bloğunda bütçe aşıldı veya tekrar eden ifade bulundu."""
+
+
+class SorguSayaci:
+    """Çalışan SQL ifadelerini sırasıyla kaydeder (parametreler hariç)."""
+
+    def __init__(self):
+        self.ifadeler: list[str] = []
+
+    def ekle(self, ifade: str) -> None:
+        self.ifadeler.append(ifade)
+
+    @property
+    def sayi(self) -> int:
+        return len(self.ifadeler)
+
+    def tekrarlar(self, esik: int = 2) -> dict[str, int]:
+        """En az 'esik' kez çalışan ifadeler (bağlı parametreler olduğu için N+1 döngüleri aynı metni üretir)."""
+        return {ifade: adet for ifade, adet in collections.Counter(self.ifadeler).items() if adet >= esik}
+
+    def rapor(self) -> str:
+        return "\n".join(f"  {i}. {' '.join(ifade.split())[:200]}" for i, ifade in enumerate(self.ifadeler, start=1))
+
+    def denetle(self, azami: Optional[int], tekrar_esigi: Optional[int]) -> list[str]:
+        hatalar = []
+        if azami is not None and self.sayi > azami:
+            hatalar.append(f"{self.sayi} SQL ifadesi çalıştı, bütçe {azami}.")
+        if tekrar_esigi:
+            for ifade, adet in self.tekrarlar(tekrar_esigi).items():
+                hatalar.append(f"Aynı ifade {adet} kez çalıştı (N+1?): {' '.join(ifade.split())[:200]}")
+        return hatalar
+
+
+_kilit = threading.Lock()
+# Açık sorgu_butcesi blokları: TestClient istekleri ayrı bir thread'de çalıştığı
+# için bağlam değişkeni yerine süreç genelinde tutulur
+_bloklar: list[SorguSayaci] = []
+# SorguDenetimMiddleware'in istek başına sayacı
+_istek_sayaci: contextvars.ContextVar[Optional[SorguSayaci]] = contextvars.ContextVar("istek_sorgu_sayaci", default=None)
+_izlenen_motorlar: set[int] = set()
+
+
+def motoru_izle(motor) -> None:
+    """Motora (bir kez) before_cursor_execute dinleyicisi ekler. AsyncEngine de kabul edilir."""
+    motor = getattr(motor, "sync_engine", motor)
+    with _kilit:
+        if id(motor) in _izlenen_motorlar:
+            return
+        _izlenen_motorlar.add(id(motor))
+
+    @event.listens_for(motor, "before_cursor_execute")
+    def _say(baglanti, cursor, ifade, parametreler, baglam, coklu):
+        if _bloklar:
+            with _kilit:
+                for sayac in _bloklar:
+                    sayac.ekle(ifade)
+        sayac = _istek_sayaci.get()
+        if sayac is not None:
+            sayac.ekle(ifade)
+
+
+@contextmanager
+def sorgu_butcesi(azami: Optional[int] = None, tekrar_esigi: Optional[int] = None, motor=None):
+    """
+    Blok boyunca motorda (verilmezse senkron ve varsa asenkron motorda) çalışan
+    SQL ifadelerini sayar (tüm thread'ler). azami: izin verilen en fazla ifade
+    sayısı; tekrar_esigi: aynı ifade bu kadar kez çalışırsa hata.
+    Blok bir istisna ile biterse denetim yapılmaz.
+    """
+    for izlenen in ([motor] if motor is not None else [engine, async_engine]):
+        if izlenen is not None:
+            motoru_izle(izlenen)
+    sayac = SorguSayaci()
+    with _kilit:
+        _bloklar.append(sayac)
+    try:
+        yield sayac
+    finally:
+        with _kilit:
+            _bloklar.remove(sayac)
+
+    hatalar = sayac.denetle(azami, tekrar_esigi)
+    if hatalar:
+        raise SorguButcesiAsildi("\n".join(hatalar) + "\nÇalışan ifadeler:\n" + sayac.rapor())
+
+
+class SorguDenetimMiddleware:
+    """
+    Geliştirme ortamı için: her HTTP isteğinin SQL ifadelerini sayar;
+    SORGU_ISTEK_BUTCESI aşılırsa veya aynı ifade SORGU_TEKRAR_ESIGI kez
+    çalışırsa route şablonuyla birlikte konsola uyarı yazar.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        sayac = SorguSayaci()
+        belirtec = _istek_sayaci.set(sayac)
+        baslangic = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _istek_sayaci.reset(belirtec)
+            hatalar = sayac.denetle(settings.SORGU_ISTEK_BUTCESI or None, settings.SORGU_TEKRAR_ESIGI or None)
+            if hatalar:
+                route = scope.get("route")
+                yol = getattr(route, "path", None) or scope.get("path")
+                sure = (time.perf_counter() - baslangic) * 1000
+                print(f"\n--- SORGU BÜTÇESİ: {scope['method']} {yol} ({sure:.1f} ms) ---")
+                for hata in hatalar:
+                    print(hata)
+                print(sayac.rapor())
+                print("--- END ---\n")
@@ -0,0 +1,21 @@
+# services/tarih.py
+import datetime
+from typing import Optional
+
+from sqlalchemy import and_
+
+
+def gun_araligi(gun: Optional[datetime.date] = None) -> tuple[datetime.datetime, datetime.datetime]:
+    """Verilen günün [00:00, ertesi gün 00:00) aralığını döndürür (varsayılan: bugün)."""
+    gun = gun or datetime.date.today()
+    baslangic = datetime.datetime.combine(gun, datetime.time.min)
+    return baslangic, baslangic + datetime.timedelta(days=1)
+
+
+def gun_filtresi(kolon, gun: Optional[datetime.date] = None):
+    """
+    func.cast(kolon, Date) == gun yerine kullanılır.
+    Aralık karşılaştırması olduğu için kolon üzerindeki indeks kullanılabilir.
+    """
+    baslangic, bitis = gun_araligi(gun)
+    return and_(kolon >= baslangic, kolon < bitis)
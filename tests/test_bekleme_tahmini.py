@@ -0,0 +1,48 @@
+# tests/test_bekleme_tahmini.py
+import datetime
+
+import pytest
+
+from db import settings
+from services.bekleme_tahmini import BeklemeTahmincisi
+
+
+@pytest.fixture(autouse=True)
+def ayarlar(monkeypatch):
+    monkeypatch.setattr(settings, "TAHMIN_ASGARI_GOZLEM", 1)
+    monkeypatch.setattr(settings, "TAHMIN_VARSAYILAN_DAKIKA", 5.0)
+
+
+def _muayene(tahminci, doktor_id, baslangic, dakika, adet=3):
+    for _ in range(adet):
+        tahminci.gozlem_ekle(doktor_id, baslangic, baslangic + datetime.timedelta(minutes=dakika))
+
+
+def test_gozlem_yoksa_varsayilan_sure():
+    zaman = datetime.datetime(2026, 1, 5, 9, 0)
+    assert BeklemeTahmincisi().tahmin(1, 4, zaman) == pytest.approx(20.0)
+
+
+def test_saat_siniri_gecilince_o_saatin_hizi_kullanilir():
+    tahminci = BeklemeTahmincisi(alfa=0.5)
+    _muayene(tahminci, 1, datetime.datetime(2026, 1, 5, 10, 0), 10)
+    _muayene(tahminci, 1, datetime.datetime(2026, 1, 5, 11, 0), 5)
+
+    # 10:30'da 5 kişi: 10:30, 10:40, 10:50 (10 dk) + 11:00, 11:05 (5 dk)
+    assert tahminci.tahmin(1, 5, datetime.datetime(2026, 1, 6, 10, 30)) == pytest.approx(40.0)
+
+
+def test_yeni_gozlem_tabloyu_gunceller():
+    tahminci = BeklemeTahmincisi(alfa=1.0)
+    zaman = datetime.datetime(2026, 1, 6, 14, 0)
+    _muayene(tahminci, 1, datetime.datetime(2026, 1, 5, 14, 0), 10, adet=1)
+    assert tahminci.tahmin(1, 2, zaman) == pytest.approx(20.0)
+
+    _muayene(tahminci, 1, datetime.datetime(2026, 1, 5, 14, 0), 4, adet=1)
+    assert tahminci.tahmin(1, 2, zaman) == pytest.approx(8.0)
+
+
+def test_iceride_hastanin_kalan_suresi_eklenir():
+    zaman = datetime.datetime(2026, 1, 5, 9, 0)
+    iceride = zaman - datetime.timedelta(minutes=2)
+    assert BeklemeTahmincisi().tahmin(1, 2, zaman, iceride) == pytest.approx(13.0)
@@ -0,0 +1,107 @@
+# tests/test_gun_indeksleri.py
+"""
+Gün filtreli sıcak sorguların EXPLAIN planları: aralık filtresi (gun_filtresi)
+ve bileşik indeksler sayesinde aktif bilet ve form tablolarında sıralı tarama
+(Seq Scan) yapılmaz. Test veritabanı küçük olduğundan planlayıcı zaten sıralı
+taramayı seçebilir; enable_seqscan=off ile indeksin kullanılabilir olduğu
+(sorgunun indekse uygun yazıldığı) denetlenir.
+"""
+import datetime
+import uuid
+from contextlib import contextmanager
+
+from sqlalchemy import Date, event, func, select, text
+
+import models
+from routers.doktor_router import get_bekleyen_hastalar
+from services.bekleme_tahmini import doktor_kuyrugu
+from services.sira_numaratoru import NORMAL_BANT, _gunun_son_numarasi
+from services.tarih import gun_filtresi
+
+AKTIF = models.BiletAktif.__tablename__
+FORMLAR = models.SoruCevapFormu.__tablename__
+
+
+@contextmanager
+def _ifadeleri_yakala(db):
+    yakalanan = []
+
+    def dinle(baglanti, cursor, ifade, parametreler, baglam, coklu):
+        yakalanan.append((ifade, parametreler))
+
+    motor = db.get_bind()
+    event.listen(motor, "before_cursor_execute", dinle)
+    try:
+        yield yakalanan
+    finally:
+        event.remove(motor, "before_cursor_execute", dinle)
+
+
+def _planlar(db, islem) -> str:
+    """islem(db) çalıştırdığı SELECT'lerin EXPLAIN çıktıları (birleştirilmiş)."""
+    with _ifadeleri_yakala(db) as yakalanan:
+        islem(db)
+    baglanti = db.connection()
+    baglanti.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    planlar = []
+    for ifade, parametreler in yakalanan:
+        if ifade.lstrip().upper().startswith(("SELECT", "WITH")):
+            satirlar = baglanti.exec_driver_sql("EXPLAIN " + ifade, parametreler).scalars().all()
+            planlar.append("\n".join(satirlar))
+    assert planlar, "yakalanan SELECT yok"
+    return "\n".join(planlar)
+
+
+def test_doktor_kuyrugu_indeks_kullanir(ornek, db):
+    plan = _planlar(db, lambda d: doktor_kuyrugu(d, ornek.doktorid, 150))
+    assert "ix_aktif_doktor_durum_sira" in plan, plan
+    assert f"Seq Scan on {AKTIF}" not in plan, plan
+
+
+def test_bekleyenler_indeks_kullanir(ornek, db):
+    plan = _planlar(db, lambda d: get_bekleyen_hastalar(ornek.doktorid, d))
+    assert "ix_aktif_doktor_durum_sira" in plan, plan
+    assert f"Seq Scan on {AKTIF}" not in plan, plan
+
+
+def test_gunun_son_numarasi_gun_araligini_indeks_kosulu_yapar(ornek, db):
+    # Poliklinikin geçmiş günlerden kalan biletleri: bugünün aralığı seçici olsun
+    # (istatistikler bu işlem içinde toplanır, test sonunda geri alınır)
+    simdi = datetime.datetime.now()
+    db.execute(models.BiletAktif.__table__.insert(), [
+        {
+            "baglantikodu": f"TEST-{uuid.uuid4().hex[:12]}",
+            "hastaid": ornek.genc.hastaid,
+            "doktorid": ornek.doktorid,
+            "poliklinikid": ornek.poliklinikid,
+            "siranumarasi": 101 + i % 50,
+            "durum": "Bekliyor",
+            "olusturmatarihi": simdi - datetime.timedelta(days=1 + i % 30),
+        }
+        for i in range(600)
+    ])
+    db.execute(text(f"ANALYZE {AKTIF}"))
+
+    ifade = select(_gunun_son_numarasi(ornek.poliklinikid, datetime.date.today(), NORMAL_BANT))
+    plan = _planlar(db, lambda d: d.execute(ifade))
+
+    assert "ix_aktif_poliklinik_tarih_sira" in plan, plan
+    assert "ix_aktif_poliklinik_durum_sira" not in plan, plan
+    assert f"Seq Scan on {AKTIF}" not in plan, plan
+    # gün aralığı filtre değil, indeks koşulu
+    assert any("Index Cond" in satir and "olusturmatarihi" in satir for satir in plan.splitlines()), plan
+
+
+def test_gunluk_form_sayimi_indeks_kullanir(veritabani, db):
+    form = models.SoruCevapFormu
+    plan = _planlar(db, lambda d: d.query(func.count(form.formid)).filter(gun_filtresi(form.gonderimtarihi)).scalar())
+    assert f"ix_{FORMLAR}_gonderimtarihi" in plan, plan
+    assert f"Seq Scan on {FORMLAR}" not in plan, plan
+
+
+def test_cast_filtresi_indeksi_kullanamaz(veritabani, db):
+    # Eski yazım: kolon fonksiyona sarıldığı için indeks kullanılamaz (karşılaştırma için)
+    form = models.SoruCevapFormu
+    plan = _planlar(db, lambda d: d.query(func.count(form.formid)).filter(
+        func.cast(form.gonderimtarihi, Date) == datetime.date.today()).scalar())
+    assert f"ix_{FORMLAR}_gonderimtarihi" not in plan, plan
@@ -0,0 +1,71 @@
+# tests/test_gun_sonu.py
+import datetime
+import threading
+import uuid
+
+import pytest
+
+import models
+from db import SessionLocal, settings
+from services.arsivleme import GunSonuArsivleyici
+
+
+@pytest.fixture
+def kilitli_bilet(ornek):
+    """Dünden kalma bir bilet; başka bir işlem tarafından FOR UPDATE ile kilitli."""
+    db = SessionLocal()
+    bilet = models.BiletAktif(
+        baglantikodu=f"TEST-{uuid.uuid4().hex[:12]}", hastaid=ornek.genc.hastaid, doktorid=ornek.doktorid,
+        poliklinikid=ornek.poliklinikid, siranumarasi=101, durum="Bekliyor",
+        olusturmatarihi=datetime.datetime.now() - datetime.timedelta(days=1),
+    )
+    db.add(bilet)
+    db.commit()
+    db.query(models.BiletAktif).filter(models.BiletAktif.biletid == bilet.biletid).with_for_update().one()
+    try:
+        yield db
+    finally:
+        db.rollback()
+        db.close()
+
+
+def test_kilitli_bilet_kalirsa_tamamlanmadi_doner(kilitli_bilet, monkeypatch):
+    monkeypatch.setattr(settings, "GUN_SONU_KILITLI_TEKRAR", 2)
+    monkeypatch.setattr(settings, "GUN_SONU_KILITLI_BEKLEME_MS", 10)
+
+    sonuc = GunSonuArsivleyici().calistir(parca_boyutu=100)
+
+    assert sonuc["tamamlandi"] is False
+    assert sonuc["kalan_bilet"] >= 1
+
+
+def test_kilit_birakilinca_tekrar_denenir(kilitli_bilet, monkeypatch):
+    monkeypatch.setattr(settings, "GUN_SONU_KILITLI_TEKRAR", 20)
+    monkeypatch.setattr(settings, "GUN_SONU_KILITLI_BEKLEME_MS", 50)
+    zamanlayici = threading.Timer(0.2, kilitli_bilet.rollback)
+    zamanlayici.start()
+    try:
+        sonuc = GunSonuArsivleyici().calistir(parca_boyutu=100)
+    finally:
+        zamanlayici.join()
+
+    assert sonuc["tamamlandi"] is True
+    assert sonuc["kalan_bilet"] == 0
+    assert sonuc["tasinan_bilet"] >= 1
+
+
+def test_gecmis_gunlerin_sira_sayaclari_silinir(ornek):
+    bugun = datetime.date.today()
+    db = SessionLocal()
+    try:
+        for gun in (bugun - datetime.timedelta(days=1), bugun):
+            db.add(models.SiraSayaci(poliklinikid=ornek.poliklinikid, gun=gun, oncelikbandi=1, sonnumara=105))
+        db.commit()
+
+        sonuc = GunSonuArsivleyici().calistir(parca_boyutu=100)
+
+        kalan = db.query(models.SiraSayaci.gun).filter(models.SiraSayaci.poliklinikid == ornek.poliklinikid).all()
+        assert [g for (g,) in kalan] == [bugun]
+        assert sonuc["silinen_sayac"] >= 1
+    finally:
+        db.close()
@@ -0,0 +1,53 @@
+# tests/test_hasta_kaydi.py
+import pytest
+
+from services import sifre_hash
+from tests.conftest import _tc
+
+
+@pytest.fixture
+def hash_sayaci(monkeypatch):
+    cagrilar = []
+    asil = sifre_hash.hashle
+    monkeypatch.setattr(sifre_hash, "hashle", lambda *a: cagrilar.append(a) or asil(*a))
+    return cagrilar
+
+
+@pytest.mark.parametrize("alan", ["tckimlik", "adsoyad"])
+def test_tekrar_eden_kayit_hashlenmeden_reddedilir(istemci, ornek, hash_sayaci, alan):
+    yeni = {"adsoyad": "Yeni Hasta", "tckimlik": _tc(), "sifre": "gizli-sifre-123"}
+    yeni[alan] = getattr(ornek.genc, alan)
+
+    yanit = istemci.post("/api/hastalar/", json=yeni)
+
+    assert yanit.status_code == 400
+    assert yanit.json()["detail"] == "Bu kayıt daha önceden yapılmış."
+    assert hash_sayaci == []
+
+
+def test_yeni_kayit_hashlenir(istemci, veritabani, hash_sayaci):
+    yanit = istemci.post("/api/hastalar/", json={"adsoyad": f"Yeni Hasta {_tc()}", "tckimlik": _tc(),
+                                                 "sifre": "gizli-sifre-123"})
+
+    assert yanit.status_code == 200, yanit.text
+    assert len(hash_sayaci) == 1
+
+
+def test_toplu_aktarim_ayni_tekrar_kuralini_uygular(istemci, ornek):
+    yeni_ad = f"Toplu Hasta {_tc()}"
+    csv = "\n".join([
+        "adsoyad,tckimlik,sifre",
+        f"{ornek.genc.adsoyad},{_tc()},gizli-sifre-123",   # kayıtlı ad soyad
+        f"{yeni_ad},{_tc()},gizli-sifre-123",
+        f"{yeni_ad},{_tc()},gizli-sifre-123",              # dosyada tekrar eden ad soyad
+    ])
+
+    yanit = istemci.post("/api/hastalar/toplu?bicim=csv", content=csv.encode("utf-8"))
+
+    assert yanit.status_code == 200, yanit.text
+    sonuc = yanit.json()
+    assert sonuc["eklenen_sayisi"] == 1
+    assert {r["satir"]: r["neden"] for r in sonuc["reddedilenler"]} == {
+        1: "Bu kayıt daha önceden yapılmış.",
+        3: "Dosyada tekrar eden kayıt.",
+    }
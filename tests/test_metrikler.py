@@ -0,0 +1,55 @@
+# tests/test_metrikler.py
+import re
+import threading
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool, StaticPool
+
+from services.metrikler import metrikler
+
+
+def _deger(cikti: str, satir_basi: str) -> float:
+    eslesme = re.search(rf"^{re.escape(satir_basi)} (\S+)$", cikti, re.MULTILINE)
+    return float(eslesme.group(1)) if eslesme else 0.0
+
+
+@pytest.mark.parametrize("havuz", [StaticPool, NullPool])
+def test_baglanti_alma_suresi_havuz_turunden_bagimsiz(havuz):
+    ad = f"test-{uuid.uuid4().hex[:8]}"
+    motor = create_engine("sqlite://", poolclass=havuz)
+    metrikler.motoru_izle(motor, ad)
+    metrikler.oturumlari_izle()
+
+    with Session(motor) as oturum:
+        oturum.execute(text("SELECT 1"))
+        oturum.execute(text("SELECT 2"))   # aynı bağlantı: ikinci ölçüm yok
+        oturum.commit()
+        oturum.execute(text("SELECT 3"))   # commit sonrası bağlantı yeniden alınır
+
+    cikti = metrikler.yazdir()
+    assert _deger(cikti, f'mess_db_havuz_bekleme_saniye_count{{motor="{ad}"}}') == 2
+    assert _deger(cikti, f'mess_db_havuz_kullanimdaki_baglanti{{motor="{ad}"}}') == 0
+
+
+def test_sorgu_sayaci_is_parcaciklari_arasinda_toplanir():
+    ad = f"test-{uuid.uuid4().hex[:8]}"
+    motor = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    metrikler.motoru_izle(motor, ad)
+    once = _deger(metrikler.yazdir(), "mess_db_sorgu_toplam")
+    kilit = threading.Lock()
+
+    def calis():
+        for _ in range(25):
+            with kilit, motor.connect() as baglanti:
+                baglanti.execute(text("SELECT 1"))
+
+    is_parcaciklari = [threading.Thread(target=calis) for _ in range(4)]
+    for t in is_parcaciklari:
+        t.start()
+    for t in is_parcaciklari:
+        t.join()
+
+    assert _deger(metrikler.yazdir(), "mess_db_sorgu_toplam") - once == 100
@@ -0,0 +1,27 @@
+# tests/test_sifre_hash.py
+import bcrypt
+
+from db import settings
+from services import sifre_hash
+
+
+def test_kayit_yoksa_bcrypt_yine_calisir(monkeypatch):
+    monkeypatch.setattr(settings, "SIFRE_BCRYPT_MALIYET", 4)
+    cagrilar = []
+    asil = bcrypt.checkpw
+    monkeypatch.setattr(bcrypt, "checkpw", lambda *a: cagrilar.append(a) or asil(*a))
+
+    assert sifre_hash.dogrula("gizli123", None) == (False, None)
+    assert len(cagrilar) == 1
+
+
+def test_duz_metin_yeniden_hash_ayara_uyar(monkeypatch):
+    monkeypatch.setattr(settings, "SIFRE_BCRYPT_MALIYET", 4)
+
+    monkeypatch.setattr(settings, "SIFRE_GIRISTE_YENIDEN_HASH", False)
+    assert sifre_hash.dogrula("gizli123", "gizli123") == (True, None)
+
+    monkeypatch.setattr(settings, "SIFRE_GIRISTE_YENIDEN_HASH", True)
+    dogru, yeni_hash = sifre_hash.dogrula("gizli123", "gizli123")
+    assert dogru and sifre_hash.bcrypt_mi(yeni_hash)
+    assert sifre_hash.dogrula("yanlis", "gizli123") == (False, None)
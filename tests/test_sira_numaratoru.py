@@ -0,0 +1,52 @@
+# tests/test_sira_numaratoru.py
+import datetime
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import models
+from db import SessionLocal
+from services.sira_numaratoru import sonraki_sira_numarasi
+
+
+def _numara_al(poliklinik_id: int, is_oncelikli: bool) -> int:
+    db = SessionLocal()
+    try:
+        numara = sonraki_sira_numarasi(db, poliklinik_id, is_oncelikli)
+        db.commit()
+        return numara
+    finally:
+        db.close()
+
+
+def test_eszamanli_numaralar_bosluksuz_ve_tekil(ornek):
+    istekler = [i % 5 == 0 for i in range(300)]   # 60 öncelikli, 240 normal
+    with ThreadPoolExecutor(max_workers=16) as havuz:
+        numaralar = list(havuz.map(lambda o: (o, _numara_al(ornek.poliklinikid, o)), istekler))
+
+    oncelikli = sorted(n for o, n in numaralar if o)
+    normal = sorted(n for o, n in numaralar if not o)
+    assert oncelikli == list(range(1, 61))
+    assert normal == list(range(101, 341))
+
+
+def test_oncelikli_bant_dolunca_normal_banda_gecer(ornek):
+    numaralar = [_numara_al(ornek.poliklinikid, True) for _ in range(105)]
+    assert numaralar[:99] == list(range(1, 100))
+    # 100. öncelikli hasta 100 / 101 çakışması yerine normal banttan numara alır
+    assert numaralar[99:] == list(range(101, 107))
+    assert _numara_al(ornek.poliklinikid, False) == 107
+
+
+def test_gun_ortasinda_sayac_verilmis_numaralardan_devam_eder(ornek, db):
+    # Sayaç satırı yokken (ör. gün ortasında devreye alma) bugün verilmiş biletler
+    simdi = datetime.datetime.now()
+    for numara in (1, 2, 5, 101, 102, 110):
+        db.add(models.BiletAktif(
+            baglantikodu=f"T{uuid.uuid4().hex[:10]}",
+            hastaid=ornek.genc.hastaid, doktorid=ornek.doktorid, poliklinikid=ornek.poliklinikid,
+            siranumarasi=numara, durum="Bekliyor", olusturmatarihi=simdi, tahminibeklemesuresi="-",
+        ))
+    db.commit()
+
+    assert _numara_al(ornek.poliklinikid, True) == 6
+    assert _numara_al(ornek.poliklinikid, False) == 111
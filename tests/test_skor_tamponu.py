@@ -0,0 +1,45 @@
+# tests/test_skor_tamponu.py
+import time
+
+import schemas
+from db import settings
+from services.skor_tamponu import SkorTamponu
+
+
+def _bekle(kosul, sure: float = 2.0) -> bool:
+    bitis = time.monotonic() + sure
+    while time.monotonic() < bitis:
+        if kosul():
+            return True
+        time.sleep(0.01)
+    return kosul()
+
+
+def test_aralikli_skorlar_sure_dolunca_yazilir(monkeypatch):
+    monkeypatch.setattr(settings, "OYUN_SKOR_TAMPON_MS", 50)
+    monkeypatch.setattr(settings, "OYUN_SKOR_TAMPON_BOYUTU", 500)
+
+    tampon = SkorTamponu()
+    yazilanlar = []
+    tampon._yaz = lambda parti: yazilanlar.extend(s.skor for s, _ in parti)
+
+    tampon.ekle(schemas.SkorCreate(hastaid=1, oyunadi="Snake", skor=10))
+    assert _bekle(lambda: yazilanlar == [10])
+
+    # İlk boşaltmadan sonra, tampon süresinden daha geç gelen ikinci skor
+    time.sleep(0.2)
+    tampon.ekle(schemas.SkorCreate(hastaid=2, oyunadi="Snake", skor=20))
+    assert _bekle(lambda: yazilanlar == [10, 20])
+
+
+def test_boyut_dolunca_sure_beklenmez(monkeypatch):
+    monkeypatch.setattr(settings, "OYUN_SKOR_TAMPON_MS", 60_000)
+    monkeypatch.setattr(settings, "OYUN_SKOR_TAMPON_BOYUTU", 3)
+
+    tampon = SkorTamponu()
+    yazilanlar = []
+    tampon._yaz = lambda parti: yazilanlar.append(len(parti))
+
+    for i in range(3):
+        tampon.ekle(schemas.SkorCreate(hastaid=i, oyunadi="Snake", skor=i))
+    assert _bekle(lambda: sum(yazilanlar) == 3)
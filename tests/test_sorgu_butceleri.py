@@ -0,0 +1,46 @@
+# tests/test_sorgu_butceleri.py
+"""
+Sıcak endpoint'lerin SQL ifadesi bütçeleri. Önbellekler (doktor kodları,
+bekleme tahmincisi) ve günün sayaç satırı ilk istekte ısınır; bütçe ikinci
+istekte ölçülür. Bir değişiklik gidiş-dönüş ekliyorsa bütçe bilinçli olarak
+güncellenmelidir.
+"""
+
+
+def _bilet_al(istemci, ornek, hasta) -> dict:
+    yanit = istemci.post("/api/biletler/", json={"tckimlik": hasta.tckimlik, "doktorid": ornek.doktorid})
+    assert yanit.status_code == 200, yanit.text
+    return yanit.json()
+
+
+def test_bilet_olusturma_butcesi(istemci, ornek, sorgu_butcesi):
+    _bilet_al(istemci, ornek, ornek.genc)
+
+    # hasta + sıra numarası + doktor kuyruğu + INSERT + refresh (+ doktor kodu)
+    with sorgu_butcesi(azami=6, tekrar_esigi=2):
+        _bilet_al(istemci, ornek, ornek.genc)
+
+
+def test_bilet_takip_butcesi(istemci, ornek, sorgu_butcesi):
+    bilet = _bilet_al(istemci, ornek, ornek.genc)
+
+    # bilet + (bilet oluşturulunca eskiyen) poliklinik sıra görüntüsü
+    with sorgu_butcesi(azami=3, tekrar_esigi=2):
+        yanit = istemci.post("/api/biletler/takip/",
+                             json={"baglantikodu": bilet["baglantikodu"], "telefon": ornek.genc.telefon})
+    assert yanit.status_code == 200, yanit.text
+
+    # Görüntü güncelken sadece bilet sorgusu
+    with sorgu_butcesi(azami=1):
+        istemci.post("/api/biletler/takip/",
+                     json={"baglantikodu": bilet["baglantikodu"], "telefon": ornek.genc.telefon})
+
+
+def test_siradaki_hasta_tek_ifade(istemci, ornek, sorgu_butcesi):
+    _bilet_al(istemci, ornek, ornek.yasli)
+    _bilet_al(istemci, ornek, ornek.genc)
+
+    with sorgu_butcesi(azami=1):
+        yanit = istemci.post(f"/api/doktor/{ornek.doktorid}/siradaki")
+    assert yanit.status_code == 200, yanit.text
+    assert yanit.json()["tckimlik"] == ornek.yasli.tckimlik